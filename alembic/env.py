@@ -19,13 +19,15 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-# add your model's MetaData object here
-# for 'autogenerate' support
-# from app.core.database import Base
-# from app.models.users import User
-# from app.models.achievements import Achievement
-# target_metadata = Base.metadata
-target_metadata = None
+# Migrate the database the app is configured for (DATABASE_URL) rather than
+# the URL in alembic.ini, and compare against the models for autogenerate.
+from app.core.config import DATABASE_URL
+from app.core.database import Base
+import app.models  # noqa: F401  registers the models on Base.metadata
+import app.models.customer  # noqa: F401
+
+config.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))
+target_metadata = Base.metadata
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -0,0 +1,47 @@
+"""Add leaderboard_entries points index
+
+Revision ID: 0b5e8a6d3c21
+Revises: f3a7d9c2b410
+Create Date: 2026-10-17 16:03:44.581920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b5e8a6d3c21'
+down_revision: Union[str, None] = 'f3a7d9c2b410'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if 'leaderboard_entries' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'leaderboard_entries',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('customer_id', sa.Integer(), sa.ForeignKey('customers.id'), nullable=True),
+        sa.Column('points', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_leaderboard_entries_customer_points', 'leaderboard_entries', ['customer_id', 'points'])
+    # Seed every user from their completed goals.
+    op.execute(
+        "INSERT INTO leaderboard_entries (user_id, customer_id, points, updated_at) "
+        "SELECT users.id, users.customer_id, COALESCE(SUM(CASE WHEN user_achievements.status = 'completed' "
+        "THEN achievements.point_value ELSE 0 END), 0), CURRENT_TIMESTAMP "
+        "FROM users LEFT JOIN user_achievements ON user_achievements.user_id = users.id "
+        "LEFT JOIN achievements ON achievements.id = user_achievements.achievement_id "
+        "GROUP BY users.id, users.customer_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_leaderboard_entries_customer_points', table_name='leaderboard_entries')
+    op.drop_table('leaderboard_entries')
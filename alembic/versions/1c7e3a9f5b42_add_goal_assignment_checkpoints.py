@@ -0,0 +1,43 @@
+"""Add goal_assignment_checkpoints
+
+Revision ID: 1c7e3a9f5b42
+Revises: 7d6fe34152dc
+Create Date: 2026-10-17 07:08:15.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c7e3a9f5b42'
+down_revision: Union[str, None] = '7d6fe34152dc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if 'goal_assignment_checkpoints' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'goal_assignment_checkpoints',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('job_id', sa.String(length=100), nullable=False),
+        sa.Column('frequency', sa.String(length=50), nullable=False),
+        sa.Column('period_key', sa.String(length=20), nullable=False),
+        sa.Column('last_user_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='running'),
+        sa.Column('assigned_to_users', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_goals_assigned', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('job_id', 'frequency', 'period_key', name='uq_goal_checkpoint_job_period'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('goal_assignment_checkpoints')
@@ -0,0 +1,31 @@
+"""Add goal_assignment_checkpoints.scope
+
+Revision ID: 3b9d7f2a6e18
+Revises: 1c7e3a9f5b42
+Create Date: 2026-10-17 07:31:52.660348
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9d7f2a6e18'
+down_revision: Union[str, None] = '1c7e3a9f5b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    columns = [column['name'] for column in sa.inspect(op.get_bind()).get_columns('goal_assignment_checkpoints')]
+    if 'scope' not in columns:
+        op.add_column('goal_assignment_checkpoints', sa.Column('scope', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('goal_assignment_checkpoints') as batch_op:
+        batch_op.drop_column('scope')
@@ -0,0 +1,37 @@
+"""Add goal_assignment_claims
+
+Revision ID: 5e2a8c4d7f13
+Revises: 3b9d7f2a6e18
+Create Date: 2026-10-17 08:26:37.918450
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2a8c4d7f13'
+down_revision: Union[str, None] = '3b9d7f2a6e18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if 'goal_assignment_claims' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    # The composite primary key is the uniqueness guard lazy assignment relies on.
+    op.create_table(
+        'goal_assignment_claims',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('frequency', sa.String(length=50), primary_key=True),
+        sa.Column('period_key', sa.String(length=20), primary_key=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('goal_assignment_claims')
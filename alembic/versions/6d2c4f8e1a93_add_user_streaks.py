@@ -0,0 +1,38 @@
+"""Add user_streaks
+
+Revision ID: 6d2c4f8e1a93
+Revises: 0b5e8a6d3c21
+Create Date: 2026-10-17 16:48:19.307215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6d2c4f8e1a93'
+down_revision: Union[str, None] = '0b5e8a6d3c21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing users are filled in by StreakTracker.backfill (POST /admin/streaks/backfill).
+    if 'user_streaks' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'user_streaks',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('current_streak', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('best_streak', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_period_key', sa.String(length=20), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_streaks')
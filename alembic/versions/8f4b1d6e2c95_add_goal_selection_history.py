@@ -0,0 +1,37 @@
+"""Add goal_selection_history
+
+Revision ID: 8f4b1d6e2c95
+Revises: c51f7d2a9e80
+Create Date: 2026-10-17 11:52:09.305716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f4b1d6e2c95'
+down_revision: Union[str, None] = 'c51f7d2a9e80'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if 'goal_selection_history' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'goal_selection_history',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('frequency', sa.String(length=50), primary_key=True),
+        sa.Column('period_key', sa.String(length=20), primary_key=True),
+        sa.Column('assigned_bits', sa.LargeBinary(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('goal_selection_history')
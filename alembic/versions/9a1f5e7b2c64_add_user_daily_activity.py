@@ -0,0 +1,38 @@
+"""Add user_daily_activity rollup
+
+Revision ID: 9a1f5e7b2c64
+Revises: 6d2c4f8e1a93
+Create Date: 2026-10-17 17:21:37.640118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a1f5e7b2c64'
+down_revision: Union[str, None] = '6d2c4f8e1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing completions are rolled up by ActivityHistory.backfill (POST /admin/history/backfill).
+    if 'user_daily_activity' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'user_daily_activity',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('completed_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('points_earned', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_daily_activity')
@@ -0,0 +1,31 @@
+"""Add customer timezone for staggered goal assignment
+
+Revision ID: a3c9e1f04b27
+Revises: 5e2a8c4d7f13
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c9e1f04b27'
+down_revision: Union[str, None] = '5e2a8c4d7f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    columns = [column['name'] for column in sa.inspect(op.get_bind()).get_columns('customers')]
+    if 'timezone' not in columns:
+        op.add_column('customers', sa.Column('timezone', sa.String(length=64), nullable=False, server_default='UTC'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('customers') as batch_op:
+        batch_op.drop_column('timezone')
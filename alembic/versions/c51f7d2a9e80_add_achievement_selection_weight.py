@@ -0,0 +1,31 @@
+"""Add achievement selection weight
+
+Revision ID: c51f7d2a9e80
+Revises: a3c9e1f04b27
+Create Date: 2026-10-17 11:40:03.524871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c51f7d2a9e80'
+down_revision: Union[str, None] = 'a3c9e1f04b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    columns = [column['name'] for column in sa.inspect(op.get_bind()).get_columns('achievements')]
+    if 'selection_weight' not in columns:
+        op.add_column('achievements', sa.Column('selection_weight', sa.Float(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('achievements') as batch_op:
+        batch_op.drop_column('selection_weight')
@@ -0,0 +1,43 @@
+"""Add indexes for the hot query paths
+
+Revision ID: d4b8e2f6a170
+Revises: 9a1f5e7b2c64
+Create Date: 2026-10-17 19:42:18.306517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4b8e2f6a170'
+down_revision: Union[str, None] = '9a1f5e7b2c64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_users_email_customer_id', 'users', ['email', 'customer_id']),
+    ('ix_users_customer_id_username', 'users', ['customer_id', 'username']),
+    ('ix_achievements_frequency_id_weight', 'achievements', ['frequency', 'id', 'selection_weight']),
+    ('ix_user_achievements_user_status_due_date', 'user_achievements',
+     ['user_id', 'status', 'due_date', 'achievement_id', 'created_at']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in INDEXES:
+        if name not in [index['name'] for index in inspector.get_indexes(table)]:
+            op.create_index(name, table, columns)
+    if op.get_bind().dialect.name == 'sqlite':
+        # Refresh planner statistics so SQLite picks the new indexes right away.
+        op.execute('ANALYZE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
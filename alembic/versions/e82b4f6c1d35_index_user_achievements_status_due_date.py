@@ -0,0 +1,30 @@
+"""Index user_achievements on (status, due_date) for the expiry sweep
+
+Revision ID: e82b4f6c1d35
+Revises: 8f4b1d6e2c95
+Create Date: 2026-10-17 14:05:51.760392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e82b4f6c1d35'
+down_revision: Union[str, None] = '8f4b1d6e2c95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    indexes = [index['name'] for index in sa.inspect(op.get_bind()).get_indexes('user_achievements')]
+    if 'ix_user_achievements_status_due_date' not in indexes:
+        op.create_index('ix_user_achievements_status_due_date', 'user_achievements', ['status', 'due_date'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_achievements_status_due_date', table_name='user_achievements')
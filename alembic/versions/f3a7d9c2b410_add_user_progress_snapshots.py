@@ -0,0 +1,45 @@
+"""Add user_progress_snapshots read model
+
+Revision ID: f3a7d9c2b410
+Revises: e82b4f6c1d35
+Create Date: 2026-10-17 15:12:08.214637
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a7d9c2b410'
+down_revision: Union[str, None] = 'e82b4f6c1d35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if 'user_progress_snapshots' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'user_progress_snapshots',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('daily_pending', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('daily_completed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('weekly_pending', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('weekly_completed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('monthly_pending', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('monthly_completed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_points', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_completed_at', sa.DateTime(), nullable=True),
+        sa.Column('current_goals', sa.Text(), nullable=False, server_default='{}'),
+        sa.Column('recent_completions', sa.Text(), nullable=False, server_default='[]'),
+        sa.Column('valid_until', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_progress_snapshots')
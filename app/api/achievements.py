@@ -1,22 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Header, status
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 from typing import Optional, List
-from app.core.database import get_db
+from datetime import date
+from app.core.database import get_async_db
 from app.models.achievements import Achievement as AchievementModel
 from app.models.users import User
-from app.services.goal_crud import GoalCRUD
+from app.services.async_crud import AsyncGoalCRUD, AsyncUserCRUD
+from app.services.leaderboard import Leaderboard
+from app.services.streaks import StreakTracker
+from app.services.history import ActivityHistory, HISTORY_PAGE_SIZE
+from app.services.idempotency import completion_idempotency, IdempotencyConflict
+from app.core.config import LEADERBOARD_MAX_LIMIT
+from app.core.write_queue import WriteOutcomeUnknown
 from app.schemas.achievements import Achievement, UserProgress, UserStats, AchievementListResponse
 from app.api.authentication import JWTManager, AuthError
-from app.services.crud import UserCRUD as UserCRUDService
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 security = HTTPBearer()
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     try:
         payload = JWTManager.verify_token(credentials.credentials)
@@ -26,7 +32,7 @@ async def get_current_user(
     except AuthError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    user = UserCRUDService.get_user(db, user_id=user_id)
+    user = await AsyncUserCRUD.get_user(db, user_id=user_id)
     if user is None or not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
     return user
@@ -48,10 +54,10 @@ router = APIRouter()
 @router.get("/achievements/", response_model=dict)
 async def get_user_current_goals(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        goals = GoalCRUD.get_user_current_goals(db, current_user.id)
+        goals = await AsyncGoalCRUD.get_user_current_goals(db, current_user.id)
         all_achievements = goals.get("daily", []) + goals.get("weekly", []) + goals.get("monthly", [])
         return {
             "achievements": all_achievements,
@@ -66,14 +72,14 @@ async def get_all_achievements(
     skip: int = 0,
     limit: int = 100,
     category: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    query = db.query(AchievementModel)
+    query = select(AchievementModel)
     if category:
-        query = query.filter(AchievementModel.frequency.ilike(f"%{category}%"))
-    total_count = query.count()
-    achievements_from_db = query.offset(skip).limit(limit).all()
+        query = query.where(AchievementModel.frequency.ilike(f"%{category}%"))
+    total_count = await db.scalar(select(func.count()).select_from(query.subquery()))
+    achievements_from_db = (await db.scalars(query.offset(skip).limit(limit))).all()
     return {
         "achievements": achievements_from_db,
         "total": total_count,
@@ -82,11 +88,13 @@ async def get_all_achievements(
 
 @router.get("/achievements/categories", response_model=dict)
 async def get_achievement_categories(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     try:
-        categories_query = db.query(AchievementModel.frequency, func.count(AchievementModel.id)).group_by(AchievementModel.frequency).all()
+        categories_query = (await db.execute(
+            select(AchievementModel.frequency, func.count(AchievementModel.id)).group_by(AchievementModel.frequency)
+        )).all()
         category_stats = {category: count for category, count in categories_query if category}
         return {
             "categories": category_stats,
@@ -98,10 +106,10 @@ async def get_achievement_categories(
 @router.get("/achievements/recent", response_model=dict)
 async def get_recent_achievements(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        achievements = GoalCRUD.get_recent_completed_achievements(db, current_user.id)
+        achievements = await AsyncGoalCRUD.get_recent_completed_achievements(db, current_user.id)
         return {
             "achievements": achievements,
             "total": len(achievements)
@@ -112,10 +120,10 @@ async def get_recent_achievements(
 @router.get("/achievements/{achievement_id}", response_model=Achievement)
 async def get_achievement(
     achievement_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    achievement = db.query(AchievementModel).filter(AchievementModel.id == achievement_id).first()
+    achievement = await db.get(AchievementModel, achievement_id)
     if not achievement:
         raise HTTPException(status_code=404, detail="Achievement not found")
     return achievement
@@ -124,21 +132,43 @@ async def get_achievement(
 async def complete_achievement(
     achievement_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
+    """Complete a goal; retries carrying the same Idempotency-Key get the first response back"""
+    if idempotency_key:
+        try:
+            replay = completion_idempotency.begin(current_user.id, idempotency_key, achievement_id)
+        except IdempotencyConflict as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        if replay is not None:
+            return replay
+    
     try:
-        result = GoalCRUD.complete_achievement(db, current_user.id, achievement_id)
-        return result
+        result = await AsyncGoalCRUD.complete_achievement(db, current_user.id, achievement_id)
+    except WriteOutcomeUnknown:
+        # The completion may still commit. A retry is safe either way: the write is
+        # guarded, so it either completes the goal or reports it already completed.
+        if idempotency_key:
+            completion_idempotency.abandon(current_user.id, idempotency_key)
+        raise HTTPException(status_code=504, detail="The completion timed out and may still be applied; "
+                                                    "reload your goals before retrying")
     except Exception as e:
+        if idempotency_key:
+            completion_idempotency.abandon(current_user.id, idempotency_key)
         raise HTTPException(status_code=400, detail=str(e))
+    
+    if idempotency_key:
+        completion_idempotency.finish(current_user.id, idempotency_key, achievement_id, result)
+    return result
 
 @router.get("/progress/")
 async def get_user_progress(
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        progress = GoalCRUD.get_user_progress(db, user_id)
+        progress = await AsyncGoalCRUD.get_user_progress(db, user_id)
         return JSONResponse(content=progress)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get user progress: {str(e)}")
@@ -146,16 +176,80 @@ async def get_user_progress(
 @router.get("/users/stats")
 async def get_user_stats(
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        progress = GoalCRUD.get_user_progress(db, user_id)
-        response_data = {
-            "total_points": progress.get("total_points", 0),
-            "completed_today": progress.get("daily", {}).get("completed", 0),
-            "weekly_streak": 0,
-            "rank": "-"
-        }
-        return JSONResponse(content=response_data)
+        progress = await AsyncGoalCRUD.get_user_progress(db, user_id)
+        return JSONResponse(content=_stats_from_progress(
+            progress, await db.run_sync(Leaderboard.get_rank, user_id), await db.run_sync(StreakTracker.get_streak, user_id)
+        ))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get user stats: {str(e)}")
+
+@router.get("/dashboard")
+async def get_dashboard(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Stats, progress and recent completions for the dashboard page in one request"""
+    try:
+        progress = await AsyncGoalCRUD.get_user_progress(db, current_user.id)
+        recent = await AsyncGoalCRUD.get_recent_completed_achievements(db, current_user.id)
+        rank = await db.run_sync(Leaderboard.get_rank, current_user.id)
+        streak = await db.run_sync(StreakTracker.get_streak, current_user.id)
+        return JSONResponse(content={
+            "stats": _stats_from_progress(progress, rank, streak),
+            "progress": progress,
+            "recent": {
+                "achievements": recent,
+                "total": len(recent)
+            }
+        })
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get user stats: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to get dashboard: {str(e)}")
+
+@router.get("/history/")
+async def get_history(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: int = HISTORY_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Completed goals and points per day, newest first; pass ``next_cursor`` back as ``cursor`` for the next page"""
+    try:
+        history = await db.run_sync(ActivityHistory.get_history, user_id, start_date, end_date, limit, cursor)
+        return JSONResponse(content=history)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get history: {str(e)}")
+
+@router.get("/leaderboard")
+async def get_leaderboard(
+    limit: int = 10,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Top users of the current user's customer, plus the current user's own rank"""
+    try:
+        limit = min(max(limit, 1), LEADERBOARD_MAX_LIMIT)
+        me = await db.run_sync(Leaderboard.get_rank, current_user.id)
+        entries = await db.run_sync(Leaderboard.top, me["customer_id"], limit)
+        return JSONResponse(content={
+            "customer_id": me["customer_id"],
+            "entries": entries,
+            "me": me
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get leaderboard: {str(e)}")
+
+def _stats_from_progress(progress: dict, rank: Optional[dict] = None, streak: Optional[dict] = None) -> dict:
+    return {
+        "total_points": progress.get("total_points", 0),
+        "completed_today": progress.get("daily", {}).get("completed", 0),
+        "weekly_streak": streak["current"] if streak else 0,
+        "best_weekly_streak": streak["best"] if streak else 0,
+        "rank": rank["rank"] if rank else "-"
+    }
\ No newline at end of file
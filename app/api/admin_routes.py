@@ -1,32 +1,40 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, BackgroundTasks, Form
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
+import io
 import shutil
 import os
-import tempfile
 import traceback
 from datetime import datetime
 
 from app.core.database import get_db, SessionLocal
+from app.core.offload import run_blocking, offloaded, offload_stats, OffloadPoolFull
+from app.core.loop_monitor import loop_monitor
 from app.schemas.schemas import User, UserUpdate
 from app.services.crud import UserCRUD 
 from app.services.goal_crud import GoalCRUD
+from app.services.progress_read_model import ProgressReadModel
+from app.services.progress_cache import progress_cache
+from app.services.leaderboard import Leaderboard
+from app.services.streaks import StreakTracker
+from app.services.history import ActivityHistory
 from app.api.dependencies import (
     get_current_admin_user, get_current_super_admin_user, 
     require_role, get_query_params, CommonQueryParams
 )
 from app.api.authentication import UserRole
-from app.models.achievements import Achievement
+from app.models.achievements import Achievement, user_achievements
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
 @router.post("/goals/assign-daily-all", summary="Manually Assign Daily Goals")
 def assign_daily_goals_all(
+    incremental: bool = False,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_admin_user)
 ):
     try:
-        result = GoalCRUD.assign_daily_goals(db)
+        result = GoalCRUD.assign_daily_goals(db, incremental=incremental)
         return {
             "message": "Daily goal assignment process triggered for all active users.",
             "result": result
@@ -36,11 +44,12 @@ def assign_daily_goals_all(
 
 @router.post("/goals/assign-weekly-all", summary="Manually Assign Weekly Goals")
 def assign_weekly_goals_all(
+    incremental: bool = False,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_admin_user)
 ):
     try:
-        result = GoalCRUD.assign_weekly_goals(db)
+        result = GoalCRUD.assign_weekly_goals(db, incremental=incremental)
         return {
             "message": "Weekly goal assignment process triggered for all active users.",
             "result": result
@@ -50,11 +59,12 @@ def assign_weekly_goals_all(
 
 @router.post("/goals/assign-monthly-all", summary="Manually Assign Monthly Goals")
 def assign_monthly_goals_all(
+    incremental: bool = False,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_admin_user)
 ):
     try:
-        result = GoalCRUD.assign_monthly_goals(db)
+        result = GoalCRUD.assign_monthly_goals(db, incremental=incremental)
         return {
             "message": "Monthly goal assignment process triggered for all active users.",
             "result": result
@@ -81,6 +91,74 @@ def reassign_goals_for_user(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to reassign goals: {str(e)}")
 
+@router.post("/progress/rebuild", summary="Rebuild Progress Snapshots")
+def rebuild_progress_snapshots(
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+):
+    try:
+        rebuilt = ProgressReadModel.rebuild_all(db)
+        return {
+            "message": f"Progress snapshots rebuilt for {rebuilt} users.",
+            "rebuilt": rebuilt
+        }
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to rebuild progress snapshots: {str(e)}")
+
+@router.post("/leaderboard/rebuild", summary="Rebuild Leaderboards")
+def rebuild_leaderboards(
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+):
+    try:
+        result = Leaderboard.rebuild(db)
+        return {
+            "message": f"Leaderboards rebuilt with {result['entries']} entries.",
+            "result": result
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to rebuild leaderboards: {str(e)}")
+
+@router.post("/streaks/backfill", summary="Backfill Weekly Streaks")
+def backfill_streaks(
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+):
+    try:
+        users = StreakTracker.backfill(db)
+        return {
+            "message": f"Weekly streaks backfilled for {users} users.",
+            "users": users
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to backfill streaks: {str(e)}")
+
+@router.post("/history/backfill", summary="Backfill Daily Activity History")
+def backfill_history(
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+):
+    try:
+        rows = ActivityHistory.backfill(db)
+        return {
+            "message": f"Daily activity history backfilled with {rows} rows.",
+            "rows": rows
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to backfill history: {str(e)}")
+
+@router.get("/progress/cache", summary="Progress Cache Statistics")
+def get_progress_cache_stats(current_user = Depends(get_current_admin_user)):
+    return progress_cache.stats()
+
+@router.get("/runtime", summary="Event Loop Lag and Offload Pool Statistics")
+def get_runtime_stats(current_user = Depends(get_current_admin_user)):
+    return {
+        "event_loop": loop_monitor.stats(),
+        "offload_pools": offload_stats()
+    }
+
 @router.post("/users/{user_id}/activate")
 def activate_user(
     user_id: int,
@@ -215,8 +293,8 @@ async def upload_achievements_excel(
         raise HTTPException(status_code=400, detail="Invalid file type. Please upload an Excel file.")
 
     try:
-        data = parse_excel_from_memory(file.file)
-        result = bulk_insert_achievements(data, db)
+        data = await run_blocking("excel", parse_excel_from_memory, file.file)
+        result = await run_blocking("db", bulk_insert_achievements, data, db)
         
         return {
             "message": "Achievements processed successfully.",
@@ -224,6 +302,8 @@ async def upload_achievements_excel(
             "created": result.get("created", 0),
             "skipped": result.get("skipped", 0)
         }
+    except OffloadPoolFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Failed to process file: {str(e)}")
@@ -233,19 +313,11 @@ async def preview_achievements_excel(
     file: UploadFile = File(...),
     current_user = Depends(get_current_admin_user)
 ):
-    from app.services.archievements_import import parse_excel
-    
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(status_code=400, detail="Invalid file type")
     
-    temp_dir = tempfile.gettempdir()
-    file_path = os.path.join(temp_dir, f"preview_{current_user.id}_{file.filename}")
-    
     try:
-        with open(file_path, "wb") as f:
-            f.write(await file.read())
-        
-        data = parse_excel(file_path)
+        data = await _parse_excel_bytes(await file.read())
         return {
             "preview": [item.dict() for item in data[:10]] if hasattr(data[0], 'dict') else data[:10],
             "total_rows": len(data),
@@ -253,23 +325,31 @@ async def preview_achievements_excel(
             "previewed_by": current_user.username,
             "preview_time": datetime.utcnow().isoformat()
         }
+    except OffloadPoolFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Failed to parse file: {str(e)}")
-    finally:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+
+@offloaded("excel")
+def _parse_excel_bytes(contents: bytes):
+    from app.services.archievements_import import parse_excel_from_memory
+    
+    return parse_excel_from_memory(io.BytesIO(contents))
 
 @router.post("/achievements/create")
-async def create_achievement(
+def create_achievement(
     title: str = Form(...),
     description: str = Form(...),
     category: str = Form(...),
     duration: str = Form(...),
     points: int = Form(...),
+    weight: float = Form(1.0),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_admin_user)
 ):
+    if weight < 0:
+        raise HTTPException(status_code=400, detail="Weight cannot be negative")
     try:
         duration_minutes = convert_duration_to_minutes(duration)
         
@@ -279,6 +359,7 @@ async def create_achievement(
             point_value=points, 
             duration=duration_minutes,
             frequency=category,
+            selection_weight=weight,
             created_at=datetime.utcnow()
         )
         
@@ -293,6 +374,7 @@ async def create_achievement(
             "points": achievement.point_value,
             "duration": achievement.duration,
             "category": achievement.frequency,
+            "weight": achievement.selection_weight,
             "message": f"Achievement '{title}' created successfully!",
             "created_by": current_user.username
         }
@@ -300,8 +382,37 @@ async def create_achievement(
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to create achievement: {str(e)}")
 
+@router.put("/achievements/{achievement_id}/weight")
+def update_achievement_weight(
+    achievement_id: int,
+    weight: float = Form(...),
+    current_user = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Change how likely an achievement is to be assigned (e.g. boost under-used ones)"""
+    if weight < 0:
+        raise HTTPException(status_code=400, detail="Weight cannot be negative")
+    
+    achievement = db.query(Achievement).filter(Achievement.id == achievement_id).first()
+    if not achievement:
+        raise HTTPException(status_code=404, detail="Achievement not found")
+    
+    try:
+        achievement.selection_weight = weight
+        db.commit()
+        
+        return {
+            "id": achievement.id,
+            "title": achievement.title,
+            "weight": achievement.selection_weight,
+            "updated_by": current_user.username
+        }
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to update achievement weight: {str(e)}")
+
 @router.delete("/achievements/{achievement_id}")
-async def delete_achievement(
+def delete_achievement(
     achievement_id: int,
     current_user = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
@@ -312,8 +423,13 @@ async def delete_achievement(
             raise HTTPException(status_code=404, detail="Achievement not found")
         
         achievement_title = achievement.title
+        holders = [user_id for user_id, in db.query(user_achievements.c.user_id).filter(
+            user_achievements.c.achievement_id == achievement_id
+        )]
         db.delete(achievement)
+        ProgressReadModel.invalidate(db, holders)
         db.commit()
+        progress_cache.invalidate_many(holders)
         
         return {
             "message": f"Achievement '{achievement_title}' deleted successfully",
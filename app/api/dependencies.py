@@ -4,11 +4,11 @@ FastAPI dependencies for authentication, authorization, and common functionality
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from app.core.database import get_db
-from app.services.crud import UserCRUD
+from app.core.database import get_async_db
+from app.services.async_crud import AsyncUserCRUD
 from app.api.authentication import JWTManager, AuthError, UserRole
 from app.schemas.schemas import User
 
@@ -16,7 +16,7 @@ security = HTTPBearer()
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """Get current authenticated user from JWT token"""
     try:
@@ -35,7 +35,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = UserCRUD.get_user(db, user_id=user_id)
+    user = await AsyncUserCRUD.get_user(db, user_id=user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -100,7 +100,7 @@ async def get_current_super_admin_user(
 
 async def get_optional_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Optional[User]:
     """Get current user if authenticated, otherwise return None"""
     if credentials is None:
@@ -112,7 +112,7 @@ async def get_optional_current_user(
         if user_id is None:
             return None
             
-        user = UserCRUD.get_user(db, user_id=user_id)
+        user = await AsyncUserCRUD.get_user(db, user_id=user_id)
         if user is None or not user.is_active:
             return None
             
@@ -5,3 +5,65 @@ APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 TEMPLATES_DIR = os.path.join(APP_DIR, "templates")
 STATIC_DIR = os.path.join(APP_DIR, "static")
 SQLITE_DB_FILE = os.path.join(os.path.dirname(APP_DIR), "tender_db.sqlite")
+
+# Database engine profile. The API and GoalScheduler get separate pools so
+# background jobs can't starve request handlers of connections.
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+SCHEDULER_DB_POOL_SIZE = int(os.getenv("SCHEDULER_DB_POOL_SIZE", "2"))
+SCHEDULER_DB_MAX_OVERFLOW = int(os.getenv("SCHEDULER_DB_MAX_OVERFLOW", "2"))
+# Applied to every new SQLite connection.
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # negative = KiB, i.e. 64 MiB
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# Optional single-writer pipeline: completions and login bookkeeping are
+# committed in groups by one writer thread instead of one transaction each.
+# A delay of 0 groups whatever queued up while the previous commit ran; a few
+# ms of delay builds bigger groups where each fsync is expensive. A caller
+# waits at most WRITE_QUEUE_RESULT_TIMEOUT seconds: a write that hasn't started
+# by then is cancelled, one that has raises WriteOutcomeUnknown (it may commit).
+WRITE_QUEUE_ENABLED = os.getenv("WRITE_QUEUE_ENABLED", "false").lower() == "true"
+WRITE_QUEUE_MAX_BATCH = int(os.getenv("WRITE_QUEUE_MAX_BATCH", "64"))
+WRITE_QUEUE_MAX_DELAY_MS = float(os.getenv("WRITE_QUEUE_MAX_DELAY_MS", "0"))
+WRITE_QUEUE_RESULT_TIMEOUT = float(os.getenv("WRITE_QUEUE_RESULT_TIMEOUT", "30"))
+
+GOAL_ASSIGNMENT_BATCH_SIZE = int(os.getenv("GOAL_ASSIGNMENT_BATCH_SIZE", "5000"))
+GOAL_ASSIGNMENT_CHUNK_SIZE = int(os.getenv("GOAL_ASSIGNMENT_CHUNK_SIZE", "1000"))
+GOAL_ASSIGNMENT_WORKERS = int(os.getenv("GOAL_ASSIGNMENT_WORKERS", "1"))
+GOAL_ASSIGNMENT_SHARD_BY = os.getenv("GOAL_ASSIGNMENT_SHARD_BY", "customer")
+GOAL_SAMPLER_SEED = int(os.environ["GOAL_SAMPLER_SEED"]) if os.getenv("GOAL_SAMPLER_SEED") else None
+# "stored" writes pending rows on assignment, "lazy" writes them on the user's
+# first request of a period and "stateless" derives them on read.
+GOAL_ASSIGNMENT_MODE = os.getenv("GOAL_ASSIGNMENT_MODE", "stored")
+GOAL_PREGENERATE_NEXT_PERIOD = os.getenv("GOAL_PREGENERATE_NEXT_PERIOD", "false").lower() == "true"
+GOAL_PREGENERATE_HOUR = int(os.getenv("GOAL_PREGENERATE_HOUR", "3"))
+# Goals assigned in this many previous periods are only reused when nothing else is left.
+GOAL_NO_REPEAT_PERIODS = int(os.getenv("GOAL_NO_REPEAT_PERIODS", "3"))
+# Past-due pending goals read as expired right away; the background sweep
+# rewrites their status in small batches spread over the day.
+GOAL_EXPIRY_SWEEP_INTERVAL_MINUTES = int(os.getenv("GOAL_EXPIRY_SWEEP_INTERVAL_MINUTES", "15"))
+GOAL_EXPIRY_SWEEP_BATCH_SIZE = int(os.getenv("GOAL_EXPIRY_SWEEP_BATCH_SIZE", "500"))
+GOAL_EXPIRY_SWEEP_MAX_BATCHES = int(os.getenv("GOAL_EXPIRY_SWEEP_MAX_BATCHES", "100"))
+GOAL_EXPIRY_SWEEP_PAUSE_SECONDS = float(os.getenv("GOAL_EXPIRY_SWEEP_PAUSE_SECONDS", "0.05"))
+# Per-user progress/goals views cached in-process; 0 disables the cache.
+PROGRESS_CACHE_TTL_SECONDS = float(os.getenv("PROGRESS_CACHE_TTL_SECONDS", "30"))
+PROGRESS_CACHE_MAX_ENTRIES = int(os.getenv("PROGRESS_CACHE_MAX_ENTRIES", "10000"))
+# Per-customer leaderboards are recomputed from user_achievements on this interval.
+LEADERBOARD_REBUILD_MINUTES = int(os.getenv("LEADERBOARD_REBUILD_MINUTES", "60"))
+LEADERBOARD_MAX_LIMIT = int(os.getenv("LEADERBOARD_MAX_LIMIT", "100"))
+# Results of requests sent with an Idempotency-Key header are replayed for this long.
+IDEMPOTENCY_KEY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+# Event-loop lag monitor: logs the route and stack whenever the loop stalls past the threshold.
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+LOOP_MONITOR_INTERVAL_MS = float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "50"))
+LOOP_LAG_THRESHOLD_MS = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "200"))
+# Bounded thread pools for blocking calls made from async routes.
+OFFLOAD_EXCEL_WORKERS = int(os.getenv("OFFLOAD_EXCEL_WORKERS", "2"))
+OFFLOAD_DB_WORKERS = int(os.getenv("OFFLOAD_DB_WORKERS", "4"))
+OFFLOAD_MAX_QUEUE = int(os.getenv("OFFLOAD_MAX_QUEUE", "32"))
\ No newline at end of file
@@ -1,15 +1,93 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core.config import (
+    DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, SCHEDULER_DB_POOL_SIZE, SCHEDULER_DB_MAX_OVERFLOW,
+    SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS, SQLITE_CACHE_SIZE, SQLITE_MMAP_SIZE, SQLITE_TEMP_STORE,
+    SQLITE_BUSY_TIMEOUT_MS
+)
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./app.db"
+SQLALCHEMY_DATABASE_URL = DATABASE_URL
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
+def sqlite_pragmas() -> dict:
+    """PRAGMAs set on every SQLite connection of the engine profile."""
+    return {
+        "journal_mode": SQLITE_JOURNAL_MODE,
+        "synchronous": SQLITE_SYNCHRONOUS,
+        "cache_size": SQLITE_CACHE_SIZE,
+        "mmap_size": SQLITE_MMAP_SIZE,
+        "temp_store": SQLITE_TEMP_STORE,
+        "busy_timeout": SQLITE_BUSY_TIMEOUT_MS
+    }
+
+def create_db_engine(url: str = SQLALCHEMY_DATABASE_URL, pool_size: int = DB_POOL_SIZE,
+                     max_overflow: int = DB_MAX_OVERFLOW, pragmas: dict = None):
+    """Engine for ``url`` with the configured pool; SQLite connections also get ``pragmas``."""
+    url = make_url(url)
+    if url.get_backend_name() != 'sqlite':
+        return create_engine(url, pool_size=pool_size, max_overflow=max_overflow,
+                             pool_timeout=DB_POOL_TIMEOUT, pool_pre_ping=True)
+    
+    pragmas = sqlite_pragmas() if pragmas is None else pragmas
+    connect_args = {"check_same_thread": False}
+    if "busy_timeout" in pragmas:
+        connect_args["timeout"] = pragmas["busy_timeout"] / 1000
+    
+    if url.database in (None, "", ":memory:"):
+        engine = create_engine(url, connect_args=connect_args)
+    else:
+        engine = create_engine(url, connect_args=connect_args, pool_size=pool_size,
+                               max_overflow=max_overflow, pool_timeout=DB_POOL_TIMEOUT)
+    _install_sqlite_pragmas(engine, pragmas)
+    return engine
+
+def create_async_db_engine(url: str = SQLALCHEMY_DATABASE_URL, pool_size: int = DB_POOL_SIZE,
+                           max_overflow: int = DB_MAX_OVERFLOW, pragmas: dict = None):
+    """AsyncEngine with the same profile; SQLite URLs are switched to the aiosqlite driver."""
+    url = make_url(url)
+    if url.get_backend_name() != 'sqlite':
+        return create_async_engine(url, pool_size=pool_size, max_overflow=max_overflow,
+                                   pool_timeout=DB_POOL_TIMEOUT, pool_pre_ping=True)
+    
+    pragmas = sqlite_pragmas() if pragmas is None else pragmas
+    url = url.set(drivername="sqlite+aiosqlite")
+    connect_args = {"check_same_thread": False}
+    if "busy_timeout" in pragmas:
+        connect_args["timeout"] = pragmas["busy_timeout"] / 1000
+    
+    if url.database in (None, "", ":memory:"):
+        engine = create_async_engine(url, connect_args=connect_args)
+    else:
+        # aiosqlite defaults to NullPool; keep connections (and their PRAGMAs) pooled like the sync engine.
+        engine = create_async_engine(url, connect_args=connect_args, poolclass=AsyncAdaptedQueuePool,
+                                     pool_size=pool_size, max_overflow=max_overflow,
+                                     pool_timeout=DB_POOL_TIMEOUT)
+    _install_sqlite_pragmas(engine.sync_engine, pragmas)
+    return engine
+
+def _install_sqlite_pragmas(engine, pragmas: dict):
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+engine = create_db_engine()
+# GoalScheduler's jobs run on their own, smaller pool.
+scheduler_engine = create_db_engine(pool_size=SCHEDULER_DB_POOL_SIZE, max_overflow=SCHEDULER_DB_MAX_OVERFLOW)
+
+# Used by the async endpoints; the sync engine above stays for sync routes, jobs and scripts.
+async_engine = create_async_db_engine()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SchedulerSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=scheduler_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -20,5 +98,9 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def create_tables():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
@@ -0,0 +1,119 @@
+"""Concurrent read/write throughput of the SQLite engine profile against the old default engine.
+
+Usage: python -m app.core.db_benchmark [--seconds 5] [--readers 8] [--writers 2] [--rows 20000]
+
+The "write queue" run sends the same writes through WriteQueue's group commit;
+raise --writers to model bursty completion traffic.
+
+Each run uses a fresh temporary database file, so app.db is never touched.
+"""
+from sqlalchemy import create_engine, text
+from app.core.database import create_db_engine
+from app.core.write_queue import WriteQueue
+from app.core.config import DB_POOL_SIZE, DB_MAX_OVERFLOW
+from sqlalchemy.exc import OperationalError
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+def _baseline_engine(url: str):
+    """The engine app/core/database.py used to build: default journal mode, no pragmas, default pool."""
+    return create_engine(url, connect_args={"check_same_thread": False})
+
+def _profile_engine(url: str):
+    return create_db_engine(url, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+
+def _seed(engine, rows: int):
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE progress (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, points INTEGER NOT NULL)"
+        ))
+        connection.execute(text("CREATE INDEX ix_progress_user ON progress (user_id)"))
+        connection.execute(
+            text("INSERT INTO progress (id, user_id, points) VALUES (:id, :user_id, 0)"),
+            [{"id": i, "user_id": i % 1000} for i in range(1, rows + 1)]
+        )
+
+def _increment(session, row_id: int):
+    session.execute(text("UPDATE progress SET points = points + 1 WHERE id = :id"), {"id": row_id})
+
+def run(make_engine, seconds: float, readers: int, writers: int, rows: int, group_commit: bool = False) -> dict:
+    directory = tempfile.TemporaryDirectory(prefix="db-benchmark-")
+    url = f"sqlite:///{os.path.join(directory.name, 'bench.db')}"
+    try:
+        engine = make_engine(url)
+        _seed(engine, rows)
+        write_engine = create_db_engine(url, pool_size=1, max_overflow=0) if group_commit else None
+        writes = WriteQueue(engine=write_engine) if group_commit else None
+    
+        counts = {"reads": 0, "writes": 0, "locked": 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + seconds
+    
+        def reader():
+            done = 0
+            while time.monotonic() < deadline:
+                with engine.connect() as connection:
+                    connection.execute(text("SELECT SUM(points) FROM progress WHERE user_id = :user_id"),
+                                       {"user_id": random.randrange(1000)}).scalar()
+                done += 1
+            with lock:
+                counts["reads"] += done
+    
+        def writer():
+            done = locked = 0
+            while time.monotonic() < deadline:
+                try:
+                    if writes is not None:
+                        writes.submit(_increment, random.randint(1, rows)).result()
+                    else:
+                        with engine.begin() as connection:
+                            _increment(connection, random.randint(1, rows))
+                    done += 1
+                except OperationalError:
+                    locked += 1
+            with lock:
+                counts["writes"] += done
+                counts["locked"] += locked
+    
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads += [threading.Thread(target=writer) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if writes is not None:
+            writes.shutdown()
+            write_engine.dispose()
+        engine.dispose()
+    
+        return {
+            "reads_per_second": round(counts["reads"] / seconds, 1),
+            "writes_per_second": round(counts["writes"] / seconds, 1),
+            "locked_errors": counts["locked"]
+        }
+    finally:
+        directory.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+    
+    runs = (("baseline", _baseline_engine, False), ("profile", _profile_engine, False),
+            ("write queue", _profile_engine, True))
+    for name, make_engine, group_commit in runs:
+        result = run(make_engine, args.seconds, args.readers, args.writers, args.rows, group_commit)
+        print(f"{name:>11}: {result['reads_per_second']:>10} reads/s  {result['writes_per_second']:>8} writes/s  "
+              f"{result['locked_errors']} 'database is locked' errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+from app.core.config import LOOP_MONITOR_INTERVAL_MS, LOOP_LAG_THRESHOLD_MS
+from typing import Dict, Optional
+import asyncio
+import sys
+import threading
+import time
+import traceback
+import logging
+
+logger = logging.getLogger(__name__)
+
+class LoopLagMonitor:
+    """Detects blocking work on the event loop.
+
+    A sampler task sleeps for ``interval_ms`` and records how late it wakes
+    up (the loop's scheduling delay). A watchdog thread checks the sampler's
+    heartbeat; once the loop has not run for ``threshold_ms`` it logs the
+    loop thread's stack and the request whose task is running, while the
+    blocking call is still on the stack. LoopLagMiddleware tells the monitor
+    which request each task is serving.
+    """
+
+    def __init__(self, interval_ms: float = LOOP_MONITOR_INTERVAL_MS, threshold_ms: float = LOOP_LAG_THRESHOLD_MS):
+        self.interval = max(interval_ms, 1) / 1000
+        self.threshold = max(threshold_ms, 1) / 1000
+        self._loop = None
+        self._loop_thread_id = None
+        self._sampler = None
+        self._watchdog = None
+        self._stop = threading.Event()
+        self._heartbeat = time.monotonic()
+        self._reported_heartbeat = None
+        self._routes = {}
+        self._lock = threading.Lock()
+        self._stats = {"samples": 0, "last_lag_ms": 0.0, "max_lag_ms": 0.0, "stalls": 0}
+        self._stalls_by_route = {}
+
+    async def start(self):
+        if self._sampler is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._sampler = asyncio.create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Loop lag monitor started (interval {self.interval * 1000:.0f} ms, "
+                    f"threshold {self.threshold * 1000:.0f} ms)")
+
+    async def stop(self):
+        if self._sampler is None:
+            return
+        self._stop.set()
+        self._sampler.cancel()
+        try:
+            await self._sampler
+        except asyncio.CancelledError:
+            pass
+        self._watchdog.join(timeout=1)
+        self._sampler = None
+        self._watchdog = None
+
+    def track(self, task: asyncio.Task, route: str):
+        self._routes[task] = route
+
+    def untrack(self, task: asyncio.Task):
+        self._routes.pop(task, None)
+
+    async def _sample(self):
+        while True:
+            started = self._loop.time()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(self._loop.time() - started - self.interval, 0) * 1000
+            self._heartbeat = time.monotonic()
+            with self._lock:
+                self._stats["samples"] += 1
+                self._stats["last_lag_ms"] = round(lag_ms, 1)
+                self._stats["max_lag_ms"] = max(self._stats["max_lag_ms"], round(lag_ms, 1))
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            heartbeat = self._heartbeat
+            stalled = time.monotonic() - heartbeat - self.interval
+            # One report per stall: the heartbeat only moves once the loop runs again.
+            if stalled >= self.threshold and heartbeat != self._reported_heartbeat:
+                self._reported_heartbeat = heartbeat
+                self._report(stalled)
+
+    def _report(self, stalled: float):
+        route = "no request (startup, background task or callback)"
+        try:
+            task = asyncio.current_task(self._loop)
+            if task is not None:
+                route = self._routes.get(task, f"task {task.get_name()}")
+        except RuntimeError:
+            pass
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else "(no stack)\n"
+        with self._lock:
+            self._stats["stalls"] += 1
+            self._stalls_by_route[route] = self._stalls_by_route.get(route, 0) + 1
+        logger.warning(f"Event loop blocked for {stalled * 1000:.0f} ms+ in {route}; loop thread stack:\n{stack}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "running": self._sampler is not None,
+                "interval_ms": self.interval * 1000,
+                "threshold_ms": self.threshold * 1000,
+                **self._stats,
+                "stalls_by_route": dict(self._stalls_by_route)
+            }
+
+
+class LoopLagMiddleware:
+    """ASGI middleware mapping each request's task to its route for LoopLagMonitor reports."""
+
+    def __init__(self, app, monitor: Optional[LoopLagMonitor] = None):
+        self.app = app
+        self.monitor = monitor or loop_monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        task = asyncio.current_task()
+        self.monitor.track(task, f"{scope['method']} {scope['path']}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.untrack(task)
+
+
+loop_monitor = LoopLagMonitor()
@@ -0,0 +1,133 @@
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import OFFLOAD_EXCEL_WORKERS, OFFLOAD_DB_WORKERS, OFFLOAD_MAX_QUEUE
+from typing import Any, Callable, Dict
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+
+class OffloadPoolFull(Exception):
+    """The pool's workers are busy and its queue is full."""
+
+
+class OffloadPool:
+    """Bounded thread pool for blocking calls made from async routes.
+
+    At most ``max_workers`` calls run at once and at most ``max_queue`` wait;
+    beyond that ``run`` raises OffloadPoolFull instead of queueing without
+    bound. ``stats`` reports saturation: calls that had to wait for a worker,
+    rejected calls, and the time spent waiting versus running.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int = OFFLOAD_MAX_QUEUE):
+        self.name = name
+        self.max_workers = max(max_workers, 1)
+        self.max_queue = max(max_queue, 0)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queued = 0
+        self._stats = {
+            "submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "saturated": 0,
+            "max_queued": 0, "wait_ms_total": 0.0, "run_ms_total": 0.0
+        }
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            if self._active + self._queued >= self.max_workers + self.max_queue:
+                self._stats["rejected"] += 1
+                raise OffloadPoolFull(f"Offload pool '{self.name}' is full "
+                                      f"({self.max_workers} running, {self._queued} queued)")
+            if self._active + self._queued >= self.max_workers:
+                self._stats["saturated"] += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix=f"offload-{self.name}")
+            executor = self._executor
+            self._queued += 1
+            self._stats["submitted"] += 1
+            self._stats["max_queued"] = max(self._stats["max_queued"], self._queued)
+
+        submitted_at = time.perf_counter()
+        context = contextvars.copy_context()
+
+        def call():
+            started_at = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._stats["wait_ms_total"] += (started_at - submitted_at) * 1000
+            failed = True
+            try:
+                result = context.run(fn, *args, **kwargs)
+                failed = False
+                return result
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._stats["completed"] += 1
+                    self._stats["failed"] += failed
+                    self._stats["run_ms_total"] += (time.perf_counter() - started_at) * 1000
+
+        future = executor.submit(call)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # A call cancelled before it started never reaches call(), so release its queue slot here.
+            if future.cancel():
+                with self._lock:
+                    self._queued -= 1
+            raise
+
+    def stats(self) -> Dict:
+        with self._lock:
+            completed = self._stats["completed"]
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queued": self._queued,
+                "utilization": round(self._active / self.max_workers, 2),
+                **{key: round(value, 1) if isinstance(value, float) else value for key, value in self._stats.items()},
+                "avg_wait_ms": round(self._stats["wait_ms_total"] / completed, 2) if completed else 0.0,
+                "avg_run_ms": round(self._stats["run_ms_total"] / completed, 2) if completed else 0.0
+            }
+
+    def shutdown(self):
+        """Stop the worker threads once queued calls finish; the next ``run`` starts a new executor."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+# "excel": openpyxl parsing of uploaded workbooks; "db": sync ORM work called from async routes.
+offload_pools = {
+    "excel": OffloadPool("excel", OFFLOAD_EXCEL_WORKERS),
+    "db": OffloadPool("db", OFFLOAD_DB_WORKERS)
+}
+
+async def run_blocking(pool: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking ``fn`` on the named offload pool and await its result."""
+    return await offload_pools[pool].run(fn, *args, **kwargs)
+
+def offloaded(pool: str):
+    """Decorator turning a blocking function into a coroutine function run on the named offload pool.
+
+    The undecorated function stays available as ``.sync`` for sync callers.
+    """
+    def decorator(fn: Callable[..., Any]):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await run_blocking(pool, fn, *args, **kwargs)
+        wrapper.sync = fn
+        return wrapper
+    return decorator
+
+def offload_stats() -> Dict[str, Dict]:
+    return {name: pool.stats() for name, pool in offload_pools.items()}
+
+def shutdown_offload_pools():
+    for pool in offload_pools.values():
+        pool.shutdown()
@@ -0,0 +1,124 @@
+"""Check with EXPLAIN QUERY PLAN that every hot query is served by an index.
+
+Usage: python -m app.core.query_plans [--database-url sqlite:///./app.db] [--with-stats]
+
+Checks the schema of the configured database (migrate it first with ``alembic
+upgrade head``), or, with ``--database-url sqlite://``, the schema built from
+the models. Plans are taken on an empty in-memory copy of that schema, so they
+depend on the indexes alone and not on how much data a dev database happens to
+hold; ``--with-stats`` explains against the database itself, using whatever
+ANALYZE statistics it has. Exits non-zero when a query scans a table or misses
+its expected index.
+"""
+from sqlalchemy import select, and_, func
+from app.core.config import DATABASE_URL
+from app.core.database import Base, create_db_engine
+from app.models.achievements import Achievement, user_achievements
+from app.models.users import User
+from app.services.goal_crud import GoalCRUD, GOAL_TARGETS
+from app.services.progress_read_model import RECENT_LIMIT
+from datetime import datetime
+import argparse
+import re
+import sys
+
+def hot_queries(now: datetime):
+    """(name, statement, index the plan must use) for each hot access path."""
+    return [
+        ("login by email", select(User).where(User.email == "user@example.com"),
+         "ix_users_email_customer_id"),
+        ("login by email within customer",
+         select(User).where(and_(User.email == "user@example.com", User.customer_id == 1)),
+         "ix_users_email_customer_id"),
+        ("admin user listing", select(User).where(User.customer_id == 1).offset(0).limit(100),
+         "ix_users_customer_id_username"),
+        ("username within customer",
+         select(User).where(and_(User.username == "user", User.customer_id == 1)),
+         "ix_users_customer_id_username"),
+        ("goal catalog by frequency",
+         select(Achievement.id, Achievement.frequency, Achievement.selection_weight)
+         .where(Achievement.frequency.in_(list(GOAL_TARGETS))).order_by(Achievement.id),
+         "ix_achievements_frequency_id_weight"),
+        ("expiry sweep",
+         select(user_achievements.c.user_id, user_achievements.c.achievement_id).where(and_(
+             user_achievements.c.status == "pending", user_achievements.c.due_date <= now
+         )).order_by(user_achievements.c.due_date).limit(500),
+         "ix_user_achievements_status_due_date"),
+        ("current goals", GoalCRUD._current_goals_query([1, 2], now),
+         "ix_user_achievements_user_status_due_date"),
+        ("progress",
+         select(*GoalCRUD._progress_columns(now, None)).select_from(user_achievements.join(Achievement))
+         .where(user_achievements.c.user_id.in_([1, 2])).group_by(user_achievements.c.user_id),
+         "ix_user_achievements_user_status_due_date"),
+        ("recent completions", GoalCRUD._recent_completions_query([1, 2], RECENT_LIMIT),
+         "ix_user_achievements_user_status_due_date"),
+        ("achievement categories",
+         select(Achievement.frequency, func.count(Achievement.id)).group_by(Achievement.frequency),
+         "ix_achievements_frequency_id_weight"),
+    ]
+
+def explain(connection, statement) -> list:
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+    return [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+def check(connection, now: datetime = None) -> list:
+    """Return (name, ok, plan lines) per hot query."""
+    results = []
+    for name, statement, index in hot_queries(now or datetime.utcnow()):
+        plan = explain(connection, statement)
+        uses_index = any(re.search(rf"\bINDEX {index}\b", line) for line in plan)
+        # Scanning a subquery (the ROW_NUMBER() ranking, say) is fine; scanning a table is not.
+        scanned = [(re.match(r"SCAN (\w+)", line), line) for line in plan]
+        full_scans = [line for match, line in scanned
+                      if match and match.group(1) in Base.metadata.tables and " INDEX " not in line]
+        results.append((name, uses_index and not full_scans, plan))
+    return results
+
+def schema_copy(url: str):
+    """Empty in-memory database with the tables and indexes of the database at ``url``."""
+    source = create_db_engine(url)
+    with source.connect() as connection:
+        ddl = [row[0] for row in connection.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' "
+            "ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 ELSE 2 END"
+        )]
+    source.dispose()
+    
+    engine = create_db_engine("sqlite://")
+    with engine.begin() as connection:
+        for statement in ddl:
+            connection.exec_driver_sql(statement)
+    return engine
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    parser.add_argument("--with-stats", action="store_true", help="explain against the database itself")
+    args = parser.parse_args()
+
+    if not args.database_url.startswith("sqlite"):
+        sys.exit("EXPLAIN QUERY PLAN is SQLite-specific; point --database-url at a SQLite database.")
+    if args.database_url.rstrip("/") == "sqlite:":
+        engine = create_db_engine(args.database_url)
+        Base.metadata.create_all(bind=engine)
+    elif args.with_stats:
+        engine = create_db_engine(args.database_url)
+    else:
+        engine = schema_copy(args.database_url)
+
+    with engine.connect() as connection:
+        results = check(connection)
+    engine.dispose()
+
+    for name, ok, plan in results:
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+        for line in plan:
+            print(f"       {line}")
+    failed = [name for name, ok, _ in results if not ok]
+    if failed:
+        sys.exit(f"{len(failed)} hot queries are not served by their index: {', '.join(failed)}")
+    print(f"All {len(results)} hot queries use their indexes.")
+
+
+if __name__ == "__main__":
+    main()
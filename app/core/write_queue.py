@@ -0,0 +1,231 @@
+from concurrent.futures import Future
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.config import (
+    WRITE_QUEUE_ENABLED, WRITE_QUEUE_MAX_BATCH, WRITE_QUEUE_MAX_DELAY_MS, WRITE_QUEUE_RESULT_TIMEOUT
+)
+from app.core.database import create_db_engine
+from typing import Any, Callable, Optional
+import asyncio
+import queue
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class _IsolateOperations(Exception):
+    """An operation failed in a shared group; retry the group with per-operation savepoints."""
+
+
+class WriteCancelled(TimeoutError):
+    """The caller's wait timed out before the writer started the operation; it was cancelled and never runs."""
+
+
+class WriteOutcomeUnknown(TimeoutError):
+    """The caller's wait timed out while the operation's group was running; it may still commit.
+
+    ``future`` resolves with the operation's result if it does, so the caller can
+    finish any follow-up work from a done-callback.
+    """
+    
+    def __init__(self, message: str, future: Future):
+        super().__init__(message)
+        self.future = future
+
+
+class WriteQueue:
+    """Single-writer pipeline with group commit.
+
+    One thread owns the only write connection and drains a queue of small
+    operations, each a callable ``operation(session, *args)``. Up to
+    ``max_batch`` operations, or whatever arrives within ``max_delay_ms`` of
+    the first, share one transaction and one commit (and one fsync).
+    Operations must be safe to re-run: when one raises, the group is rolled
+    back and replayed with a SAVEPOINT around each operation, so only the
+    failing one is undone and only its caller gets the exception. Results are
+    handed back only after the group has committed.
+    """
+    
+    def __init__(self, max_batch: int = WRITE_QUEUE_MAX_BATCH, max_delay_ms: float = WRITE_QUEUE_MAX_DELAY_MS,
+                 engine=None):
+        self.max_batch = max(max_batch, 1)
+        self.max_delay = max(max_delay_ms, 0) / 1000
+        self._engine = engine
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {"operations": 0, "failed": 0, "groups": 0, "largest_group": 0, "commit_errors": 0}
+    
+    @staticmethod
+    def _prepare_engine(engine):
+        if engine.dialect.name == 'sqlite':
+            # Let SQLAlchemy, not pysqlite, issue BEGIN so SAVEPOINTs work, and take
+            # the write lock up front instead of upgrading from a read lock mid-group.
+            @event.listens_for(engine, "connect")
+            def _autocommit_driver(dbapi_connection, connection_record):
+                dbapi_connection.isolation_level = None
+            
+            @event.listens_for(engine, "begin")
+            def _begin_immediate(connection):
+                connection.exec_driver_sql("BEGIN IMMEDIATE")
+        return engine
+    
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._engine = WriteQueue._prepare_engine(self._engine or create_db_engine(pool_size=1, max_overflow=0))
+            self._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self._engine)
+            self._thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+            self._thread.start()
+    
+    def submit(self, operation: Callable[..., Any], *args) -> Future:
+        """Queue ``operation(session, *args)``; the future resolves once its group is committed."""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((operation, args, future))
+        return future
+    
+    def _next_group(self) -> Optional[list]:
+        first = self._queue.get()
+        if first is None:
+            return None
+        group = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(group) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            group.append(item)
+        return group
+    
+    def _run(self):
+        while True:
+            group = self._next_group()
+            if group is None:
+                return
+            self._commit_group(group)
+    
+    def _commit_group(self, group: list):
+        items = [item for item in group if item[2].set_running_or_notify_cancel()]
+        try:
+            outcomes = self._execute(items, isolate=False)
+        except _IsolateOperations:
+            # Something failed: redo the group with a SAVEPOINT per operation so only it is rolled back.
+            outcomes = self._execute(items, isolate=True)
+        
+        failed = 0
+        for future, ok, value in outcomes:
+            if ok:
+                future.set_result(value)
+            else:
+                failed += 1
+                future.set_exception(value)
+        with self._stats_lock:
+            self.stats["operations"] += len(outcomes)
+            self.stats["failed"] += failed
+            self.stats["groups"] += 1
+            self.stats["largest_group"] = max(self.stats["largest_group"], len(group))
+    
+    def _execute(self, items: list, isolate: bool) -> list:
+        """Run ``items`` in one transaction and commit; without ``isolate`` the first failure aborts the attempt."""
+        session: Session = self._session_factory()
+        outcomes = []
+        try:
+            for operation, args, future in items:
+                try:
+                    if isolate:
+                        with session.begin_nested():
+                            result = operation(session, *args)
+                    else:
+                        result = operation(session, *args)
+                    outcomes.append((future, True, result))
+                except Exception as e:
+                    if not isolate and len(items) > 1:
+                        raise _IsolateOperations() from e
+                    outcomes.append((future, False, e))
+            session.commit()
+        except _IsolateOperations:
+            session.rollback()
+            raise
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Write queue group of {len(items)} failed to commit: {str(e)}")
+            with self._stats_lock:
+                self.stats["commit_errors"] += 1
+            outcomes = [(future, False, e) for _, _, future in items]
+        finally:
+            session.close()
+        return outcomes
+    
+    def shutdown(self, wait: bool = True):
+        """Finish the queued operations and stop the writer thread."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        if wait:
+            self._thread.join()
+        self._thread = None
+
+
+write_queue = WriteQueue()
+
+def _timed_out(future: Future) -> TimeoutError:
+    """The error for a caller that gave up on ``future``: cancel it if the writer hasn't started it yet."""
+    if future.cancel():
+        return WriteCancelled(f"Write not started within {WRITE_QUEUE_RESULT_TIMEOUT:g}s; it was cancelled")
+    return WriteOutcomeUnknown(f"Write still running after {WRITE_QUEUE_RESULT_TIMEOUT:g}s; it may still commit",
+                               future)
+
+def run_write(db: Session, operation: Callable[..., Any], *args) -> Any:
+    """Run ``operation(session, *args)`` and commit it.
+
+    With WRITE_QUEUE_ENABLED the operation goes through the group-committing
+    writer thread and ``db`` is not written to; otherwise it runs on ``db``.
+    If the queue doesn't answer within WRITE_QUEUE_RESULT_TIMEOUT, a write that
+    hasn't started is cancelled (WriteCancelled) and one that has raises
+    WriteOutcomeUnknown, since it can still commit after the caller gave up.
+    """
+    if WRITE_QUEUE_ENABLED:
+        future = write_queue.submit(operation, *args)
+        try:
+            return future.result(timeout=WRITE_QUEUE_RESULT_TIMEOUT)
+        except TimeoutError:
+            if future.done() and not future.cancelled():
+                return future.result()
+            raise _timed_out(future) from None
+    try:
+        result = operation(db, *args)
+        db.commit()
+        return result
+    except Exception:
+        db.rollback()
+        raise
+
+async def run_write_async(db: AsyncSession, operation: Callable[..., Any], *args) -> Any:
+    """Async counterpart of run_write: awaits the write queue, or runs ``operation`` on ``db``'s sync session."""
+    if WRITE_QUEUE_ENABLED:
+        future = write_queue.submit(operation, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=WRITE_QUEUE_RESULT_TIMEOUT)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                return future.result()
+            raise _timed_out(future) from None
+    try:
+        result = await db.run_sync(operation, *args)
+        await db.commit()
+        return result
+    except Exception:
+        await db.rollback()
+        raise
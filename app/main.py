@@ -2,11 +2,16 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
-from app.core.database import create_tables
+from app.core.database import create_tables, async_engine
+from app.core.write_queue import write_queue
+from app.core.loop_monitor import loop_monitor, LoopLagMiddleware
+from app.core.offload import shutdown_offload_pools
+from app.core.config import LOOP_MONITOR_ENABLED
 from app.api.routes import router as api_router
 from app.api.page_routes import router as page_router
 from app.api.achievements import router as achievement_router 
 from app.services.scheduler import goal_scheduler
+from app.services.goal_crud import EXPIRY_SWEEP_PROGRESS
 from app.models import User, Achievement
 import os
 import logging
@@ -18,6 +23,8 @@ async def lifespan(app: FastAPI):
     """Manage application startup and shutdown"""
     logger.info("Starting application...")
     create_tables()
+    if LOOP_MONITOR_ENABLED:
+        await loop_monitor.start()
     
     try:
         goal_scheduler.start()
@@ -33,6 +40,11 @@ async def lifespan(app: FastAPI):
         logger.info("Goal scheduler stopped")
     except Exception as e:
         logger.error(f"Error stopping goal scheduler: {e}")
+    
+    await loop_monitor.stop()
+    shutdown_offload_pools()
+    write_queue.shutdown()
+    await async_engine.dispose()
 
 app = FastAPI(
     title="Mental Health FastAPI App",
@@ -48,6 +60,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if LOOP_MONITOR_ENABLED:
+    app.add_middleware(LoopLagMiddleware)
 
 STATIC_DIR = "app/static"
 if os.path.exists(STATIC_DIR):
@@ -111,7 +125,8 @@ def scheduler_status():
     
     return {
         "status": "running" if goal_scheduler.scheduler.running else "stopped",
-        "jobs": jobs
+        "jobs": jobs,
+        "expiry_sweep": EXPIRY_SWEEP_PROGRESS
     }
 
 if __name__ == "__main__":
@@ -1,4 +1,9 @@
 from .users import User
 from .achievements import Achievement, user_achievements
+from .goal_jobs import GoalAssignmentCheckpoint, GoalAssignmentClaim, GoalSelectionHistory
+from .progress import UserProgressSnapshot
+from .leaderboard import LeaderboardEntry
+from .streaks import UserStreak
+from .history import UserDailyActivity
 
-__all__ = ["User", "Achievement", "user_achievements"]
\ No newline at end of file
+__all__ = ["User", "Achievement", "user_achievements", "GoalAssignmentCheckpoint", "GoalAssignmentClaim", "GoalSelectionHistory", "UserProgressSnapshot", "LeaderboardEntry", "UserStreak", "UserDailyActivity"]
\ No newline at end of file
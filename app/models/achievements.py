@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Table, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Float, Table, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -10,11 +10,18 @@ user_achievements = Table(
     Column("achievement_id", Integer, ForeignKey("achievements.id"), primary_key=True),
     Column("created_at", DateTime(timezone=True), server_default=func.now()),
     Column("status", String(50), nullable=False, default="pending"),
-    Column("due_date", DateTime(timezone=True), nullable=True)
+    Column("due_date", DateTime(timezone=True), nullable=True),
+    Index("ix_user_achievements_status_due_date", "status", "due_date"),
+    # Goals/progress reads filter on (user_id, status, due_date); the trailing columns make it covering.
+    Index("ix_user_achievements_user_status_due_date", "user_id", "status", "due_date", "achievement_id", "created_at")
 )
 
 class Achievement(Base):
     __tablename__ = "achievements"
+    __table_args__ = (
+        # Covers the catalog lookups by frequency made on every assignment and listing.
+        Index("ix_achievements_frequency_id_weight", "frequency", "id", "selection_weight"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
@@ -23,6 +30,7 @@ class Achievement(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     duration = Column(Integer, nullable=False)
     frequency = Column(String(50), nullable=False)
+    selection_weight = Column(Float, nullable=False, default=1.0, server_default='1')  # relative odds of being assigned
     
     users = relationship(
         "User",
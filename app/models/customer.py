@@ -13,6 +13,7 @@ class Customer(Base):
     company_address = Column(Text, nullable=True)
     subscription_plan = Column(String(50), default='basic') 
     max_users = Column(Integer, default=50) 
+    timezone = Column(String(64), default='UTC', nullable=False)  # IANA name; goal periods follow local midnight
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
     
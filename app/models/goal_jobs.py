@@ -0,0 +1,45 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, LargeBinary, UniqueConstraint
+from app.core.database import Base
+from datetime import datetime
+
+class GoalAssignmentCheckpoint(Base):
+    __tablename__ = 'goal_assignment_checkpoints'
+    __table_args__ = (
+        UniqueConstraint('job_id', 'frequency', 'period_key', name='uq_goal_checkpoint_job_period'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(String(100), nullable=False)
+    frequency = Column(String(50), nullable=False)
+    period_key = Column(String(20), nullable=False)
+    scope = Column(Text, nullable=True)
+    last_user_id = Column(Integer, nullable=False, default=0)
+    status = Column(String(20), nullable=False, default='running')
+    assigned_to_users = Column(Integer, nullable=False, default=0)
+    total_goals_assigned = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<GoalAssignmentCheckpoint(job_id='{self.job_id}', frequency='{self.frequency}', period_key='{self.period_key}', last_user_id={self.last_user_id})>"
+
+
+class GoalAssignmentClaim(Base):
+    """Marks that a user's goals for one frequency and period have been assigned lazily."""
+    __tablename__ = 'goal_assignment_claims'
+    
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    frequency = Column(String(50), primary_key=True)
+    period_key = Column(String(20), primary_key=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class GoalSelectionHistory(Base):
+    """Bitset (bit = achievement id) of the goals a user was assigned in one period."""
+    __tablename__ = 'goal_selection_history'
+    
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    frequency = Column(String(50), primary_key=True)
+    period_key = Column(String(20), primary_key=True)
+    assigned_bits = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
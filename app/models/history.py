@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey
+from app.core.database import Base
+from datetime import datetime
+
+class UserDailyActivity(Base):
+    """Per-user, per-day rollup of completed goals; ``day`` is the user's local calendar date."""
+    __tablename__ = 'user_daily_activity'
+    
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    day = Column(Date, primary_key=True)
+    completed_count = Column(Integer, nullable=False, default=0)
+    points_earned = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<UserDailyActivity(user_id={self.user_id}, day={self.day}, completed_count={self.completed_count}, points_earned={self.points_earned})>"
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+from app.core.database import Base
+from datetime import datetime
+
+class LeaderboardEntry(Base):
+    """Points index behind the per-customer leaderboards: one row per user with their all-time points."""
+    __tablename__ = 'leaderboard_entries'
+    __table_args__ = (
+        Index('ix_leaderboard_entries_customer_points', 'customer_id', 'points'),
+    )
+    
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    customer_id = Column(Integer, ForeignKey('customers.id'), nullable=True)
+    points = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<LeaderboardEntry(user_id={self.user_id}, customer_id={self.customer_id}, points={self.points})>"
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, DateTime, Text, ForeignKey
+from app.core.database import Base
+from datetime import datetime
+
+class UserProgressSnapshot(Base):
+    """Denormalized per-user progress read model, maintained on every goal write.
+
+    Counts cover the current period of each frequency in the user's timezone;
+    the row is only trusted until ``valid_until`` (the next local midnight).
+    """
+    __tablename__ = 'user_progress_snapshots'
+    
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    daily_pending = Column(Integer, nullable=False, default=0)
+    daily_completed = Column(Integer, nullable=False, default=0)
+    weekly_pending = Column(Integer, nullable=False, default=0)
+    weekly_completed = Column(Integer, nullable=False, default=0)
+    monthly_pending = Column(Integer, nullable=False, default=0)
+    monthly_completed = Column(Integer, nullable=False, default=0)
+    total_points = Column(Integer, nullable=False, default=0)
+    last_completed_at = Column(DateTime, nullable=True)
+    current_goals = Column(Text, nullable=False, default='{}')  # JSON, same shape as GoalCRUD.get_user_current_goals
+    recent_completions = Column(Text, nullable=False, default='[]')  # JSON, newest first
+    valid_until = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<UserProgressSnapshot(user_id={self.user_id}, total_points={self.total_points}, valid_until={self.valid_until})>"
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from app.core.database import Base
+from datetime import datetime
+
+class UserStreak(Base):
+    """Weekly completion streak of a user: consecutive ISO weeks (in the user's timezone) with a completed goal."""
+    __tablename__ = 'user_streaks'
+    
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    current_streak = Column(Integer, nullable=False, default=0)
+    best_streak = Column(Integer, nullable=False, default=0)
+    last_period_key = Column(String(20), nullable=True)  # e.g. "2026-W42"
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<UserStreak(user_id={self.user_id}, current_streak={self.current_streak}, best_streak={self.best_streak}, last_period_key='{self.last_period_key}')>"
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Union
 from datetime import datetime
 
 class AchievementBase(BaseModel):
@@ -8,6 +8,7 @@ class AchievementBase(BaseModel):
     point_value: int 
     duration: int
     frequency: str
+    selection_weight: float = 1.0
 
 class AchievementCreate(AchievementBase):
     pass
@@ -34,7 +35,8 @@ class UserStats(BaseModel):
     total_points: int
     completed_today: int
     weekly_streak: int
-    rank: str
+    best_weekly_streak: int = 0
+    rank: Union[int, str]
 
 class AchievementListResponse(BaseModel):
     achievements: List[Achievement]
@@ -1,6 +1,14 @@
 from pydantic import BaseModel, EmailStr, validator
 from typing import Optional
 from datetime import datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+def _validate_timezone(v):
+    try:
+        ZoneInfo(v)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f'Unknown timezone: {v}')
+    return v
 
 class CustomerCreate(BaseModel):
     company_name: str
@@ -15,6 +23,7 @@ class CustomerCreate(BaseModel):
     admin_phone: Optional[str] = None
     
     subscription_plan: str = "basic"
+    timezone: str = "UTC"
     
     @validator('company_name')
     def validate_company_name(cls, v):
@@ -34,6 +43,10 @@ class CustomerCreate(BaseModel):
         if v not in allowed_plans:
             raise ValueError(f'Subscription plan must be one of: {allowed_plans}')
         return v
+    
+    @validator('timezone')
+    def validate_timezone(cls, v):
+        return _validate_timezone(v)
 
 class CustomerResponse(BaseModel):
     id: int
@@ -43,6 +56,7 @@ class CustomerResponse(BaseModel):
     company_address: Optional[str]
     subscription_plan: str
     max_users: int
+    timezone: str
     is_active: bool
     is_verified: bool
     admin_first_name: str
@@ -66,6 +80,7 @@ class CustomerUpdate(BaseModel):
     max_users: Optional[int] = None
     is_active: Optional[bool] = None
     billing_email: Optional[EmailStr] = None
+    timezone: Optional[str] = None
     
     @validator('subscription_plan')
     def validate_subscription_plan(cls, v):
@@ -74,6 +89,12 @@ class CustomerUpdate(BaseModel):
             if v not in allowed_plans:
                 raise ValueError(f'Subscription plan must be one of: {allowed_plans}')
         return v
+    
+    @validator('timezone')
+    def validate_timezone(cls, v):
+        if v is not None:
+            return _validate_timezone(v)
+        return v
 
 class CustomerRegistrationResponse(BaseModel):
     customer: CustomerResponse
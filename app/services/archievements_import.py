@@ -11,6 +11,7 @@ class AchievementImport(BaseModel):
     frequency: str = Field(..., max_length=50)
     duration: int = Field(..., gt=0)
     point_value: int = Field(..., ge=0)
+    selection_weight: float = Field(1.0, ge=0)
 
 def parse_excel_from_memory(file: IO) -> List[AchievementImport]:
     """Parse an Excel file from an in-memory file-like object."""
@@ -31,7 +32,8 @@ def parse_excel_from_memory(file: IO) -> List[AchievementImport]:
                     description=row[1],
                     frequency=row[2],
                     duration=row[3],
-                    point_value=row[4]
+                    point_value=row[4],
+                    selection_weight=row[5] if len(row) > 5 and row[5] is not None else 1.0
                 )
                 data.append(record)
             except ValidationError as e:
@@ -62,7 +64,8 @@ def bulk_insert_achievements(data: List[AchievementImport], db: Session):
             description=item.description,
             frequency=item.frequency,
             duration=item.duration,
-            point_value=item.point_value 
+            point_value=item.point_value,
+            selection_weight=item.selection_weight
         )
         
         db.add(new_entry)
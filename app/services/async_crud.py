@@ -0,0 +1,90 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from typing import List, Dict, Optional
+from datetime import datetime
+from app.core.config import GOAL_ASSIGNMENT_MODE
+from app.core.write_queue import run_write_async, WriteOutcomeUnknown
+from app.models.users import User
+from app.models.progress import UserProgressSnapshot
+from app.services.goal_crud import GoalCRUD
+from app.services.progress_read_model import ProgressReadModel, RECENT_LIMIT
+from app.services.progress_cache import progress_cache
+import copy
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncUserCRUD:
+    """AsyncSession versions of the UserCRUD methods on the request path."""
+
+    @staticmethod
+    async def get_user(db: AsyncSession, user_id: int) -> Optional[User]:
+        # The customer is loaded up front: lazy loads are not possible on an AsyncSession.
+        result = await db.execute(select(User).options(joinedload(User.customer)).where(User.id == user_id))
+        return result.scalars().first()
+
+
+class AsyncGoalCRUD:
+    """AsyncSession versions of the GoalCRUD read and completion paths.
+
+    Snapshot reads are native async queries; rebuilding a stale snapshot and
+    completing a goal reuse the GoalCRUD/ProgressReadModel code through
+    ``AsyncSession.run_sync``, so the event loop is never blocked on SQLite.
+    """
+
+    @staticmethod
+    async def get_progress_view(db: AsyncSession, user_id: int) -> Dict:
+        cached = progress_cache.get(user_id)
+        if cached is None:
+            snapshot = await db.get(UserProgressSnapshot, user_id)
+            if snapshot is None or snapshot.valid_until <= datetime.utcnow():
+                snapshot = await db.run_sync(ProgressReadModel.load, user_id)
+            cached = ProgressReadModel.cache_view(user_id, snapshot)
+        return copy.deepcopy(cached)
+
+    @staticmethod
+    async def get_user_progress(db: AsyncSession, user_id: int) -> Dict:
+        try:
+            return (await AsyncGoalCRUD.get_progress_view(db, user_id))["progress"]
+        except Exception as e:
+            logger.error(f"Error getting user progress: {str(e)}")
+            return GoalCRUD._empty_progress()
+
+    @staticmethod
+    async def get_user_current_goals(db: AsyncSession, user_id: int) -> Dict:
+        try:
+            return (await AsyncGoalCRUD.get_progress_view(db, user_id))["current_goals"]
+        except Exception as e:
+            logger.error(f"Error getting user goals: {str(e)}")
+            return {"daily": [], "weekly": [], "monthly": []}
+
+    @staticmethod
+    async def get_recent_completed_achievements(db: AsyncSession, user_id: int, limit: int = 10) -> List[Dict]:
+        try:
+            if limit <= RECENT_LIMIT:
+                return (await AsyncGoalCRUD.get_progress_view(db, user_id))["recent"][:limit]
+            recent = await db.run_sync(GoalCRUD._recent_completions_for_users, [user_id], limit)
+            return recent.get(user_id, [])
+        except Exception as e:
+            logger.error(f"Error getting recent achievements: {str(e)}")
+            return []
+
+    @staticmethod
+    async def complete_achievement(db: AsyncSession, user_id: int, achievement_id: int) -> Dict:
+        try:
+            if GOAL_ASSIGNMENT_MODE == 'stateless':
+                operation = GoalCRUD._complete_derived_goal
+            else:
+                operation = GoalCRUD._complete_pending_goal
+            result, leaderboard_change = await run_write_async(db, operation, user_id, achievement_id)
+            GoalCRUD._after_completion(user_id, leaderboard_change)
+            return result
+        except WriteOutcomeUnknown as e:
+            logger.warning(f"Completion of achievement {achievement_id} by user {user_id} timed out: {str(e)}")
+            GoalCRUD._after_late_completion(user_id, e.future)
+            raise
+        except Exception as e:
+            logger.error(f"Error completing achievement: {str(e)}")
+            raise Exception(f"Failed to complete achievement: {str(e)}")
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timedelta, timezone
 from app.models.users import User
+from app.core.write_queue import run_write
 from app.schemas.schemas import UserCreate, UserUpdate, UserLogin
 from app.api.authentication import (
     PasswordHasher, PasswordValidator, SecurityValidator, 
@@ -102,24 +103,29 @@ class UserCRUD:
     @staticmethod
     def update_failed_login_attempt(db: Session, user_id: int):
         """Update failed login attempts and potentially lock account"""
+        run_write(db, UserCRUD._record_failed_login, user_id)
+    
+    @staticmethod
+    def _record_failed_login(db: Session, user_id: int):
         db_user = db.query(User).filter(User.id == user_id).first()
         if db_user:
-            db_user.failed_login_attempts += 1
+            db_user.failed_login_attempts = (db_user.failed_login_attempts or 0) + 1
             
             if SecurityValidator.should_lock_account(db_user.failed_login_attempts):
                 db_user.locked_until = datetime.now(timezone.utc) + timedelta(minutes=30)
-            
-            db.commit()
     
     @staticmethod
     def update_successful_login(db: Session, user_id: int):
         """Update user after successful login"""
+        run_write(db, UserCRUD._record_successful_login, user_id)
+    
+    @staticmethod
+    def _record_successful_login(db: Session, user_id: int):
         db_user = db.query(User).filter(User.id == user_id).first()
         if db_user:
             db_user.last_login = datetime.now(timezone.utc)
             db_user.failed_login_attempts = 0
             db_user.locked_until = None
-            db.commit()
     
     @staticmethod
     def update_password(db: Session, user_id: int, new_password: str) -> bool:
@@ -237,17 +243,9 @@ class UserCRUD:
             raise AccountLockedError("Account is temporarily locked due to failed login attempts")
         
         if not PasswordHasher.verify_password(password, user.password_hash, user.salt):
-            user.failed_login_attempts += 1
-            if SecurityValidator.should_lock_account(user.failed_login_attempts):
-                user.locked_until = datetime.now(timezone.utc) + timedelta(minutes=30)
-            db.commit()
+            UserCRUD.update_failed_login_attempt(db, user.id)
             raise InvalidCredentialsError("Invalid email or password")
         
-        if user.failed_login_attempts > 0:
-            user.failed_login_attempts = 0
-            user.locked_until = None
-        
-        user.last_login = datetime.now(timezone.utc)
-        db.commit()
+        UserCRUD.update_successful_login(db, user.id)
         db.refresh(user)
         return user
\ No newline at end of file
@@ -50,6 +50,7 @@ class CustomerCRUD:
                 company_address=customer_data.company_address,
                 subscription_plan=customer_data.subscription_plan,
                 max_users=max_users_map.get(customer_data.subscription_plan, 50),
+                timezone=customer_data.timezone,
                 admin_first_name=customer_data.admin_first_name,
                 admin_last_name=customer_data.admin_last_name,
                 admin_email=customer_data.admin_email,
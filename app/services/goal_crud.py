@@ -1,259 +1,1160 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, case
+from sqlalchemy import and_, or_, func, case, select, true, false, literal, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.core.config import (
+    GOAL_ASSIGNMENT_BATCH_SIZE, GOAL_ASSIGNMENT_CHUNK_SIZE, GOAL_ASSIGNMENT_WORKERS, GOAL_SAMPLER_SEED,
+    GOAL_ASSIGNMENT_MODE, GOAL_NO_REPEAT_PERIODS, GOAL_EXPIRY_SWEEP_BATCH_SIZE, GOAL_EXPIRY_SWEEP_MAX_BATCHES,
+    GOAL_EXPIRY_SWEEP_PAUSE_SECONDS
+)
 from app.models.achievements import Achievement, user_achievements
+from app.models.goal_jobs import GoalAssignmentCheckpoint, GoalAssignmentClaim, GoalSelectionHistory
 from app.models.users import User
-from datetime import datetime, timedelta
+from app.models.customer import Customer
+from app.services.goal_sampler import sample_goal_matrix, exclusion_matrix, period_seed
+from app.services.goal_derivation import catalog_version, derive_goal_ids
+from app.services.goal_history import pack_goal_bits, merge_goal_bits, recent_goal_matrix
+from app.services.progress_read_model import ProgressReadModel, RECENT_LIMIT
+from app.services.progress_cache import progress_cache
+from app.services.leaderboard import Leaderboard
+from app.services.streaks import StreakTracker
+from app.services.history import ActivityHistory
+from app.core.write_queue import run_write, WriteOutcomeUnknown
+from datetime import datetime, timedelta, timezone
+from itertools import islice
 from typing import List, Dict, Optional
-import random
+from zoneinfo import ZoneInfo
+import numpy as np
+import time
+import uuid
 import logging
 
 logger = logging.getLogger(__name__)
 
+GOAL_TARGETS = {'daily': 5, 'weekly': 3, 'monthly': 2}
+# User ids per grouped progress query; keeps the IN list under SQLite's variable limit.
+PROGRESS_BATCH_SIZE = 500
+
+# Progress of the background expiry sweep, reported by /scheduler/status.
+EXPIRY_SWEEP_PROGRESS = {
+    "runs": 0,
+    "expired_total": 0,
+    "last_run_started_at": None,
+    "last_run_finished_at": None,
+    "last_run_expired": 0,
+    "last_run_batches": 0,
+    "backlog_remaining": False
+}
+
 class GoalCRUD:
     
     @staticmethod
-    def _assign_goals_by_frequency(db: Session, frequency: str, target_count: int, user_id: Optional[int] = None) -> Dict:
+    def _frequency_targets(frequencies) -> Dict[str, int]:
+        """Goal counts for ``frequencies`` (one name or a collection), finest period first."""
+        if isinstance(frequencies, str):
+            frequencies = [frequencies]
+        unknown = set(frequencies) - set(GOAL_TARGETS)
+        if unknown:
+            raise ValueError(f"Unknown goal frequency: {', '.join(sorted(unknown))}")
+        return {frequency: target for frequency, target in GOAL_TARGETS.items() if frequency in frequencies}
+
+    @staticmethod
+    def _is_live_pending(now: datetime):
+        """Pending rows that are visible and still open at ``now``; past-due pending rows count as expired."""
+        return and_(
+            user_achievements.c.status == 'pending',
+            user_achievements.c.due_date > now,
+            user_achievements.c.created_at <= now
+        )
+
+    @staticmethod
+    def _is_expired(now: datetime):
+        """Expired rows, whether or not the sweep has rewritten their status yet."""
+        return or_(
+            user_achievements.c.status == 'expired',
+            and_(user_achievements.c.status == 'pending', user_achievements.c.due_date <= now)
+        )
+
+    @staticmethod
+    def _assign_goals_by_frequency(db: Session, targets: Dict[str, int], user_id: Optional[int] = None,
+                                   incremental: bool = False) -> Dict:
+        label = "+".join(targets)
         try:
-            if user_id:
-                users = db.query(User).filter(and_(User.id == user_id, User.is_active == True)).all()
-            else:
-                users = db.query(User).filter(User.is_active == True).all()
-            
-            if not users:
-                return {"assigned": 0, "errors": ["No active users found to assign goals to."]}
-                
-            available_achievements = db.query(Achievement).filter(Achievement.frequency == frequency).all()
+            user_criteria = [User.id == user_id] if user_id else []
+            tz = GoalCRUD.get_user_timezone(db, user_id) if user_id else None
+            return GoalCRUD._bulk_assign_goals(db, targets, user_criteria, allow_empty=incremental, tz=tz,
+                                               incremental=incremental)
+        except Exception as e:
+            logger.error(f"General error in assign_{label}_goals: {str(e)}")
+            raise
 
-            if not available_achievements:
+    @staticmethod
+    def _period_goal_count(frequency: str, now: datetime, tz: Optional[str] = None):
+        """Correlated count of the user's ``frequency`` rows created within the period containing ``now``."""
+        period_start, period_end = GoalCRUD._period_bounds(frequency, now, tz)
+        period_goals = user_achievements.alias('period_goals')
+        return select(func.count()).where(and_(
+            period_goals.c.user_id == User.id,
+            period_goals.c.created_at >= period_start,
+            period_goals.c.created_at < period_end,
+            period_goals.c.achievement_id.in_(select(Achievement.id).where(Achievement.frequency == frequency))
+        )).scalar_subquery()
+
+    @staticmethod
+    def _held_goal_counts(targets: Dict[str, int], now: datetime, tz: Optional[str], incremental: bool) -> Dict:
+        """Per-frequency number of goals a user already holds for the period; a full run ignores them."""
+        return {
+            frequency: GoalCRUD._period_goal_count(frequency, now, tz) if incremental else literal(0)
+            for frequency in targets
+        }
+
+    @staticmethod
+    def _needs_goals_criteria(targets: Dict[str, int], now: datetime, tz: Optional[str], incremental: bool) -> Dict:
+        """Per-frequency condition a user must meet to get goals of that frequency in this run.
+
+        An incremental run takes users holding fewer than the frequency's target
+        for the period, so a period that came out short (pre-generated while the
+        current goals still held their keys) is topped up later.
+        """
+        held = GoalCRUD._held_goal_counts(targets, now, tz, incremental)
+        return {
+            frequency: held[frequency] < target if incremental else true()
+            for frequency, target in targets.items()
+        }
+
+    @staticmethod
+    def _bulk_assign_goals(db: Session, targets: Dict[str, int], user_criteria: List,
+                           allow_empty: bool = False, starts_at: Optional[datetime] = None,
+                           tz: Optional[str] = None, incremental: bool = False) -> Dict:
+        """Set-based assignment of every frequency in ``targets`` for the active users matching ``user_criteria``.
+
+        All frequencies share one pass: a single user scan, a single DELETE of stale
+        pending/expired rows, one vectorized sample_goal_matrix call per frequency and
+        one insert stream written with executemany in batches of GOAL_ASSIGNMENT_BATCH_SIZE rows.
+
+        Picks are weighted by Achievement.selection_weight, and goals a user had in
+        the last GOAL_NO_REPEAT_PERIODS periods (read from their stored bitsets) are
+        only reused when the user has nothing else left.
+
+        With ``starts_at`` in the future the rows are pre-generated for the period
+        starting then; readers ignore pending rows whose created_at is still ahead.
+        ``tz`` is the timezone whose calendar sets the period and due date, and
+        ``incremental`` tops up, per frequency, users holding fewer than its
+        target for the period, keeping the goals they already have.
+        """
+        now = datetime.utcnow()
+        created_at = starts_at or now
+        frequencies = list(targets)
+        needs_goals = GoalCRUD._needs_goals_criteria(targets, created_at, tz, incremental)
+        held_goals = GoalCRUD._held_goal_counts(targets, created_at, tz, incremental)
+        active = [User.is_active == True, *user_criteria]
+        target_users = select(User.id).where(*active, or_(*needs_goals.values()))
+
+        # One scan tells, per user, which of the frequencies still need goals and how many are held.
+        user_rows = db.execute(
+            select(User.id, *[needs_goals[frequency].label(f"needs_{frequency}") for frequency in frequencies],
+                   *[held_goals[frequency].label(f"held_{frequency}") for frequency in frequencies])
+            .where(*active, or_(*needs_goals.values())).order_by(User.id)
+        ).all()
+
+        if not user_rows:
+            if allow_empty:
+                return {"assigned_to_users": 0, "total_goals_assigned": 0, "errors": [],
+                        "by_frequency": {frequency: GoalCRUD._empty_frequency_result() for frequency in frequencies}}
+            return {"assigned": 0, "errors": ["No active users found to assign goals to."]}
+
+        catalog_rows = db.execute(
+            select(Achievement.id, Achievement.frequency, Achievement.selection_weight)
+            .where(Achievement.frequency.in_(frequencies)).order_by(Achievement.id)
+        ).all()
+        catalogs = {frequency: [row for row in catalog_rows if row.frequency == frequency] for frequency in frequencies}
+        by_frequency = {frequency: GoalCRUD._empty_frequency_result() for frequency in frequencies}
+
+        for frequency in frequencies:
+            if not catalogs[frequency]:
                 msg = f"No '{frequency}' achievements exist in the database. Cannot assign any."
                 logger.warning(msg)
-                return {"assigned": 0, "errors": [msg]}
+                by_frequency[frequency]["errors"].append(msg)
+        assignable = [frequency for frequency in frequencies if catalogs[frequency]]
 
-            results = {"assigned_to_users": 0, "total_goals_assigned": 0, "errors": []}
-            
-            for user in users:
-                try:
-                    db.query(user_achievements).filter(
-                        and_(
-                            user_achievements.c.user_id == user.id,
-                            user_achievements.c.status == 'pending',
-                            user_achievements.c.achievement_id.in_(
-                                db.query(Achievement.id).filter(Achievement.frequency == frequency)
-                            )
-                        )
-                    ).delete(synchronize_session=False)
-                    
-                    num_to_select = min(len(available_achievements), target_count)
-                    
-                    if num_to_select == 0:
-                        continue
-
-                    selected_achievements = random.sample(available_achievements, num_to_select)
-                    
-                    due_date = datetime.utcnow()
-                    if frequency == 'daily':
-                        due_date += timedelta(days=1)
-                    elif frequency == 'weekly':
-                        due_date += timedelta(weeks=1)
-                    elif frequency == 'monthly':
-                        due_date += timedelta(days=30)
-
-                    for achievement in selected_achievements:
-                        goal_assignment = {
-                            'user_id': user.id,
-                            'achievement_id': achievement.id,
-                            'status': 'pending',
-                            'due_date': due_date,
-                            'created_at': datetime.utcnow()
-                        }
-                        db.execute(user_achievements.insert().values(**goal_assignment))
-                        results["total_goals_assigned"] += 1
-                    
-                    results["assigned_to_users"] += 1
-                    
-                except Exception as e:
-                    error_msg = f"Error assigning {frequency} goals to user {user.id}: {str(e)}"
-                    results["errors"].append(error_msg)
-                    logger.error(error_msg)
-            
+        if not assignable:
+            return {"assigned": 0, "errors": [error for result in by_frequency.values() for error in result["errors"]]}
+
+        if incremental and starts_at is None:
+            # A top-up keeps the period's goals; only leftovers of earlier periods are replaced.
+            replaced = {frequency: user_achievements.c.created_at < GoalCRUD._period_bounds(frequency, now, tz)[0]
+                        for frequency in assignable}
+        elif incremental:
+            replaced = dict.fromkeys(assignable, false())
+        elif starts_at is None:
+            replaced = dict.fromkeys(assignable, user_achievements.c.created_at <= now)
+        else:
+            replaced = dict.fromkeys(assignable, user_achievements.c.created_at >= starts_at)
+
+        catalog = select(Achievement.id).where(Achievement.frequency.in_(assignable))
+        frequency_users = {
+            frequency: select(User.id).where(*active, needs_goals[frequency]) for frequency in assignable
+        }
+
+        # Expired rows (including past-due pending ones the sweep hasn't reached)
+        # are dropped together with the replaced pending ones so that their
+        # (user_id, achievement_id) keys can be handed out again.
+        db.execute(
+            user_achievements.delete().where(or_(*[
+                and_(or_(GoalCRUD._is_expired(now),
+                         and_(user_achievements.c.status == 'pending', replaced[frequency])),
+                     user_achievements.c.achievement_id.in_(
+                         select(Achievement.id).where(Achievement.frequency == frequency)),
+                     user_achievements.c.user_id.in_(frequency_users[frequency]))
+                for frequency in assignable
+            ]))
+        )
+
+        # Whatever is left (completed rows, goals of the other period) keeps its
+        # key, so those achievements can't be handed out again.
+        taken_pairs = db.execute(
+            select(user_achievements.c.user_id, user_achievements.c.achievement_id).where(and_(
+                user_achievements.c.achievement_id.in_(catalog),
+                user_achievements.c.user_id.in_(target_users)
+            ))
+        ).all()
+
+        period_keys = {frequency: GoalCRUD._period_key(frequency, created_at, tz) for frequency in assignable}
+        recent_keys = {
+            frequency: GoalCRUD._previous_period_keys(frequency, created_at, GOAL_NO_REPEAT_PERIODS, tz)
+            for frequency in assignable
+        }
+        recent = db.execute(
+            select(GoalSelectionHistory.user_id, GoalSelectionHistory.frequency, GoalSelectionHistory.assigned_bits)
+            .where(and_(
+                or_(*[and_(GoalSelectionHistory.frequency == frequency, GoalSelectionHistory.period_key.in_(keys))
+                      for frequency, keys in recent_keys.items()]),
+                GoalSelectionHistory.user_id.in_(target_users)
+            ))
+        ).all() if GOAL_NO_REPEAT_PERIODS > 0 else []
+
+        all_users = np.asarray([row[0] for row in user_rows], dtype=np.int64)
+        needs = np.asarray([tuple(row[1:1 + len(frequencies)]) for row in user_rows],
+                           dtype=bool).reshape(len(user_rows), -1)
+        held = np.asarray([tuple(row[1 + len(frequencies):]) for row in user_rows],
+                          dtype=np.int64).reshape(len(user_rows), -1)
+        pairs = np.asarray([tuple(row) for row in taken_pairs], dtype=np.int64).reshape(-1, 2)
+        got_goals = np.zeros(len(all_users), dtype=bool)
+        segments, history = [], []
+
+        for index, frequency in enumerate(frequencies):
+            if frequency not in assignable or not needs[:, index].any():
+                continue
+            user_array = all_users[needs[:, index]]
+            catalog_array = np.asarray([row.id for row in catalogs[frequency]], dtype=np.int64)
+            weights = np.asarray([row.selection_weight for row in catalogs[frequency]], dtype=np.float64)
+            excluded = exclusion_matrix(user_array, catalog_array, pairs[:, 0], pairs[:, 1])
+            frequency_recent = [row for row in recent if row[1] == frequency]
+            avoided = recent_goal_matrix(user_array, catalog_array,
+                                         [row[0] for row in frequency_recent], [row[2] for row in frequency_recent])
+
+            seed = period_seed(GOAL_SAMPLER_SEED, frequency, period_keys[frequency], int(user_array[0]))
+            shortfall = targets[frequency] - held[needs[:, index], index]
+            matrix = sample_goal_matrix(catalog_array, len(user_array), targets[frequency], seed, excluded,
+                                        weights, avoided, limits=shortfall if incremental else None)
+
+            _, due_date = GoalCRUD._period_bounds(frequency, created_at, tz)
+            segments.append((user_array, matrix, due_date))
+            history.append((frequency, period_keys[frequency], user_array, matrix))
+
+            filled = matrix >= 0
+            got_goals[needs[:, index]] |= filled.any(axis=1)
+            by_frequency[frequency]["assigned_to_users"] = int(filled.any(axis=1).sum())
+            by_frequency[frequency]["total_goals_assigned"] = int(filled.sum())
+
+        # History first: its DELETE reuses the "still needs goals" subqueries, which
+        # stop matching once the new goal rows exist.
+        GoalCRUD._write_selection_history(db, history, frequency_users, merge=incremental)
+        GoalCRUD._write_goal_matrix(db, segments, created_at)
+        if starts_at is None:
+            ProgressReadModel.refresh(db, all_users.tolist())
+
+        return {
+            "assigned_to_users": int(got_goals.sum()),
+            "total_goals_assigned": sum(result["total_goals_assigned"] for result in by_frequency.values()),
+            "errors": [error for result in by_frequency.values() for error in result["errors"]],
+            "by_frequency": by_frequency
+        }
+
+    @staticmethod
+    def _empty_frequency_result() -> Dict:
+        return {"assigned_to_users": 0, "total_goals_assigned": 0, "errors": []}
+
+    @staticmethod
+    def _write_goal_matrix(db: Session, segments: List[tuple], created_at: datetime):
+        """Insert (user_ids, users x k matrix, due_date) segments as pending rows in GOAL_ASSIGNMENT_BATCH_SIZE batches.
+
+        Segments of different frequencies share the batches, so a combined run is a single insert stream.
+        """
+        def pending_rows():
+            for user_ids, matrix, due_date in segments:
+                user_column = np.repeat(user_ids, matrix.shape[1])
+                achievement_column = matrix.ravel()
+                filled = achievement_column >= 0
+                for uid, aid in zip(user_column[filled].tolist(), achievement_column[filled].tolist()):
+                    yield {'user_id': uid, 'achievement_id': aid, 'status': 'pending',
+                           'due_date': due_date, 'created_at': created_at}
+
+        GoalCRUD._insert_in_batches(db, user_achievements, pending_rows())
+
+    @staticmethod
+    def _insert_in_batches(db: Session, table, rows):
+        batch_size = max(GOAL_ASSIGNMENT_BATCH_SIZE, 1)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            db.execute(table.insert(), batch)
+
+    @staticmethod
+    def _write_selection_history(db: Session, history: List[tuple], frequency_users: Dict, merge: bool = False):
+        """Store each period's picks as one bitset per user, replacing an earlier run of the same period.
+
+        With ``merge`` (a top-up) the earlier run's picks are kept and the new ones OR-ed in.
+        """
+        if not history:
+            return
+        same_period = or_(*[
+            and_(GoalSelectionHistory.frequency == frequency,
+                 GoalSelectionHistory.period_key == period_key,
+                 GoalSelectionHistory.user_id.in_(frequency_users[frequency]))
+            for frequency, period_key, _, _ in history
+        ])
+        earlier = {}
+        if merge:
+            earlier = {
+                (row.user_id, row.frequency): row.assigned_bits
+                for row in db.execute(select(GoalSelectionHistory.user_id, GoalSelectionHistory.frequency,
+                                             GoalSelectionHistory.assigned_bits).where(same_period))
+            }
+        db.execute(GoalSelectionHistory.__table__.delete().where(same_period))
+        now = datetime.utcnow()
+        rows = (
+            {'user_id': uid, 'frequency': frequency, 'period_key': period_key, 'updated_at': now,
+             'assigned_bits': merge_goal_bits(bits, earlier.get((uid, frequency), b''))}
+            for frequency, period_key, user_ids, matrix in history
+            for uid, bits in zip(user_ids.tolist(), pack_goal_bits(matrix))
+        )
+        GoalCRUD._insert_in_batches(db, GoalSelectionHistory.__table__, rows)
+
+    @staticmethod
+    def _previous_period_keys(frequency: str, now: datetime, count: int, tz: Optional[str] = None) -> List[str]:
+        """Keys of the ``count`` periods before the one containing ``now``, newest first."""
+        keys = []
+        period_start, _ = GoalCRUD._period_bounds(frequency, now, tz)
+        for _ in range(max(count, 0)):
+            period_start, _ = GoalCRUD._period_bounds(frequency, period_start - timedelta(seconds=1), tz)
+            keys.append(GoalCRUD._period_key(frequency, period_start, tz))
+        return keys
+
+    @staticmethod
+    def _to_local(now: datetime, tz: Optional[str]) -> datetime:
+        if not tz:
+            return now
+        return now.replace(tzinfo=timezone.utc).astimezone(ZoneInfo(tz)).replace(tzinfo=None)
+
+    @staticmethod
+    def _to_utc(local: datetime, tz: Optional[str]) -> datetime:
+        if not tz:
+            return local
+        return local.replace(tzinfo=ZoneInfo(tz)).astimezone(timezone.utc).replace(tzinfo=None)
+
+    @staticmethod
+    def _period_key(frequency: str, now: datetime, tz: Optional[str] = None) -> str:
+        now = GoalCRUD._to_local(now, tz)
+        if frequency == 'weekly':
+            year, week, _ = now.isocalendar()
+            return f"{year}-W{week:02d}"
+        if frequency == 'monthly':
+            return now.strftime('%Y-%m')
+        return now.strftime('%Y-%m-%d')
+
+    @staticmethod
+    def _period_bounds(frequency: str, now: datetime, tz: Optional[str] = None) -> tuple:
+        """Naive-UTC (start, end) of the period containing ``now``, following the calendar of ``tz``."""
+        day_start = GoalCRUD._to_local(now, tz).replace(hour=0, minute=0, second=0, microsecond=0)
+        if frequency == 'weekly':
+            start = day_start - timedelta(days=day_start.weekday())
+            end = start + timedelta(weeks=1)
+        elif frequency == 'monthly':
+            start = day_start.replace(day=1)
+            end = (start + timedelta(days=32)).replace(day=1)
+        else:
+            start, end = day_start, day_start + timedelta(days=1)
+        return GoalCRUD._to_utc(start, tz), GoalCRUD._to_utc(end, tz)
+
+    @staticmethod
+    def active_timezones(db: Session) -> List[str]:
+        """Timezones of customers that have active users; UTC is always included for users without one."""
+        zones = db.query(func.coalesce(Customer.timezone, 'UTC')).join(
+            User, User.customer_id == Customer.id
+        ).filter(User.is_active == True).distinct().all()
+        return sorted({zone for zone, in zones} | {'UTC'})
+
+    @staticmethod
+    def get_user_timezone(db: Session, user_id: int) -> str:
+        zone = db.query(func.coalesce(Customer.timezone, 'UTC')).select_from(User).outerjoin(
+            Customer, User.customer_id == Customer.id
+        ).filter(User.id == user_id).scalar()
+        return zone or 'UTC'
+
+    @staticmethod
+    def _users_by_timezone(db: Session, user_ids: List[int]) -> Dict[str, List[int]]:
+        """Group ``user_ids`` by their customer's timezone (UTC when there is none)."""
+        groups = {}
+        unique_ids = list(dict.fromkeys(user_ids))
+        for start in range(0, len(unique_ids), PROGRESS_BATCH_SIZE):
+            rows = db.query(User.id, func.coalesce(Customer.timezone, 'UTC')).outerjoin(
+                Customer, User.customer_id == Customer.id
+            ).filter(User.id.in_(unique_ids[start:start + PROGRESS_BATCH_SIZE])).all()
+            for user_id, zone in rows:
+                groups.setdefault(zone or 'UTC', []).append(user_id)
+        return groups
+
+    @staticmethod
+    def _next_local_midnights(db: Session, user_ids: List[int], now: datetime) -> Dict[int, datetime]:
+        """Naive-UTC end of each user's current local day."""
+        midnights = {}
+        for zone, zone_users in GoalCRUD._users_by_timezone(db, user_ids).items():
+            _, end = GoalCRUD._period_bounds('daily', now, zone)
+            midnights.update(dict.fromkeys(zone_users, end))
+        return midnights
+
+    @staticmethod
+    def _scope_criteria(scope: Optional[str]) -> List:
+        """Translate a checkpoint scope into User filters.
+
+        A scope is one or more ';'-separated parts: "range:<lo>-<hi>",
+        "customer:<id>,..." (``none`` for users without a customer) or "timezone:<name>".
+        """
+        if not scope:
+            return []
+        criteria = []
+        for part in scope.split(';'):
+            kind, _, value = part.partition(':')
+            if kind == 'range':
+                low, high = value.split('-')
+                criteria += [User.id >= int(low), User.id <= int(high)]
+            elif kind == 'customer':
+                tokens = value.split(',')
+                customer_ids = [int(token) for token in tokens if token != 'none']
+                conditions = [User.customer_id.in_(customer_ids)]
+                if 'none' in tokens:
+                    conditions.append(User.customer_id.is_(None))
+                criteria.append(or_(*conditions))
+            elif kind == 'timezone':
+                zone_customers = select(Customer.id).where(func.coalesce(Customer.timezone, 'UTC') == value)
+                condition = User.customer_id.in_(zone_customers)
+                if value == 'UTC':
+                    condition = or_(condition, User.customer_id.is_(None))
+                criteria.append(condition)
+            else:
+                raise ValueError(f"Unknown assignment scope: {scope}")
+        return criteria
+
+    @staticmethod
+    def _scope_timezone(scope: Optional[str]) -> Optional[str]:
+        for part in (scope or '').split(';'):
+            kind, _, value = part.partition(':')
+            if kind == 'timezone':
+                return value
+        return None
+
+    @staticmethod
+    def _assign_goals_in_chunks(db: Session, targets: Dict[str, int], job_id: Optional[str] = None,
+                                scope: Optional[str] = None, incremental: bool = False,
+                                starts_at: Optional[datetime] = None) -> Dict:
+        """Assign goals to active users in user-id chunks, committing after each one.
+
+        Progress is stored in a GoalAssignmentCheckpoint keyed by (job_id, frequency,
+        period); running the same job again for the same period and scope resumes
+        after the last committed user id. ``targets`` may hold several frequencies whose
+        periods start together; they are then assigned in one pass and share a
+        checkpoint ("daily+weekly", keyed by the finest period). ``scope`` restricts
+        the run to one shard of users, ``incremental`` to users below their goal
+        target for the period, and ``starts_at`` pre-generates the period beginning at that time.
+        """
+        job_id = job_id or f"manual-{uuid.uuid4().hex[:12]}"
+        label = "+".join(targets)
+        finest = next(iter(targets))
+        period_time = starts_at or datetime.utcnow()
+        tz = GoalCRUD._scope_timezone(scope)
+        scope_criteria = GoalCRUD._scope_criteria(scope)
+        if incremental:
+            scope_criteria.append(or_(*GoalCRUD._needs_goals_criteria(targets, period_time, tz, True).values()))
+        period_key = GoalCRUD._period_key(finest, period_time, tz)
+
+        has_catalog = db.query(Achievement.id).filter(Achievement.frequency.in_(list(targets))).first()
+        if not has_catalog:
+            msg = f"No '{label}' achievements exist in the database. Cannot assign any."
+            logger.warning(msg)
+            return {"assigned": 0, "errors": [msg]}
+
+        checkpoint = db.query(GoalAssignmentCheckpoint).filter(and_(
+            GoalAssignmentCheckpoint.job_id == job_id,
+            GoalAssignmentCheckpoint.frequency == label,
+            GoalAssignmentCheckpoint.period_key == period_key
+        )).first()
+
+        if checkpoint is None:
+            checkpoint = GoalAssignmentCheckpoint(job_id=job_id, frequency=label, period_key=period_key,
+                                                  scope=scope, last_user_id=0, status='running',
+                                                  assigned_to_users=0, total_goals_assigned=0)
+            db.add(checkpoint)
+            db.commit()
+        elif checkpoint.scope != scope:
+            # last_user_id only means something within the scope it was recorded for (a
+            # re-planned shard can cover a different user range), so start the job over.
+            logger.warning(f"Restarting goal assignment {job_id} for {label} period {period_key}: "
+                           f"scope changed from {checkpoint.scope!r} to {scope!r}")
+            checkpoint.scope = scope
+            checkpoint.last_user_id = 0
+            checkpoint.status = 'running'
+            checkpoint.assigned_to_users = 0
+            checkpoint.total_goals_assigned = 0
+            db.commit()
+        elif checkpoint.status == 'completed':
+            logger.info(f"Goal assignment {job_id} for {label} period {period_key} already completed")
+        else:
+            logger.info(f"Resuming goal assignment {job_id} for {label} period {period_key} after user {checkpoint.last_user_id}")
+
+        errors = []
+        chunk_size = max(GOAL_ASSIGNMENT_CHUNK_SIZE, 1)
+
+        while checkpoint.status != 'completed':
+            chunk_ids = db.execute(
+                select(User.id).where(User.is_active == True, User.id > checkpoint.last_user_id, *scope_criteria)
+                .order_by(User.id).limit(chunk_size)
+            ).scalars().all()
+
+            if not chunk_ids:
+                checkpoint.status = 'completed'
+                db.commit()
+                break
+
+            try:
+                chunk = GoalCRUD._bulk_assign_goals(
+                    db, targets,
+                    [User.id > checkpoint.last_user_id, User.id <= chunk_ids[-1], *GoalCRUD._scope_criteria(scope)],
+                    allow_empty=True, starts_at=starts_at, tz=tz, incremental=incremental
+                )
+                checkpoint.last_user_id = chunk_ids[-1]
+                checkpoint.assigned_to_users += chunk.get("assigned_to_users", 0)
+                checkpoint.total_goals_assigned += chunk.get("total_goals_assigned", 0)
+                errors.extend(error for error in chunk.get("errors", []) if error not in errors)
+                db.commit()
+                progress_cache.invalidate_many(chunk_ids)
+            except Exception:
+                db.rollback()
+                raise
+
+        return {
+            "assigned_to_users": checkpoint.assigned_to_users,
+            "total_goals_assigned": checkpoint.total_goals_assigned,
+            "errors": errors,
+            "job_id": job_id
+        }
+
+    @staticmethod
+    def assign_goals(db: Session, frequencies, user_id: Optional[int] = None, job_id: Optional[str] = None,
+                     workers: Optional[int] = None, incremental: bool = False) -> Dict:
+        """Assign one or several frequencies; several are handled in a single pass over the users."""
+        if GOAL_ASSIGNMENT_MODE == 'stateless':
+            return GoalCRUD._stateless_assignment_result()
+
+        targets = GoalCRUD._frequency_targets(frequencies)
+        if user_id:
+            results = GoalCRUD._assign_goals_by_frequency(db, targets, user_id, incremental)
+            db.commit()
+            progress_cache.invalidate(user_id)
             return results
-            
-        except Exception as e:
-            logger.error(f"General error in assign_{frequency}_goals: {str(e)}")
-            raise
+
+        job_id = job_id or f"manual-{uuid.uuid4().hex[:12]}"
+        waves = [
+            GoalCRUD.assign_goals_for_timezone(db, list(targets), tz, f"{job_id}:{tz}", workers, incremental)
+            for tz in GoalCRUD.active_timezones(db)
+        ]
+        return GoalCRUD._merge_results(waves, job_id)
 
     @staticmethod
-    def assign_daily_goals(db: Session, user_id: int = None) -> Dict:
-        results = GoalCRUD._assign_goals_by_frequency(db, 'daily', 5, user_id)
-        db.commit()
-        return results
+    def assign_goals_for_timezone(db: Session, frequencies, tz: str, job_id: Optional[str] = None,
+                                  workers: Optional[int] = None, incremental: bool = False) -> Dict:
+        """Assign one timezone wave: users whose customer lives in ``tz``, with periods on that calendar."""
+        if GOAL_ASSIGNMENT_MODE == 'stateless':
+            return GoalCRUD._stateless_assignment_result()
+
+        targets = GoalCRUD._frequency_targets(frequencies)
+        scope = f"timezone:{tz}"
+        workers = workers if workers is not None else GOAL_ASSIGNMENT_WORKERS
+        if workers > 1:
+            from app.services.goal_parallel import assign_goals_parallel
+            return assign_goals_parallel(db, targets, job_id, workers, incremental, scope)
+        return GoalCRUD._assign_goals_in_chunks(db, targets, job_id, scope, incremental=incremental)
+
+    @staticmethod
+    def _merge_results(results: List[Dict], job_id: str) -> Dict:
+        merged = {"assigned_to_users": 0, "total_goals_assigned": 0, "errors": [], "job_id": job_id}
+        for result in results:
+            merged["assigned_to_users"] += result.get("assigned_to_users", 0)
+            merged["total_goals_assigned"] += result.get("total_goals_assigned", 0)
+            merged["errors"].extend(error for error in result.get("errors", []) if error not in merged["errors"])
+        return merged
+
+    @staticmethod
+    def _stateless_assignment_result() -> Dict:
+        """In stateless mode goals are derived on read, so assignment writes nothing."""
+        return {"assigned_to_users": 0, "total_goals_assigned": 0, "errors": [], "mode": "stateless"}
+
+    @staticmethod
+    def assign_daily_goals(db: Session, user_id: int = None, job_id: str = None, workers: int = None,
+                           incremental: bool = False) -> Dict:
+        return GoalCRUD.assign_goals(db, 'daily', user_id, job_id, workers, incremental)
     
     @staticmethod
-    def assign_weekly_goals(db: Session, user_id: int = None) -> Dict:
-        results = GoalCRUD._assign_goals_by_frequency(db, 'weekly', 3, user_id)
-        db.commit()
-        return results
+    def assign_weekly_goals(db: Session, user_id: int = None, job_id: str = None, workers: int = None,
+                            incremental: bool = False) -> Dict:
+        return GoalCRUD.assign_goals(db, 'weekly', user_id, job_id, workers, incremental)
     
     @staticmethod
-    def assign_monthly_goals(db: Session, user_id: int = None) -> Dict:
-        results = GoalCRUD._assign_goals_by_frequency(db, 'monthly', 2, user_id)
-        db.commit()
+    def assign_monthly_goals(db: Session, user_id: int = None, job_id: str = None, workers: int = None,
+                             incremental: bool = False) -> Dict:
+        return GoalCRUD.assign_goals(db, 'monthly', user_id, job_id, workers, incremental)
+
+    @staticmethod
+    def frequencies_starting_at(boundary: datetime, tz: Optional[str] = None) -> List[str]:
+        """Frequencies whose period begins exactly at ``boundary`` (e.g. all three on a Monday the 1st)."""
+        return [
+            frequency for frequency in GOAL_TARGETS
+            if GoalCRUD._period_bounds(frequency, boundary, tz)[0] == boundary
+        ]
+
+    @staticmethod
+    def resume_interrupted_assignments(db: Session) -> List[Dict]:
+        """Finish checkpointed assignment jobs that stopped part-way through the current period.
+
+        Resumed runs are incremental, so users that already got goals this period
+        (before the interruption or from another job) are only topped up to their target.
+        """
+        now = datetime.utcnow()
+        results = []
+        running = db.query(GoalAssignmentCheckpoint).filter(GoalAssignmentCheckpoint.status == 'running').all()
+
+        for checkpoint in running:
+            frequencies = checkpoint.frequency.split('+')
+            if not frequencies or any(frequency not in GOAL_TARGETS for frequency in frequencies):
+                continue
+            targets = GoalCRUD._frequency_targets(frequencies)
+            finest = next(iter(targets))
+            tz = GoalCRUD._scope_timezone(checkpoint.scope)
+            _, next_start = GoalCRUD._period_bounds(finest, now, tz)
+            if checkpoint.period_key == GoalCRUD._period_key(finest, now, tz):
+                starts_at = None
+            elif checkpoint.period_key == GoalCRUD._period_key(finest, next_start, tz):
+                starts_at = next_start
+            else:
+                checkpoint.status = 'abandoned'
+                db.commit()
+                continue
+            results.append(GoalCRUD._assign_goals_in_chunks(
+                db, targets, checkpoint.job_id, checkpoint.scope, incremental=True, starts_at=starts_at
+            ))
+
         return results
+
+    @staticmethod
+    def pregenerate_next_period(db: Session, frequencies, job_id: Optional[str] = None, tz: str = 'UTC') -> Dict:
+        """Write next period's goals ahead of time, dated to the period start.
+
+        The rows stay invisible until their created_at passes, so the switch at the
+        boundary costs nothing. The current period's goals still hold their keys,
+        so a user can come out short here; the regular boundary job then runs
+        incrementally and tops every user up to the target once those keys are
+        released. Frequencies whose next periods start at the same moment are
+        written in one pass.
+        """
+        if GOAL_ASSIGNMENT_MODE != 'stored':
+            return GoalCRUD._stateless_assignment_result()
+
+        now = datetime.utcnow()
+        targets = GoalCRUD._frequency_targets(frequencies)
+        groups = {}
+        for frequency in targets:
+            _, next_start = GoalCRUD._period_bounds(frequency, now, tz)
+            groups.setdefault(next_start, []).append(frequency)
+
+        results = [
+            GoalCRUD._assign_goals_in_chunks(
+                db, GoalCRUD._frequency_targets(group), job_id or f"pregenerate_{'+'.join(group)}:{tz}",
+                f"timezone:{tz}", incremental=True, starts_at=next_start
+            )
+            for next_start, group in groups.items()
+        ]
+        return results[0] if len(results) == 1 else GoalCRUD._merge_results(results, job_id or f"pregenerate:{tz}")
     
     @staticmethod
     def assign_goals_for_new_user(db: Session, user_id: int) -> Dict:
+        if GOAL_ASSIGNMENT_MODE == 'stateless':
+            return {frequency: GoalCRUD._stateless_assignment_result() for frequency in GOAL_TARGETS}
         try:
-            daily_result = GoalCRUD._assign_goals_by_frequency(db, 'daily', 5, user_id)
-            weekly_result = GoalCRUD._assign_goals_by_frequency(db, 'weekly', 3, user_id)
-            monthly_result = GoalCRUD._assign_goals_by_frequency(db, 'monthly', 2, user_id)
+            result = GoalCRUD._assign_goals_by_frequency(db, GOAL_TARGETS, user_id)
             
             db.commit()
+            progress_cache.invalidate(user_id)
             
-            return {
-                "daily": daily_result,
-                "weekly": weekly_result,
-                "monthly": monthly_result
-            }
+            return result.get("by_frequency") or {frequency: result for frequency in GOAL_TARGETS}
         except Exception as e:
             db.rollback()
             logger.error(f"Error assigning goals for new user {user_id}: {str(e)}")
             raise
 
+    @staticmethod
+    def ensure_current_goals(db: Session, user_id: int) -> Dict:
+        """Lazy mode: assign this period's goals on the user's first request of the period.
+
+        A GoalAssignmentClaim row per (user, frequency, period) is flushed before
+        assigning and committed together with the goals; a parallel request that
+        hits the primary key backs off and reads the winner's goals instead.
+        """
+        now = datetime.utcnow()
+        tz = GoalCRUD.get_user_timezone(db, user_id)
+        period_keys = {frequency: GoalCRUD._period_key(frequency, now, tz) for frequency in GOAL_TARGETS}
+        
+        claimed = {
+            row.frequency for row in db.query(GoalAssignmentClaim.frequency).filter(and_(
+                GoalAssignmentClaim.user_id == user_id,
+                tuple_(GoalAssignmentClaim.frequency, GoalAssignmentClaim.period_key).in_(list(period_keys.items()))
+            ))
+        }
+        
+        results = {}
+        for frequency, period_key in period_keys.items():
+            if frequency in claimed:
+                continue
+            try:
+                db.add(GoalAssignmentClaim(user_id=user_id, frequency=frequency, period_key=period_key))
+                db.flush()
+            except IntegrityError:
+                db.rollback()
+                continue
+            
+            try:
+                results[frequency] = GoalCRUD._assign_goals_by_frequency(
+                    db, GoalCRUD._frequency_targets(frequency), user_id, incremental=True
+                )
+                db.commit()
+                progress_cache.invalidate(user_id)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error lazily assigning {frequency} goals to user {user_id}: {str(e)}")
+        
+        return results
+
     @staticmethod
     def get_user_progress(db: Session, user_id: int) -> Dict:
         try:
-            now = datetime.utcnow()
-            today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            week_start = now - timedelta(days=7)
-            month_start = now - timedelta(days=30)
-            
-            daily_pending = db.query(func.count(user_achievements.c.user_id)).select_from(user_achievements.join(Achievement)).filter(
-                and_(user_achievements.c.user_id == user_id, user_achievements.c.status == 'pending', Achievement.frequency == 'daily', user_achievements.c.due_date > now)).scalar() or 0
-            
-            daily_completed = db.query(func.count(user_achievements.c.user_id)).select_from(user_achievements.join(Achievement)).filter(
-                and_(user_achievements.c.user_id == user_id, user_achievements.c.status == 'completed', Achievement.frequency == 'daily', user_achievements.c.created_at >= today_start)).scalar() or 0
-            
-            weekly_pending = db.query(func.count(user_achievements.c.user_id)).select_from(user_achievements.join(Achievement)).filter(
-                and_(user_achievements.c.user_id == user_id, user_achievements.c.status == 'pending', Achievement.frequency == 'weekly', user_achievements.c.due_date > now)).scalar() or 0
-            
-            weekly_completed = db.query(func.count(user_achievements.c.user_id)).select_from(user_achievements.join(Achievement)).filter(
-                and_(user_achievements.c.user_id == user_id, user_achievements.c.status == 'completed', Achievement.frequency == 'weekly', user_achievements.c.created_at >= week_start)).scalar() or 0
-            
-            monthly_pending = db.query(func.count(user_achievements.c.user_id)).select_from(user_achievements.join(Achievement)).filter(
-                and_(user_achievements.c.user_id == user_id, user_achievements.c.status == 'pending', Achievement.frequency == 'monthly', user_achievements.c.due_date > now)).scalar() or 0
-            
-            monthly_completed = db.query(func.count(user_achievements.c.user_id)).select_from(user_achievements.join(Achievement)).filter(
-                and_(user_achievements.c.user_id == user_id, user_achievements.c.status == 'completed', Achievement.frequency == 'monthly', user_achievements.c.created_at >= month_start)).scalar() or 0
-            
-            total_points = db.query(func.sum(Achievement.point_value)).select_from(user_achievements.join(Achievement)).filter(
-                and_(user_achievements.c.user_id == user_id, user_achievements.c.status == 'completed')).scalar() or 0
-            
-            return {
-                "daily": {"completed": daily_completed, "total": 5, "assigned": daily_pending},
-                "weekly": {"completed": weekly_completed, "total": 3, "assigned": weekly_pending},
-                "monthly": {"completed": monthly_completed, "total": 2, "assigned": monthly_pending},
-                "total_points": int(total_points)
-            }
+            return ProgressReadModel.view(db, user_id)["progress"]
         except Exception as e:
             logger.error(f"Error getting user progress: {str(e)}")
-            return {
-                "daily": {"completed": 0, "total": 5, "assigned": 0},
-                "weekly": {"completed": 0, "total": 3, "assigned": 0},
-                "monthly": {"completed": 0, "total": 2, "assigned": 0},
-                "total_points": 0
-            }
+            return GoalCRUD._empty_progress()
+    
+    @staticmethod
+    def get_users_progress(db: Session, user_ids: List[int]) -> Dict[int, Dict]:
+        """Progress for many users at once, keyed by user id.
+
+        Pending and completed counts per frequency and the points total all come
+        from one grouped scan of user_achievements ⨝ achievements using CASE-based
+        conditional aggregation, issued once per timezone and PROGRESS_BATCH_SIZE
+        user ids. Completions count from the start of the current period in the
+        user's timezone. Unlike get_user_progress this never triggers lazy assignment.
+        """
+        now = datetime.utcnow()
+        progress = {user_id: GoalCRUD._empty_progress() for user_id in user_ids}
+        
+        for zone, zone_users in GoalCRUD._users_by_timezone(db, list(progress)).items():
+            columns = GoalCRUD._progress_columns(now, zone)
+            for start in range(0, len(zone_users), PROGRESS_BATCH_SIZE):
+                rows = db.execute(
+                    select(*columns).select_from(user_achievements.join(Achievement))
+                    .where(user_achievements.c.user_id.in_(zone_users[start:start + PROGRESS_BATCH_SIZE]))
+                    .group_by(user_achievements.c.user_id)
+                ).mappings().all()
+                for row in rows:
+                    entry = progress[row["user_id"]]
+                    for frequency in GOAL_TARGETS:
+                        entry[frequency]["completed"] = int(row[f"{frequency}_completed"] or 0)
+                        entry[frequency]["assigned"] = int(row[f"{frequency}_pending"] or 0)
+                    entry["total_points"] = int(row["total_points"] or 0)
+        
+        if GOAL_ASSIGNMENT_MODE == 'stateless':
+            catalog = GoalCRUD._derivation_catalog(db)
+            for user_id, entry in progress.items():
+                derived = GoalCRUD._derive_current_goals(db, user_id, now, catalog)
+                for frequency in GOAL_TARGETS:
+                    entry[frequency]["assigned"] = len(derived[frequency])
+        
+        return progress
+    
+    @staticmethod
+    def _progress_columns(now: datetime, tz: Optional[str]) -> List:
+        """Grouped-by-user aggregate columns behind get_users_progress for users in ``tz``."""
+        is_completed = user_achievements.c.status == 'completed'
+        live_pending = GoalCRUD._is_live_pending(now)
+        columns = [user_achievements.c.user_id]
+        for frequency in GOAL_TARGETS:
+            is_frequency = Achievement.frequency == frequency
+            period_start, _ = GoalCRUD._period_bounds(frequency, now, tz)
+            columns.append(func.sum(case((and_(is_frequency, live_pending), 1), else_=0)).label(f"{frequency}_pending"))
+            columns.append(func.sum(case(
+                (and_(is_frequency, is_completed, user_achievements.c.created_at >= period_start), 1),
+                else_=0
+            )).label(f"{frequency}_completed"))
+        columns.append(func.sum(case((is_completed, Achievement.point_value), else_=0)).label("total_points"))
+        return columns
+    
+    @staticmethod
+    def _empty_progress() -> Dict:
+        progress = {
+            frequency: {"completed": 0, "total": target, "assigned": 0} for frequency, target in GOAL_TARGETS.items()
+        }
+        progress["total_points"] = 0
+        return progress
     
     @staticmethod
     def complete_achievement(db: Session, user_id: int, achievement_id: int) -> Dict:
+        """Complete one of the user's current goals.
+
+        In every mode the completion is a single guarded write, so of two
+        concurrent requests for the same goal exactly one succeeds: stored and
+        lazy goals are pending rows completed by UPDATE ... RETURNING, and
+        stateless goals are written by a guarded UPDATE / INSERT ... ON CONFLICT.
+        The write runs through run_write, i.e. through the group-committing write
+        queue when WRITE_QUEUE_ENABLED; in-memory caches are updated after it commits.
+        WriteOutcomeUnknown is raised as is: the queued completion may still commit,
+        and then updates the caches itself.
+        """
         try:
-            goal_assignment = db.query(user_achievements).filter(and_(
-                user_achievements.c.user_id == user_id,
-                user_achievements.c.achievement_id == achievement_id,
-                user_achievements.c.status == 'pending'
-            )).first()
-            
-            if not goal_assignment:
-                raise Exception("Achievement not found or already completed")
-            
-            db.query(user_achievements).filter(and_(
-                user_achievements.c.user_id == user_id,
-                user_achievements.c.achievement_id == achievement_id,
-                user_achievements.c.status == 'pending'
-            )).update({'status': 'completed', 'created_at': datetime.utcnow()})
-            
-            achievement = db.query(Achievement).filter(Achievement.id == achievement_id).first()
-            if not achievement:
-                raise Exception("Achievement not found")
-            
-            db.commit()
-            
-            return {
-                "message": f"Achievement '{achievement.title}' completed!",
-                "points_earned": achievement.point_value,
-                "achievement_id": achievement_id,
-                "user_id": user_id,
-                "completed_at": datetime.utcnow().isoformat()
-            }
+            if GOAL_ASSIGNMENT_MODE == 'stateless':
+                operation = GoalCRUD._complete_derived_goal
+            else:
+                operation = GoalCRUD._complete_pending_goal
+            result, leaderboard_change = run_write(db, operation, user_id, achievement_id)
+            GoalCRUD._after_completion(user_id, leaderboard_change)
+            return result
+        except WriteOutcomeUnknown as e:
+            logger.warning(f"Completion of achievement {achievement_id} by user {user_id} timed out: {str(e)}")
+            GoalCRUD._after_late_completion(user_id, e.future)
+            raise
         except Exception as e:
             db.rollback()
             logger.error(f"Error completing achievement: {str(e)}")
             raise Exception(f"Failed to complete achievement: {str(e)}")
     
+    @staticmethod
+    def _after_completion(user_id: int, leaderboard_change: Optional[tuple]):
+        """Update the in-memory caches once a completion has committed."""
+        progress_cache.invalidate(user_id)
+        Leaderboard.apply_change(leaderboard_change)
+    
+    @staticmethod
+    def _after_late_completion(user_id: int, future):
+        """Update the caches when a completion whose caller timed out commits after all."""
+        def done(future):
+            if not future.cancelled() and future.exception() is None:
+                GoalCRUD._after_completion(user_id, future.result()[1])
+        future.add_done_callback(done)
+    
+    @staticmethod
+    def _complete_pending_goal(db: Session, user_id: int, achievement_id: int) -> tuple:
+        """Complete a live pending goal with a single UPDATE ... RETURNING (without committing).
+
+        The status check and the write are one statement, so of two concurrent
+        requests exactly one gets a row back; the achievement's metadata comes
+        back with it through correlated subqueries.
+        """
+        now = datetime.utcnow()
+        metadata = {
+            column: select(getattr(Achievement, column)).where(
+                Achievement.id == user_achievements.c.achievement_id
+            ).scalar_subquery().label(column)
+            for column in ('title', 'point_value', 'frequency')
+        }
+        achievement = db.execute(
+            user_achievements.update().where(and_(
+                user_achievements.c.user_id == user_id,
+                user_achievements.c.achievement_id == achievement_id,
+                GoalCRUD._is_live_pending(now)
+            )).values(status='completed', created_at=now).returning(
+                user_achievements.c.achievement_id.label('id'), *metadata.values()
+            )
+        ).first()
+        
+        if not achievement:
+            raise Exception("Achievement not found or already completed")
+        
+        return GoalCRUD._record_completion(db, user_id, achievement, now, GoalCRUD.get_user_timezone(db, user_id))
+    
+    @staticmethod
+    def _record_completion(db: Session, user_id: int, achievement, now: datetime, tz: str) -> tuple:
+        """Update the read model, leaderboard, streak and daily rollup for a completion written in this transaction.
+
+        Returns the API result and the leaderboard change to apply after commit.
+        """
+        ProgressReadModel.apply_completion(db, user_id, achievement, now)
+        leaderboard_change = Leaderboard.add_points(db, user_id, achievement.point_value)
+        StreakTracker.record_completion(db, user_id, now, tz)
+        ActivityHistory.record_completion(db, user_id, achievement.point_value, now, tz)
+        
+        return {
+            "message": f"Achievement '{achievement.title}' completed!",
+            "points_earned": achievement.point_value,
+            "achievement_id": achievement.id,
+            "user_id": user_id,
+            "completed_at": now.isoformat()
+        }, leaderboard_change
+    
     @staticmethod
     def get_user_current_goals(db: Session, user_id: int) -> Dict:
         try:
-            now = datetime.utcnow()
-            goals_query = db.query(
-                Achievement.id, Achievement.title, Achievement.description,
-                Achievement.point_value, Achievement.duration, Achievement.frequency,
-                user_achievements.c.due_date, user_achievements.c.created_at
-            ).select_from(user_achievements.join(Achievement)).filter(
-                and_(
-                    user_achievements.c.user_id == user_id,
-                    user_achievements.c.status == 'pending',
-                    user_achievements.c.due_date > now
-                )
-            ).order_by(Achievement.frequency, user_achievements.c.created_at)
-            
-            goals = goals_query.all()
-            
-            daily_goals = []
-            weekly_goals = []
-            monthly_goals = []
+            return ProgressReadModel.view(db, user_id)["current_goals"]
+        except Exception as e:
+            logger.error(f"Error getting user goals: {str(e)}")
+            return {"daily": [], "weekly": [], "monthly": []}
+    
+    @staticmethod
+    def _current_goals_for_users(db: Session, user_ids: List[int], now: datetime) -> Dict[int, Dict]:
+        """Live pending goals of many users, grouped per user and frequency, from one query per batch."""
+        goals = {user_id: {frequency: [] for frequency in GOAL_TARGETS} for user_id in user_ids}
+        if GOAL_ASSIGNMENT_MODE == 'stateless':
+            catalog = GoalCRUD._derivation_catalog(db)
+            for user_id in goals:
+                goals[user_id] = GoalCRUD._derive_current_goals(db, user_id, now, catalog)
+            return goals
+        
+        unique_ids = list(goals)
+        for start in range(0, len(unique_ids), PROGRESS_BATCH_SIZE):
+            rows = db.execute(
+                GoalCRUD._current_goals_query(unique_ids[start:start + PROGRESS_BATCH_SIZE], now)
+            ).all()
             
-            for goal in goals:
-                goal_data = {
+            for goal in rows:
+                if goal.frequency not in GOAL_TARGETS:
+                    continue
+                goals[goal.user_id][goal.frequency].append({
                     "id": goal.id, "title": goal.title, "description": goal.description,
                     "points": goal.point_value, "duration": goal.duration, "category": goal.frequency,
                     "due_date": goal.due_date.isoformat() if goal.due_date else None,
                     "assigned_at": goal.created_at.isoformat() if goal.created_at else None
-                }
-                
-                if goal.frequency == 'daily':
-                    daily_goals.append(goal_data)
-                elif goal.frequency == 'weekly':
-                    weekly_goals.append(goal_data)
-                elif goal.frequency == 'monthly':
-                    monthly_goals.append(goal_data)
-            
-            return {
-                "daily": daily_goals,
-                "weekly": weekly_goals,
-                "monthly": monthly_goals
+                })
+        return goals
+    
+    @staticmethod
+    def _current_goals_query(user_ids: List[int], now: datetime):
+        """The live-pending-goals query behind _current_goals_for_users for one batch of users."""
+        return select(
+            user_achievements.c.user_id, Achievement.id, Achievement.title, Achievement.description,
+            Achievement.point_value, Achievement.duration, Achievement.frequency,
+            user_achievements.c.due_date, user_achievements.c.created_at
+        ).select_from(user_achievements.join(Achievement)).where(and_(
+            user_achievements.c.user_id.in_(user_ids),
+            GoalCRUD._is_live_pending(now)
+        )).order_by(user_achievements.c.user_id, Achievement.frequency, user_achievements.c.created_at)
+    
+    @staticmethod
+    def _derivation_catalog(db: Session) -> List:
+        """The goal catalog _derive_current_goals picks from; load it once when deriving for many users."""
+        return db.query(
+            Achievement.id, Achievement.title, Achievement.description,
+            Achievement.point_value, Achievement.duration, Achievement.frequency, Achievement.selection_weight
+        ).filter(Achievement.frequency.in_(list(GOAL_TARGETS))).order_by(Achievement.id).all()
+    
+    @staticmethod
+    def _derive_current_goals(db: Session, user_id: int, now: datetime, catalog: Optional[List] = None) -> Dict:
+        """Compute a user's pending goals from (user, frequency, period, catalog) instead of stored rows.
+
+        Achievements completed in an earlier period stay out of the candidate set;
+        the ones completed in the current period are chosen but no longer pending.
+        """
+        if catalog is None:
+            catalog = GoalCRUD._derivation_catalog(db)
+        
+        completions = dict(db.query(user_achievements.c.achievement_id, user_achievements.c.created_at).filter(
+            and_(user_achievements.c.user_id == user_id, user_achievements.c.status == 'completed')
+        ).all())
+        
+        goals = {frequency: [] for frequency in GOAL_TARGETS}
+        tz = GoalCRUD.get_user_timezone(db, user_id)
+        
+        for frequency, target_count in GOAL_TARGETS.items():
+            items = [row for row in catalog if row.frequency == frequency]
+            start, end = GoalCRUD._period_bounds(frequency, now, tz)
+            candidates = {
+                row.id: row for row in items
+                if row.id not in completions or (completions[row.id] is not None and completions[row.id] >= start)
             }
-        except Exception as e:
-            logger.error(f"Error getting user goals: {str(e)}")
-            return {"daily": [], "weekly": [], "monthly": []}
+            chosen = derive_goal_ids(
+                user_id, frequency, GoalCRUD._period_key(frequency, now, tz),
+                catalog_version([row.id for row in items]), list(candidates), target_count,
+                {row.id: row.selection_weight for row in items}
+            )
+            
+            for achievement_id in chosen:
+                if achievement_id in completions:
+                    continue
+                goal = candidates[achievement_id]
+                goals[frequency].append({
+                    "id": goal.id, "title": goal.title, "description": goal.description,
+                    "points": goal.point_value, "duration": goal.duration, "category": goal.frequency,
+                    "due_date": end.isoformat(),
+                    "assigned_at": start.isoformat()
+                })
+        
+        return goals
     
     @staticmethod
-    def cleanup_expired_goals(db: Session) -> int:
-        try:
+    def _complete_derived_goal(db: Session, user_id: int, achievement_id: int) -> tuple:
+        """Stateless-mode completion: check the goal is currently derived for the user, then write only the completion."""
+        achievement = db.query(Achievement).filter(Achievement.id == achievement_id).first()
+        if not achievement:
+            raise Exception("Achievement not found")
+        
+        now = datetime.utcnow()
+        current = GoalCRUD._derive_current_goals(db, user_id, now).get(achievement.frequency, [])
+        if achievement_id not in {goal["id"] for goal in current}:
+            raise Exception("Achievement not found or already completed")
+        
+        tz = GoalCRUD.get_user_timezone(db, user_id)
+        _, due_date = GoalCRUD._period_bounds(achievement.frequency, now, tz)
+        completion = {'status': 'completed', 'created_at': now, 'due_date': due_date}
+        
+        # The derivation above is only a pre-check; the write itself is guarded, so of two
+        # concurrent completions exactly one changes a row. A leftover pending/expired row
+        # from stored mode holds the same key and is reused, otherwise a new row is inserted.
+        changed = db.execute(user_achievements.update().where(and_(
+            user_achievements.c.user_id == user_id,
+            user_achievements.c.achievement_id == achievement_id,
+            user_achievements.c.status != 'completed'
+        )).values(**completion)).rowcount
+        if not changed:
+            changed = db.execute(
+                GoalCRUD._insert_ignoring_conflicts(db, user_achievements)
+                .values(user_id=user_id, achievement_id=achievement_id, **completion)
+                .on_conflict_do_nothing(index_elements=['user_id', 'achievement_id'])
+            ).rowcount
+        if changed != 1:
+            raise Exception("Achievement not found or already completed")
+        
+        return GoalCRUD._record_completion(db, user_id, achievement, now, tz)
+    
+    @staticmethod
+    def _insert_ignoring_conflicts(db: Session, table):
+        """Dialect INSERT construct that supports ``on_conflict_do_nothing``."""
+        if db.get_bind().dialect.name == 'postgresql':
+            return postgresql_insert(table)
+        return sqlite_insert(table)
+    
+    @staticmethod
+    def sweep_expired_goals(db: Session, batch_size: Optional[int] = None, max_batches: Optional[int] = None,
+                            pause_seconds: Optional[float] = None) -> int:
+        """Rewrite past-due pending rows to 'expired' in small batches.
+
+        Readers already treat those rows as expired, so this only keeps the table
+        tidy. Each batch picks at most ``batch_size`` keys through the
+        (status, due_date) index, updates them in its own short transaction and
+        sleeps ``pause_seconds`` before the next, so assignment and completions
+        never wait long for the write lock. A run stops after ``max_batches``;
+        the rest is left for the next run. Progress goes to EXPIRY_SWEEP_PROGRESS.
+        """
+        batch_size = max(batch_size or GOAL_EXPIRY_SWEEP_BATCH_SIZE, 1)
+        max_batches = max_batches if max_batches is not None else GOAL_EXPIRY_SWEEP_MAX_BATCHES
+        pause_seconds = GOAL_EXPIRY_SWEEP_PAUSE_SECONDS if pause_seconds is None else pause_seconds
+        
+        EXPIRY_SWEEP_PROGRESS["runs"] += 1
+        EXPIRY_SWEEP_PROGRESS["last_run_started_at"] = datetime.utcnow().isoformat()
+        EXPIRY_SWEEP_PROGRESS["last_run_expired"] = 0
+        EXPIRY_SWEEP_PROGRESS["last_run_batches"] = 0
+        
+        expired_count = 0
+        batches = 0
+        backlog = False
+        while True:
+            if 0 < max_batches <= batches:
+                backlog = True
+                break
             now = datetime.utcnow()
-            updated_count = db.query(user_achievements).filter(
-                and_(user_achievements.c.status == 'pending', user_achievements.c.due_date < now)
-            ).update({'status': 'expired'}, synchronize_session=False)
+            keys = db.execute(
+                select(user_achievements.c.user_id, user_achievements.c.achievement_id).where(and_(
+                    user_achievements.c.status == 'pending',
+                    user_achievements.c.due_date <= now
+                )).order_by(user_achievements.c.due_date).limit(batch_size)
+            ).all()
+            if not keys:
+                break
             
-            db.commit()
+            try:
+                updated = db.execute(
+                    user_achievements.update().where(and_(
+                        tuple_(user_achievements.c.user_id, user_achievements.c.achievement_id).in_(
+                            [tuple(key) for key in keys]),
+                        user_achievements.c.status == 'pending',
+                        user_achievements.c.due_date <= now
+                    )).values(status='expired')
+                ).rowcount
+                db.commit()
+                # Snapshots are left alone: a snapshot is valid until the next local midnight,
+                # which is never after its goals' due dates, so it can't list a row swept here.
+                progress_cache.invalidate_many({key[0] for key in keys})
+            except Exception:
+                db.rollback()
+                raise
+            
+            batches += 1
+            expired_count += updated
+            EXPIRY_SWEEP_PROGRESS["expired_total"] += updated
+            EXPIRY_SWEEP_PROGRESS["last_run_expired"] = expired_count
+            EXPIRY_SWEEP_PROGRESS["last_run_batches"] = batches
+            
+            if len(keys) < batch_size:
+                break
+            if pause_seconds > 0:
+                time.sleep(pause_seconds)
+        
+        EXPIRY_SWEEP_PROGRESS["backlog_remaining"] = backlog
+        EXPIRY_SWEEP_PROGRESS["last_run_finished_at"] = datetime.utcnow().isoformat()
+        if expired_count:
+            logger.info(f"Expiry sweep marked {expired_count} goals as expired in {batches} batches")
+        return expired_count
+    
+    @staticmethod
+    def prune_goal_bookkeeping(db: Session) -> None:
+        """Drop lazy-assignment claims and selection history that no longer affect assignment."""
+        now = datetime.utcnow()
+        db.query(GoalAssignmentClaim).filter(
+            GoalAssignmentClaim.created_at < now - timedelta(days=62)
+        ).delete(synchronize_session=False)
+        
+        for frequency in GOAL_TARGETS:
+            # One extra period of slack covers timezones ahead of or behind UTC.
+            keys = GoalCRUD._previous_period_keys(frequency, now, GOAL_NO_REPEAT_PERIODS + 1)
+            if keys:
+                db.query(GoalSelectionHistory).filter(and_(
+                    GoalSelectionHistory.frequency == frequency,
+                    GoalSelectionHistory.period_key < keys[-1]
+                )).delete(synchronize_session=False)
+        
+        db.commit()
+    
+    @staticmethod
+    def cleanup_expired_goals(db: Session) -> int:
+        """Sweep every past-due pending row (in batches, without throttling) and prune bookkeeping tables."""
+        try:
+            updated_count = GoalCRUD.sweep_expired_goals(db, max_batches=0, pause_seconds=0)
+            GoalCRUD.prune_goal_bookkeeping(db)
             logger.info(f"Marked {updated_count} goals as expired")
             return updated_count
         except Exception as e:
@@ -264,23 +1165,41 @@ class GoalCRUD:
     @staticmethod
     def get_recent_completed_achievements(db: Session, user_id: int, limit: int = 10) -> List[Dict]:
         try:
-            recent_query = db.query(
-                Achievement.id, Achievement.title, Achievement.point_value,
-                user_achievements.c.created_at.label('completed_at')
-            ).select_from(user_achievements.join(Achievement)).filter(
-                and_(user_achievements.c.user_id == user_id, user_achievements.c.status == 'completed')
-            ).order_by(user_achievements.c.created_at.desc()).limit(limit)
-            
-            recent = recent_query.all()
-            
-            achievements = []
-            for row in recent:
-                achievements.append({
+            if limit <= RECENT_LIMIT:
+                return ProgressReadModel.view(db, user_id)["recent"][:limit]
+            return GoalCRUD._recent_completions_for_users(db, [user_id], limit).get(user_id, [])
+        except Exception as e:
+            logger.error(f"Error getting recent achievements: {str(e)}")
+            return []
+    
+    @staticmethod
+    def _recent_completions_for_users(db: Session, user_ids: List[int], limit: int) -> Dict[int, List[Dict]]:
+        """Each user's ``limit`` latest completions, newest first, via ROW_NUMBER() per user."""
+        recent = {}
+        unique_ids = list(dict.fromkeys(user_ids))
+        for start in range(0, len(unique_ids), PROGRESS_BATCH_SIZE):
+            rows = db.execute(
+                GoalCRUD._recent_completions_query(unique_ids[start:start + PROGRESS_BATCH_SIZE], limit)
+            ).all()
+            for row in rows:
+                recent.setdefault(row.user_id, []).append({
                     "id": row.id, "title": row.title, "points": row.point_value,
                     "completed_at": row.completed_at.isoformat() if row.completed_at else None
                 })
-            
-            return achievements
-        except Exception as e:
-            logger.error(f"Error getting recent achievements: {str(e)}")
-            return []
\ No newline at end of file
+        return recent
+    
+    @staticmethod
+    def _recent_completions_query(user_ids: List[int], limit: int):
+        """The ROW_NUMBER() query behind _recent_completions_for_users for one batch of users."""
+        ranked = select(
+            user_achievements.c.user_id, Achievement.id, Achievement.title, Achievement.point_value,
+            user_achievements.c.created_at.label('completed_at'),
+            func.row_number().over(
+                partition_by=user_achievements.c.user_id,
+                order_by=user_achievements.c.created_at.desc()
+            ).label('position')
+        ).select_from(user_achievements.join(Achievement)).where(and_(
+            user_achievements.c.user_id.in_(user_ids),
+            user_achievements.c.status == 'completed'
+        )).subquery()
+        return select(ranked).where(ranked.c.position <= limit).order_by(ranked.c.user_id, ranked.c.position)
@@ -0,0 +1,36 @@
+import hashlib
+import math
+from typing import Dict, List, Optional, Sequence
+
+def catalog_version(achievement_ids: Sequence[int]) -> str:
+    """Short fingerprint of a frequency's catalog; changes whenever an item is added or removed."""
+    payload = ",".join(str(aid) for aid in sorted(achievement_ids))
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+def _goal_rank(user_id: int, frequency: str, period_key: str, version: str, achievement_id: int) -> bytes:
+    return hashlib.sha256(f"{user_id}:{frequency}:{period_key}:{version}:{achievement_id}".encode()).digest()
+
+def _weighted_rank(rank: bytes, weight: float) -> float:
+    # Turn the hash into a uniform draw and then an exponential key; with equal
+    # weights the order is the same as sorting by the raw hash.
+    uniform = int.from_bytes(rank[:8], "big") / 2 ** 64
+    return -math.log1p(-uniform) / weight if weight > 0 else math.inf
+
+def derive_goal_ids(user_id: int, frequency: str, period_key: str, version: str,
+                    candidate_ids: Sequence[int], k: int, weights: Optional[Dict[int, float]] = None) -> List[int]:
+    """Deterministically pick ``k`` achievement ids for a user and period.
+
+    Every candidate gets a stable hash rank, so removing one candidate never
+    reshuffles the others and the same inputs always give the same goals.
+    ``weights`` (by achievement id, default 1) bias the pick like the stored-mode
+    sampler, and as there an item of weight 0 is never picked, even when that
+    leaves fewer than ``k`` goals.
+    """
+    if weights is None:
+        ranked = sorted(candidate_ids, key=lambda aid: _goal_rank(user_id, frequency, period_key, version, aid))
+    else:
+        candidate_ids = [aid for aid in candidate_ids if weights.get(aid, 1.0) > 0]
+        ranked = sorted(candidate_ids, key=lambda aid: _weighted_rank(
+            _goal_rank(user_id, frequency, period_key, version, aid), weights.get(aid, 1.0)
+        ))
+    return ranked[:k]
\ No newline at end of file
@@ -0,0 +1,49 @@
+import numpy as np
+from typing import List, Sequence
+
+def pack_goal_bits(matrix: np.ndarray) -> List[bytes]:
+    """Encode each row of a (users x k) achievement-id matrix as a bitset indexed by achievement id.
+
+    Slots set to -1 are skipped, so a user with no picks gets an empty bitset.
+    """
+    picks = matrix[matrix >= 0]
+    width = int(picks.max()) + 1 if len(picks) else 0
+    bits = np.zeros((matrix.shape[0], width), dtype=bool)
+    rows, cols = np.nonzero(matrix >= 0)
+    bits[rows, matrix[rows, cols]] = True
+    packed = np.packbits(bits, axis=1, bitorder='little')
+    return [row.tobytes() for row in packed]
+
+def merge_goal_bits(first: bytes, second: bytes) -> bytes:
+    """OR two bitsets of possibly different widths."""
+    if len(first) < len(second):
+        first, second = second, first
+    merged = np.frombuffer(first, dtype=np.uint8).copy()
+    merged[:len(second)] |= np.frombuffer(second, dtype=np.uint8)
+    return merged.tobytes()
+
+def recent_goal_matrix(user_ids: np.ndarray, catalog_ids: np.ndarray,
+                       history_user_ids: Sequence[int], history_bits: Sequence[bytes]) -> np.ndarray:
+    """Boolean (users x catalog) mask of the achievements set in any of a user's stored bitsets.
+
+    ``user_ids`` must be sorted; bitsets of other users are ignored. Several
+    bitsets for one user (one per recent period) are OR-ed together.
+    """
+    mask = np.zeros((len(user_ids), len(catalog_ids)), dtype=bool)
+    if len(history_user_ids) == 0 or len(catalog_ids) == 0:
+        return mask
+
+    width = (int(catalog_ids.max()) >> 3) + 1
+    buffer = np.zeros((len(history_bits), width), dtype=np.uint8)
+    for index, bits in enumerate(history_bits):
+        row = np.frombuffer(bits, dtype=np.uint8)[:width]
+        buffer[index, :len(row)] = row
+
+    history_user_ids = np.asarray(history_user_ids, dtype=np.int64)
+    rows = np.searchsorted(user_ids, history_user_ids)
+    rows_clipped = np.minimum(rows, len(user_ids) - 1)
+    valid = user_ids[rows_clipped] == history_user_ids
+
+    packed = np.zeros((len(user_ids), width), dtype=np.uint8)
+    np.bitwise_or.at(packed, rows[valid], buffer[valid])
+    return np.unpackbits(packed, axis=1, bitorder='little').astype(bool)[:, catalog_ids]
@@ -225,120 +225,9 @@ class GoalManager:
     
     @staticmethod
     def get_user_progress(db: Session, user_id: int) -> Dict:
-        """Get user's current goal progress"""
-        try:
-            # Daily progress
-            daily_total = db.execute(
-                text("""
-                    SELECT COUNT(*) FROM user_achievements ua
-                    JOIN achievements a ON ua.achievement_id = a.id
-                    WHERE ua.user_id = :user_id 
-                    AND a.frequency = 'daily' 
-                    AND ua.status = 'pending'
-                    AND ua.due_date > :now
-                """),
-                {"user_id": user_id, "now": datetime.utcnow()}
-            ).scalar() or 0
-            
-            daily_completed = db.execute(
-                text("""
-                    SELECT COUNT(*) FROM user_achievements ua
-                    JOIN achievements a ON ua.achievement_id = a.id
-                    WHERE ua.user_id = :user_id 
-                    AND a.frequency = 'daily' 
-                    AND ua.status = 'completed'
-                    AND DATE(ua.created_at) = DATE(:today)
-                """),
-                {"user_id": user_id, "today": datetime.utcnow()}
-            ).scalar() or 0
-            
-            # Weekly progress
-            weekly_total = db.execute(
-                text("""
-                    SELECT COUNT(*) FROM user_achievements ua
-                    JOIN achievements a ON ua.achievement_id = a.id
-                    WHERE ua.user_id = :user_id 
-                    AND a.frequency = 'weekly' 
-                    AND ua.status = 'pending'
-                    AND ua.due_date > :now
-                """),
-                {"user_id": user_id, "now": datetime.utcnow()}
-            ).scalar() or 0
-            
-            weekly_completed = db.execute(
-                text("""
-                    SELECT COUNT(*) FROM user_achievements ua
-                    JOIN achievements a ON ua.achievement_id = a.id
-                    WHERE ua.user_id = :user_id 
-                    AND a.frequency = 'weekly' 
-                    AND ua.status = 'completed'
-                    AND ua.created_at >= :week_start
-                """),
-                {"user_id": user_id, "week_start": datetime.utcnow() - timedelta(days=7)}
-            ).scalar() or 0
-            
-            # Monthly progress
-            monthly_total = db.execute(
-                text("""
-                    SELECT COUNT(*) FROM user_achievements ua
-                    JOIN achievements a ON ua.achievement_id = a.id
-                    WHERE ua.user_id = :user_id 
-                    AND a.frequency = 'monthly' 
-                    AND ua.status = 'pending'
-                    AND ua.due_date > :now
-                """),
-                {"user_id": user_id, "now": datetime.utcnow()}
-            ).scalar() or 0
-            
-            monthly_completed = db.execute(
-                text("""
-                    SELECT COUNT(*) FROM user_achievements ua
-                    JOIN achievements a ON ua.achievement_id = a.id
-                    WHERE ua.user_id = :user_id 
-                    AND a.frequency = 'monthly' 
-                    AND ua.status = 'completed'
-                    AND ua.created_at >= :month_start
-                """),
-                {"user_id": user_id, "month_start": datetime.utcnow() - timedelta(days=30)}
-            ).scalar() or 0
-            
-            # Total points
-            total_points = db.execute(
-                text("""
-                    SELECT COALESCE(SUM(a.point_value), 0) FROM user_achievements ua
-                    JOIN achievements a ON ua.achievement_id = a.id
-                    WHERE ua.user_id = :user_id AND ua.status = 'completed'
-                """),
-                {"user_id": user_id}
-            ).scalar() or 0
-            
-            return {
-                "daily": {
-                    "completed": daily_completed,
-                    "total": 5,  # Always 5 daily goals
-                    "assigned": daily_total
-                },
-                "weekly": {
-                    "completed": weekly_completed,
-                    "total": 3,  # Always 3 weekly goals
-                    "assigned": weekly_total
-                },
-                "monthly": {
-                    "completed": monthly_completed,
-                    "total": 2,  # Always 2 monthly goals
-                    "assigned": monthly_total
-                },
-                "total_points": total_points
-            }
-            
-        except Exception as e:
-            logger.error(f"Error getting user progress: {str(e)}")
-            return {
-                "daily": {"completed": 0, "total": 5, "assigned": 0},
-                "weekly": {"completed": 0, "total": 3, "assigned": 0},
-                "monthly": {"completed": 0, "total": 2, "assigned": 0},
-                "total_points": 0
-            }
+        """Get user's current goal progress (single-scan query shared with GoalCRUD)"""
+        from app.services.goal_crud import GoalCRUD
+        return GoalCRUD.get_user_progress(db, user_id)
     
     @staticmethod
     def complete_achievement(db: Session, user_id: int, achievement_id: int) -> Dict:
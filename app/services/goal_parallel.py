@@ -0,0 +1,104 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.config import GOAL_ASSIGNMENT_SHARD_BY
+from app.core.database import create_db_engine
+from app.models.users import User
+from app.services.progress_cache import progress_cache
+from typing import List, Dict, Optional
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+def plan_shards(db: Session, workers: int, shard_by: str = GOAL_ASSIGNMENT_SHARD_BY,
+                base_scope: Optional[str] = None) -> List[str]:
+    """Split active users into at most ``workers`` checkpoint scopes of roughly equal size.
+
+    With ``base_scope`` (e.g. a timezone wave) only users inside it are split, and
+    every shard scope keeps it as a prefix.
+    """
+    from app.services.goal_crud import GoalCRUD
+
+    base_criteria = GoalCRUD._scope_criteria(base_scope)
+    prefix = f"{base_scope};" if base_scope else ""
+
+    if shard_by == 'range':
+        user_ids = db.execute(
+            select(User.id).where(User.is_active == True, *base_criteria).order_by(User.id)
+        ).scalars().all()
+        if not user_ids:
+            return []
+        size = -(-len(user_ids) // workers)
+        return [
+            f"{prefix}range:{user_ids[start]}-{user_ids[min(start + size, len(user_ids)) - 1]}"
+            for start in range(0, len(user_ids), size)
+        ]
+
+    if shard_by != 'customer':
+        raise ValueError(f"Unknown shard strategy: {shard_by}")
+
+    counts = db.execute(
+        select(User.customer_id, func.count(User.id))
+        .where(User.is_active == True, *base_criteria)
+        .group_by(User.customer_id)
+    ).all()
+
+    # Largest tenants first, each into the currently lightest shard.
+    buckets = [{"size": 0, "customers": []} for _ in range(min(workers, len(counts)))]
+    for customer_id, count in sorted(counts, key=lambda row: row[1], reverse=True):
+        bucket = min(buckets, key=lambda b: b["size"])
+        bucket["size"] += count
+        bucket["customers"].append("none" if customer_id is None else str(customer_id))
+
+    return [prefix + "customer:" + ",".join(bucket["customers"]) for bucket in buckets]
+
+def _run_shard(targets: Dict[str, int], job_id: str, scope: str, incremental: bool = False) -> Dict:
+    """Worker entry point: assigns one shard using its own engine and session."""
+    import app.models.customer  # noqa: F401  (registers Customer for the User mapper in spawned workers)
+    from app.services.goal_crud import GoalCRUD
+
+    engine = create_db_engine(pool_size=1, max_overflow=0)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = SessionLocal()
+    try:
+        return GoalCRUD._assign_goals_in_chunks(db, targets, job_id, scope, incremental)
+    finally:
+        db.close()
+        engine.dispose()
+
+def assign_goals_parallel(db: Session, targets: Dict[str, int], job_id: Optional[str], workers: int,
+                          incremental: bool = False, base_scope: Optional[str] = None) -> Dict:
+    """Fan goal assignment out to a process pool and merge the per-shard reports.
+
+    Shards are re-planned on every run, so a rerun of ``job_id`` may give shard N
+    another user range; its checkpoint then restarts instead of resuming.
+    """
+    job_id = job_id or f"manual-{uuid.uuid4().hex[:12]}"
+    scopes = plan_shards(db, workers, base_scope=base_scope)
+    db.commit()
+
+    results = {"assigned_to_users": 0, "total_goals_assigned": 0, "errors": [], "job_id": job_id, "shards": len(scopes)}
+    if not scopes:
+        return results
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(scopes))) as pool:
+        futures = {
+            pool.submit(_run_shard, targets, f"{job_id}:shard-{index}", scope, incremental): scope
+            for index, scope in enumerate(scopes)
+        }
+        for future in as_completed(futures):
+            try:
+                shard = future.result()
+            except Exception as e:
+                error_msg = f"Shard {futures[future]} failed for {'+'.join(targets)} goals: {str(e)}"
+                results["errors"].append(error_msg)
+                logger.error(error_msg)
+                continue
+            results["assigned_to_users"] += shard.get("assigned_to_users", 0)
+            results["total_goals_assigned"] += shard.get("total_goals_assigned", 0)
+            results["errors"].extend(shard.get("errors", []))
+
+    # The shards invalidated the caches of their own worker processes, not this one's.
+    progress_cache.clear()
+    return results
\ No newline at end of file
@@ -0,0 +1,75 @@
+import numpy as np
+import hashlib
+from typing import Optional
+
+def period_seed(base_seed: Optional[int], frequency: str, period_key: str, first_user_id: int = 0) -> Optional[int]:
+    """Derive a reproducible sampler seed for one batch of a period, or None when seeding is off."""
+    if base_seed is None:
+        return None
+    digest = hashlib.sha256(f"{base_seed}:{frequency}:{period_key}:{first_user_id}".encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+def exclusion_matrix(user_ids: np.ndarray, catalog_ids: np.ndarray,
+                     pair_user_ids: np.ndarray, pair_achievement_ids: np.ndarray) -> np.ndarray:
+    """Boolean (users x catalog) mask with True for every (user, achievement) pair given.
+
+    Both ``user_ids`` and ``catalog_ids`` must be sorted; pairs outside them are ignored.
+    """
+    mask = np.zeros((len(user_ids), len(catalog_ids)), dtype=bool)
+    if len(pair_user_ids) == 0:
+        return mask
+    rows = np.searchsorted(user_ids, pair_user_ids)
+    cols = np.searchsorted(catalog_ids, pair_achievement_ids)
+    rows_clipped = np.minimum(rows, len(user_ids) - 1)
+    cols_clipped = np.minimum(cols, len(catalog_ids) - 1)
+    valid = (user_ids[rows_clipped] == pair_user_ids) & (catalog_ids[cols_clipped] == pair_achievement_ids)
+    mask[rows[valid], cols[valid]] = True
+    return mask
+
+# Added to the sort key of avoided items: they lose to every other item but still
+# beat excluded ones, so they only fill slots nothing else can.
+AVOIDED_KEY_OFFSET = 1e12
+
+def sample_goal_matrix(catalog_ids: np.ndarray, num_users: int, k: int,
+                       seed: Optional[int] = None, excluded: Optional[np.ndarray] = None,
+                       weights: Optional[np.ndarray] = None, avoided: Optional[np.ndarray] = None,
+                       limits: Optional[np.ndarray] = None) -> np.ndarray:
+    """Pick ``k`` distinct achievements per user from ``catalog_ids`` in one vectorized step.
+
+    ``weights`` (one per catalog item) make the draw a weighted sample without
+    replacement (exponential keys, Efraimidis-Spirakis); weight 0 never gets picked.
+    ``avoided`` items are used only when a user has too few other candidates.
+    ``limits`` (one per user) caps how many of the ``k`` slots a user gets, for
+    topping up users that already hold some of their goals.
+
+    Returns a (num_users, k) int64 matrix of achievement ids. Slots a user can't
+    fill because too many items are excluded are set to -1.
+    """
+    k = min(k, len(catalog_ids))
+    if k == 0 or num_users == 0:
+        return np.full((num_users, k), -1, dtype=np.int64)
+
+    rng = np.random.default_rng(seed)
+    keys = rng.random((num_users, len(catalog_ids)))
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            keys = -np.log1p(-keys) / weights
+        keys[:, weights <= 0] = np.inf
+    if avoided is not None:
+        keys[avoided] += AVOIDED_KEY_OFFSET
+    if excluded is not None:
+        keys[excluded] = np.inf
+
+    picks = np.argpartition(keys, k - 1, axis=1)[:, :k]
+    pick_keys = np.take_along_axis(keys, picks, axis=1)
+    if limits is not None:
+        # Best keys first, so the first limits[row] slots are that user's smaller sample.
+        order = np.argsort(pick_keys, axis=1)
+        picks = np.take_along_axis(picks, order, axis=1)
+        pick_keys = np.take_along_axis(pick_keys, order, axis=1)
+    matrix = np.asarray(catalog_ids, dtype=np.int64)[picks]
+    matrix[np.isinf(pick_keys)] = -1
+    if limits is not None:
+        matrix[np.arange(k) >= np.asarray(limits, dtype=np.int64)[:, None]] = -1
+    return matrix
\ No newline at end of file
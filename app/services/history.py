@@ -0,0 +1,136 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, select
+from app.models.achievements import Achievement, user_achievements
+from app.models.customer import Customer
+from app.models.history import UserDailyActivity
+from app.models.users import User
+from datetime import datetime, date
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+HISTORY_PAGE_SIZE = 31
+HISTORY_MAX_PAGE_SIZE = 366
+BACKFILL_BATCH_SIZE = 1000
+
+class ActivityHistory:
+    """Daily completion history served from the user_daily_activity rollup.
+
+    Each completion bumps one (user, local day) row, so reading a range touches
+    one row per active day instead of grouping raw user_achievements rows.
+    """
+    
+    @staticmethod
+    def _local_day(completed_at: datetime, tz: Optional[str]) -> date:
+        from app.services.goal_crud import GoalCRUD
+        return GoalCRUD._to_local(completed_at, tz).date()
+    
+    @staticmethod
+    def record_completion(db: Session, user_id: int, points: int, completed_at: datetime, tz: Optional[str] = None):
+        """Add one completion to the user's rollup row for that local day. The caller commits."""
+        if tz is None:
+            from app.services.goal_crud import GoalCRUD
+            tz = GoalCRUD.get_user_timezone(db, user_id)
+        day = ActivityHistory._local_day(completed_at, tz)
+        
+        updated = db.query(UserDailyActivity).filter(and_(
+            UserDailyActivity.user_id == user_id,
+            UserDailyActivity.day == day
+        )).update({
+            'completed_count': UserDailyActivity.completed_count + 1,
+            'points_earned': UserDailyActivity.points_earned + points,
+            'updated_at': datetime.utcnow()
+        }, synchronize_session=False)
+        if not updated:
+            db.execute(UserDailyActivity.__table__.insert().values(
+                user_id=user_id, day=day, completed_count=1, points_earned=points, updated_at=datetime.utcnow()
+            ))
+    
+    @staticmethod
+    def get_history(db: Session, user_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                    limit: int = HISTORY_PAGE_SIZE, cursor: Optional[str] = None) -> Dict:
+        """Days with completions, newest first, one page at a time.
+
+        ``cursor`` is the ``next_cursor`` of the previous page: the page resumes
+        at the day before it.
+        """
+        limit = min(max(limit, 1), HISTORY_MAX_PAGE_SIZE)
+        criteria = [UserDailyActivity.user_id == user_id]
+        if start_date:
+            criteria.append(UserDailyActivity.day >= start_date)
+        if end_date:
+            criteria.append(UserDailyActivity.day <= end_date)
+        if cursor:
+            try:
+                criteria.append(UserDailyActivity.day < date.fromisoformat(cursor))
+            except ValueError:
+                raise ValueError(f"Invalid history cursor: {cursor}")
+        
+        rows = db.query(
+            UserDailyActivity.day, UserDailyActivity.completed_count, UserDailyActivity.points_earned
+        ).filter(*criteria).order_by(UserDailyActivity.day.desc()).limit(limit + 1).all()
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            "history": [
+                {"date": row.day.isoformat(), "completed_count": row.completed_count, "points_earned": row.points_earned}
+                for row in rows
+            ],
+            "next_cursor": rows[-1].day.isoformat() if has_more else None,
+            "has_more": has_more
+        }
+    
+    @staticmethod
+    def backfill(db: Session) -> int:
+        """Rebuild the rollup from completed user_achievements in one streaming pass.
+
+        Completions arrive ordered by (user, completion time), so consecutive rows
+        of the same local day fold into one rollup row as they stream by.
+        """
+        completions = db.execute(
+            select(user_achievements.c.user_id, user_achievements.c.created_at, Achievement.point_value,
+                   func.coalesce(Customer.timezone, 'UTC'))
+            .select_from(user_achievements.join(Achievement)
+                         .join(User, User.id == user_achievements.c.user_id)
+                         .outerjoin(Customer, User.customer_id == Customer.id))
+            .where(and_(user_achievements.c.status == 'completed', user_achievements.c.created_at.isnot(None)))
+            .order_by(user_achievements.c.user_id, user_achievements.c.created_at)
+            .execution_options(yield_per=BACKFILL_BATCH_SIZE)
+        )
+        
+        now = datetime.utcnow()
+        rows = []
+        current = None
+        for user_id, completed_at, points, tz in completions:
+            day = ActivityHistory._local_day(completed_at, tz)
+            if current is None or current['user_id'] != user_id or current['day'] != day:
+                current = {'user_id': user_id, 'day': day, 'completed_count': 0, 'points_earned': 0, 'updated_at': now}
+                rows.append(current)
+            current['completed_count'] += 1
+            current['points_earned'] += points or 0
+        
+        try:
+            db.query(UserDailyActivity).delete(synchronize_session=False)
+            for start in range(0, len(rows), BACKFILL_BATCH_SIZE):
+                db.execute(UserDailyActivity.__table__.insert(), rows[start:start + BACKFILL_BATCH_SIZE])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        
+        logger.info(f"Backfilled {len(rows)} daily activity rows")
+        return len(rows)
+
+
+if __name__ == "__main__":
+    import app.main  # noqa: F401  (registers every model and creates missing tables)
+    from app.core.database import SessionLocal, create_tables
+    
+    create_tables()
+    session = SessionLocal()
+    try:
+        print(f"Backfilled {ActivityHistory.backfill(session)} daily activity rows")
+    finally:
+        session.close()
@@ -0,0 +1,75 @@
+from collections import OrderedDict
+from app.core.config import IDEMPOTENCY_KEY_TTL_SECONDS, IDEMPOTENCY_MAX_KEYS
+from typing import Any, Dict, Hashable, Optional
+import threading
+import time
+
+class IdempotencyConflict(Exception):
+    """The key is in use by a request that is still running, or was used for a different request."""
+
+
+class IdempotencyStore:
+    """Bounded in-process store of results for client-supplied idempotency keys.
+
+    ``begin`` reserves a (scope, key) pair and returns the stored result when
+    the same request already succeeded; ``finish`` stores the result and
+    ``abandon`` releases the reservation after a failure so the client can
+    retry. Entries expire after ``ttl_seconds`` and the oldest are evicted
+    beyond ``max_keys``.
+    """
+    
+    _PENDING = object()
+    
+    def __init__(self, ttl_seconds: float, max_keys: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_keys = max_keys
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.replays = 0
+    
+    def begin(self, scope: Hashable, key: str, fingerprint: Hashable) -> Optional[Any]:
+        """Stored result for a repeated request, or None after reserving the key for a new one."""
+        with self._lock:
+            self._expire()
+            entry = self._entries.get((scope, key))
+            if entry is not None:
+                _, stored_fingerprint, result = entry
+                if stored_fingerprint != fingerprint:
+                    raise IdempotencyConflict("Idempotency-Key was already used for a different request")
+                if result is self._PENDING:
+                    raise IdempotencyConflict("A request with this Idempotency-Key is still being processed")
+                self.replays += 1
+                return result
+            
+            self._entries[(scope, key)] = (time.monotonic() + self.ttl_seconds, fingerprint, self._PENDING)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+            return None
+    
+    def finish(self, scope: Hashable, key: str, fingerprint: Hashable, result: Any):
+        with self._lock:
+            self._entries[(scope, key)] = (time.monotonic() + self.ttl_seconds, fingerprint, result)
+            # The new expiry is the latest, so the entry goes last; _expire only looks at the front.
+            self._entries.move_to_end((scope, key))
+    
+    def abandon(self, scope: Hashable, key: str):
+        with self._lock:
+            entry = self._entries.get((scope, key))
+            if entry is not None and entry[2] is self._PENDING:
+                del self._entries[(scope, key)]
+    
+    def _expire(self):
+        now = time.monotonic()
+        while self._entries:
+            expires_at = next(iter(self._entries.values()))[0]
+            if expires_at > now:
+                break
+            self._entries.popitem(last=False)
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"keys": len(self._entries), "max_keys": self.max_keys,
+                    "ttl_seconds": self.ttl_seconds, "replays": self.replays}
+
+
+completion_idempotency = IdempotencyStore(IDEMPOTENCY_KEY_TTL_SECONDS, IDEMPOTENCY_MAX_KEYS)
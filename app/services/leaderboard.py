@@ -0,0 +1,196 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import DateTime, and_, func, literal, select
+from app.core.config import LEADERBOARD_REBUILD_MINUTES
+from app.models.achievements import Achievement, user_achievements
+from app.models.leaderboard import LeaderboardEntry
+from app.models.users import User
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import List, Dict, Optional
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# customer_id -> (loaded_at, ascending list of negated points, i.e. best score first,
+#                 {user_id: points} as held by that list).
+_boards = {}
+_boards_lock = threading.Lock()
+
+class Leaderboard:
+    """Per-customer leaderboards over the leaderboard_entries points index.
+
+    Each customer's scores are kept in memory as a sorted list loaded from the
+    (customer_id, points) index, so a user's rank is a binary search: 1 + the
+    number of users with more points. Completions add to the index in their
+    own transaction and patch the in-memory list after the commit; the patch
+    (``del`` + ``insort``) is an O(n) list move per completion, which is cheap
+    next to the commit for boards of up to tens of thousands of users per
+    customer, but would want a sorted container well beyond that. The lists
+    are reloaded every LEADERBOARD_REBUILD_MINUTES and the scheduled ``rebuild``
+    recomputes the index from user_achievements to correct any drift.
+
+    Each board also records the score it holds per user, which versions its
+    entries: a change is only applied while the board still holds the
+    change's old score, so a board reloaded or rebuilt between the commit
+    and ``apply_change`` (and thus already counting it) is left alone.
+    """
+    
+    @staticmethod
+    def add_points(db: Session, user_id: int, points: int) -> tuple:
+        """Add ``points`` to the user's entry (creating it if needed) without committing.
+
+        Returns the change to hand to ``apply_change`` once the caller has committed.
+        """
+        entry = db.query(LeaderboardEntry.customer_id, LeaderboardEntry.points).filter(
+            LeaderboardEntry.user_id == user_id
+        ).first()
+        if entry is None:
+            return Leaderboard._create_entry(db, user_id)
+        
+        db.query(LeaderboardEntry).filter(LeaderboardEntry.user_id == user_id).update(
+            {'points': LeaderboardEntry.points + points, 'updated_at': datetime.utcnow()},
+            synchronize_session=False
+        )
+        return entry.customer_id, user_id, entry.points, entry.points + points
+    
+    @staticmethod
+    def _create_entry(db: Session, user_id: int) -> tuple:
+        """Insert the user's entry with points summed from user_achievements."""
+        customer_id = db.query(User.customer_id).filter(User.id == user_id).scalar()
+        points = db.query(func.coalesce(func.sum(Achievement.point_value), 0)).select_from(
+            user_achievements.join(Achievement)
+        ).filter(and_(
+            user_achievements.c.user_id == user_id,
+            user_achievements.c.status == 'completed'
+        )).scalar()
+        db.add(LeaderboardEntry(user_id=user_id, customer_id=customer_id, points=int(points)))
+        db.flush()
+        return customer_id, user_id, None, int(points)
+    
+    @staticmethod
+    def apply_change(change: Optional[tuple]):
+        """Move a committed score change into the in-memory board, if that board is loaded."""
+        if not change:
+            return
+        customer_id, user_id, old_points, new_points = change
+        with _boards_lock:
+            board = _boards.get(customer_id)
+            if board is None:
+                return
+            _, scores, held = board
+            if held.get(user_id) != old_points:
+                # Loaded after this change committed (or out of step); the next reload reconciles it.
+                return
+            if old_points is not None:
+                index = bisect_left(scores, -old_points)
+                if index < len(scores) and scores[index] == -old_points:
+                    del scores[index]
+            insort(scores, -new_points)
+            held[user_id] = new_points
+    
+    @staticmethod
+    def _board(db: Session, customer_id: Optional[int]) -> List[int]:
+        with _boards_lock:
+            board = _boards.get(customer_id)
+            if board is not None and time.monotonic() - board[0] < LEADERBOARD_REBUILD_MINUTES * 60:
+                return board[1]
+        
+        rows = db.execute(
+            select(LeaderboardEntry.user_id, LeaderboardEntry.points).where(Leaderboard._customer_filter(customer_id))
+            .order_by(LeaderboardEntry.points.desc())
+        ).all()
+        with _boards_lock:
+            _boards[customer_id] = (time.monotonic(), [-row.points for row in rows],
+                                    {row.user_id: row.points for row in rows})
+            return _boards[customer_id][1]
+    
+    @staticmethod
+    def _customer_filter(customer_id: Optional[int]):
+        if customer_id is None:
+            return LeaderboardEntry.customer_id.is_(None)
+        return LeaderboardEntry.customer_id == customer_id
+    
+    @staticmethod
+    def _rank_of(scores: List[int], points: int) -> int:
+        with _boards_lock:
+            return bisect_left(scores, -points) + 1
+    
+    @staticmethod
+    def get_rank(db: Session, user_id: int) -> Dict:
+        """The user's rank among their customer's users (ties share a rank)."""
+        entry = db.get(LeaderboardEntry, user_id)
+        if entry is None:
+            change = Leaderboard._create_entry(db, user_id)
+            db.commit()
+            Leaderboard.apply_change(change)
+            entry = db.get(LeaderboardEntry, user_id)
+        
+        scores = Leaderboard._board(db, entry.customer_id)
+        return {
+            "rank": Leaderboard._rank_of(scores, entry.points),
+            "points": entry.points,
+            "participants": len(scores),
+            "customer_id": entry.customer_id
+        }
+    
+    @staticmethod
+    def top(db: Session, customer_id: Optional[int], limit: int = 10) -> List[Dict]:
+        """The ``limit`` highest-scoring users of a customer, read through the (customer_id, points) index."""
+        rows = db.query(
+            LeaderboardEntry.user_id, LeaderboardEntry.points, User.username, User.full_name
+        ).join(User, User.id == LeaderboardEntry.user_id).filter(
+            Leaderboard._customer_filter(customer_id)
+        ).order_by(LeaderboardEntry.points.desc(), LeaderboardEntry.user_id).limit(limit).all()
+        
+        scores = Leaderboard._board(db, customer_id)
+        return [
+            {
+                "rank": Leaderboard._rank_of(scores, row.points),
+                "user_id": row.user_id,
+                "username": row.username,
+                "full_name": row.full_name,
+                "points": row.points
+            }
+            for row in rows
+        ]
+    
+    @staticmethod
+    def rebuild(db: Session) -> Dict:
+        """Recompute every entry from user_achievements and drop the in-memory boards."""
+        earned = select(
+            user_achievements.c.user_id, func.sum(Achievement.point_value).label('points')
+        ).select_from(user_achievements.join(Achievement)).where(
+            user_achievements.c.status == 'completed'
+        ).group_by(user_achievements.c.user_id).subquery()
+        recomputed = select(
+            User.id.label('user_id'), User.customer_id,
+            func.coalesce(earned.c.points, 0).label('points'),
+            literal(datetime.utcnow(), DateTime).label('updated_at')
+        ).select_from(User).outerjoin(earned, earned.c.user_id == User.id)
+        
+        try:
+            current = recomputed.subquery()
+            drifted = db.execute(
+                select(func.count()).select_from(current).join(
+                    LeaderboardEntry, LeaderboardEntry.user_id == current.c.user_id
+                ).where(LeaderboardEntry.points != current.c.points)
+            ).scalar()
+            db.query(LeaderboardEntry).delete(synchronize_session=False)
+            db.execute(LeaderboardEntry.__table__.insert().from_select(
+                ['user_id', 'customer_id', 'points', 'updated_at'], recomputed
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        
+        with _boards_lock:
+            _boards.clear()
+        
+        entries = db.query(func.count(LeaderboardEntry.user_id)).scalar()
+        if drifted:
+            logger.warning(f"Leaderboard rebuild corrected {drifted} drifted entries")
+        logger.info(f"Leaderboard rebuilt with {entries} entries")
+        return {"entries": entries, "corrected": drifted}
@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from app.core.config import PROGRESS_CACHE_TTL_SECONDS, PROGRESS_CACHE_MAX_ENTRIES
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+import threading
+import time
+
+class ProgressCache:
+    """Bounded in-process cache of per-user read views, keyed by user id.
+
+    Entries expire after ``ttl_seconds`` (or earlier, at the ``expires_at``
+    given on set) and the least recently used entry is evicted once
+    ``max_entries`` is reached. Writers call ``invalidate`` after committing
+    so a user's next read sees their own write; other processes only rely on
+    the TTL.
+    """
+    
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+    
+    def get(self, user_id: int) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, user_id: int, value: Any, expires_at: Optional[datetime] = None):
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds
+        if expires_at is not None:
+            ttl = min(ttl, (expires_at - datetime.utcnow()).total_seconds())
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, user_id: int):
+        self.invalidate_many([user_id])
+    
+    def invalidate_many(self, user_ids: Iterable[int]):
+        with self._lock:
+            for user_id in user_ids:
+                if self._entries.pop(user_id, None) is not None:
+                    self.invalidations += 1
+    
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+
+progress_cache = ProgressCache(PROGRESS_CACHE_TTL_SECONDS, PROGRESS_CACHE_MAX_ENTRIES)
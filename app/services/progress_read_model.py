@@ -0,0 +1,193 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from app.models.progress import UserProgressSnapshot
+from app.models.users import User
+from app.services.progress_cache import progress_cache
+from datetime import datetime
+from typing import List, Dict, Optional
+import copy
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+FREQUENCIES = ('daily', 'weekly', 'monthly')
+# Completions kept in the snapshot for the dashboard's "recent" list.
+RECENT_LIMIT = 10
+REBUILD_BATCH_SIZE = 500
+
+class ProgressReadModel:
+    """Write-side maintenance and read-side lookups for UserProgressSnapshot.
+
+    Reads are a primary-key lookup. A missing or stale row (past valid_until) is
+    recomputed from user_achievements on the spot. Writers keep rows current:
+    completion applies a delta and assignment refreshes the affected users in
+    bulk. Expiry needs no write, since a snapshot goes stale at the next local
+    midnight, before any of its goals is past due. All of this happens in the
+    caller's transaction, and the caller commits.
+    """
+    
+    @staticmethod
+    def view(db: Session, user_id: int) -> Dict:
+        """Progress, current goals and recent completions of a user, served from progress_cache when possible.
+
+        The caller gets its own copy and may change it freely.
+        """
+        cached = progress_cache.get(user_id)
+        if cached is None:
+            cached = ProgressReadModel.cache_view(user_id, ProgressReadModel.load(db, user_id))
+        return copy.deepcopy(cached)
+    
+    @staticmethod
+    def cache_view(user_id: int, snapshot: UserProgressSnapshot) -> Dict:
+        """Build the view served by ``view`` from a fresh snapshot and put it in progress_cache."""
+        cached = {
+            "progress": ProgressReadModel.to_progress(snapshot),
+            "current_goals": ProgressReadModel.to_current_goals(snapshot),
+            "recent": ProgressReadModel.to_recent(snapshot)
+        }
+        progress_cache.set(user_id, cached, snapshot.valid_until)
+        return cached
+    
+    @staticmethod
+    def load(db: Session, user_id: int) -> UserProgressSnapshot:
+        """Fresh snapshot for a user, rebuilding (and committing) it if needed."""
+        snapshot = db.get(UserProgressSnapshot, user_id)
+        if snapshot is not None and snapshot.valid_until > datetime.utcnow():
+            return snapshot
+        
+        from app.services.goal_crud import GoalCRUD
+        from app.core.config import GOAL_ASSIGNMENT_MODE
+        if GOAL_ASSIGNMENT_MODE == 'lazy':
+            GoalCRUD.ensure_current_goals(db, user_id)
+        
+        ProgressReadModel.refresh(db, [user_id])
+        db.commit()
+        return db.get(UserProgressSnapshot, user_id)
+    
+    @staticmethod
+    def refresh(db: Session, user_ids: List[int], batch_size: int = REBUILD_BATCH_SIZE):
+        """Recompute the snapshots of ``user_ids`` from user_achievements."""
+        unique_ids = list(dict.fromkeys(user_ids))
+        for start in range(0, len(unique_ids), batch_size):
+            ProgressReadModel._refresh_batch(db, unique_ids[start:start + batch_size])
+    
+    @staticmethod
+    def _refresh_batch(db: Session, user_ids: List[int]):
+        from app.services.goal_crud import GoalCRUD
+        
+        now = datetime.utcnow()
+        valid_until = GoalCRUD._next_local_midnights(db, user_ids, now)
+        progress = GoalCRUD.get_users_progress(db, list(valid_until))
+        goals = GoalCRUD._current_goals_for_users(db, list(valid_until), now)
+        recent = GoalCRUD._recent_completions_for_users(db, list(valid_until), RECENT_LIMIT)
+        
+        ProgressReadModel.invalidate(db, user_ids)
+        rows = []
+        for user_id, expires_at in valid_until.items():
+            entry = progress[user_id]
+            completions = recent.get(user_id, [])
+            row = {
+                'user_id': user_id,
+                'total_points': entry["total_points"],
+                'last_completed_at': datetime.fromisoformat(completions[0]["completed_at"])
+                                     if completions and completions[0]["completed_at"] else None,
+                'current_goals': json.dumps(goals[user_id]),
+                'recent_completions': json.dumps(completions),
+                'valid_until': expires_at,
+                'updated_at': now
+            }
+            for frequency in FREQUENCIES:
+                row[f'{frequency}_pending'] = entry[frequency]["assigned"]
+                row[f'{frequency}_completed'] = entry[frequency]["completed"]
+            rows.append(row)
+        if rows:
+            db.execute(UserProgressSnapshot.__table__.insert(), rows)
+    
+    @staticmethod
+    def invalidate(db: Session, user_ids: List[int]):
+        """Drop snapshots so the next read rebuilds them."""
+        if user_ids:
+            db.query(UserProgressSnapshot).filter(
+                UserProgressSnapshot.user_id.in_(list(user_ids))
+            ).delete(synchronize_session=False)
+    
+    @staticmethod
+    def apply_completion(db: Session, user_id: int, achievement, completed_at: datetime):
+        """Apply one completed goal to the user's snapshot in O(1), or rebuild it if it isn't current."""
+        snapshot = db.query(UserProgressSnapshot).filter(
+            UserProgressSnapshot.user_id == user_id
+        ).populate_existing().first()
+        if snapshot is None or snapshot.valid_until <= completed_at or achievement.frequency not in FREQUENCIES:
+            ProgressReadModel.refresh(db, [user_id])
+            return
+        
+        frequency = achievement.frequency
+        setattr(snapshot, f'{frequency}_pending', max(getattr(snapshot, f'{frequency}_pending') - 1, 0))
+        setattr(snapshot, f'{frequency}_completed', getattr(snapshot, f'{frequency}_completed') + 1)
+        snapshot.total_points += achievement.point_value
+        snapshot.last_completed_at = completed_at
+        
+        goals = json.loads(snapshot.current_goals)
+        goals[frequency] = [goal for goal in goals.get(frequency, []) if goal["id"] != achievement.id]
+        snapshot.current_goals = json.dumps(goals)
+        
+        recent = json.loads(snapshot.recent_completions)
+        recent.insert(0, {
+            "id": achievement.id, "title": achievement.title, "points": achievement.point_value,
+            "completed_at": completed_at.isoformat()
+        })
+        snapshot.recent_completions = json.dumps(recent[:RECENT_LIMIT])
+    
+    @staticmethod
+    def rebuild_all(db: Session, batch_size: int = REBUILD_BATCH_SIZE) -> int:
+        """Regenerate every user's snapshot from user_achievements, committing per batch."""
+        last_user_id = 0
+        rebuilt = 0
+        while True:
+            user_ids = db.execute(
+                select(User.id).where(User.id > last_user_id).order_by(User.id).limit(batch_size)
+            ).scalars().all()
+            if not user_ids:
+                break
+            ProgressReadModel.refresh(db, user_ids)
+            db.commit()
+            progress_cache.invalidate_many(user_ids)
+            rebuilt += len(user_ids)
+            last_user_id = user_ids[-1]
+        logger.info(f"Rebuilt progress snapshots for {rebuilt} users")
+        return rebuilt
+    
+    @staticmethod
+    def to_progress(snapshot: UserProgressSnapshot) -> Dict:
+        from app.services.goal_crud import GOAL_TARGETS
+        progress = {
+            frequency: {
+                "completed": getattr(snapshot, f'{frequency}_completed'),
+                "total": GOAL_TARGETS[frequency],
+                "assigned": getattr(snapshot, f'{frequency}_pending')
+            }
+            for frequency in FREQUENCIES
+        }
+        progress["total_points"] = snapshot.total_points
+        return progress
+    
+    @staticmethod
+    def to_current_goals(snapshot: UserProgressSnapshot) -> Dict:
+        return json.loads(snapshot.current_goals)
+    
+    @staticmethod
+    def to_recent(snapshot: UserProgressSnapshot, limit: Optional[int] = None) -> List[Dict]:
+        return json.loads(snapshot.recent_completions)[:limit]
+
+
+if __name__ == "__main__":
+    import app.main  # noqa: F401  (registers every model and creates missing tables)
+    from app.core.database import SessionLocal, create_tables
+    
+    create_tables()
+    session = SessionLocal()
+    try:
+        print(f"Rebuilt progress snapshots for {ProgressReadModel.rebuild_all(session)} users")
+    finally:
+        session.close()
@@ -1,8 +1,15 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from sqlalchemy.orm import sessionmaker
-from app.core.database import engine
-from app.services.goal_crud import GoalCRUD
+from apscheduler.triggers.interval import IntervalTrigger
+from app.core.config import (
+    GOAL_ASSIGNMENT_MODE, GOAL_PREGENERATE_NEXT_PERIOD, GOAL_PREGENERATE_HOUR, GOAL_EXPIRY_SWEEP_INTERVAL_MINUTES,
+    LEADERBOARD_REBUILD_MINUTES
+)
+from app.core.database import SchedulerSessionLocal
+from app.services.goal_crud import GoalCRUD, GOAL_TARGETS
+from app.services.leaderboard import Leaderboard
+from app.services.streaks import StreakTracker
+from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,40 +19,56 @@ class GoalScheduler:
     
     def __init__(self):
         self.scheduler = BackgroundScheduler()
-        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self.SessionLocal = SchedulerSessionLocal
     
     def start(self):
         """Start the scheduler"""
         try:
+            if GOAL_ASSIGNMENT_MODE == 'stored':
+                self._add_assignment_jobs()
+            
+            self.scheduler.add_job(
+                func=self._sweep_expired_goals,
+                trigger=IntervalTrigger(minutes=GOAL_EXPIRY_SWEEP_INTERVAL_MINUTES),
+                id='sweep_expired_goals',
+                name='Sweep Expired Goals',
+                max_instances=1,
+                coalesce=True,
+                replace_existing=True
+            )
+            
             self.scheduler.add_job(
-                func=self._assign_daily_goals,
-                trigger=CronTrigger(hour=0, minute=1),
-                id='daily_goals_assignment',
-                name='Assign Daily Goals',
+                func=self._prune_goal_bookkeeping,
+                trigger=CronTrigger(hour=12, minute=30),
+                id='prune_goal_bookkeeping',
+                name='Prune Goal Claims and History',
                 replace_existing=True
             )
             
             self.scheduler.add_job(
-                func=self._assign_weekly_goals,
-                trigger=CronTrigger(day_of_week='mon', hour=0, minute=1),
-                id='weekly_goals_assignment',
-                name='Assign Weekly Goals',
+                func=self._close_missed_streaks,
+                trigger=CronTrigger(minute=5),
+                id='close_missed_streaks',
+                name='Reset Broken Weekly Streaks',
+                max_instances=1,
+                coalesce=True,
                 replace_existing=True
             )
             
             self.scheduler.add_job(
-                func=self._assign_monthly_goals,
-                trigger=CronTrigger(day=1, hour=0, minute=1),
-                id='monthly_goals_assignment',
-                name='Assign Monthly Goals',
+                func=self._rebuild_leaderboards,
+                trigger=IntervalTrigger(minutes=LEADERBOARD_REBUILD_MINUTES),
+                id='rebuild_leaderboards',
+                name='Rebuild Leaderboards',
+                max_instances=1,
+                coalesce=True,
                 replace_existing=True
             )
             
             self.scheduler.add_job(
-                func=self._cleanup_expired_goals,
-                trigger=CronTrigger(hour=23, minute=59),
-                id='cleanup_expired_goals',
-                name='Clean Expired Goals',
+                func=self._resume_interrupted_assignments,
+                id='resume_goal_assignments',
+                name='Resume Interrupted Goal Assignments',
                 replace_existing=True
             )
             
@@ -55,6 +78,68 @@ class GoalScheduler:
         except Exception as e:
             logger.error(f"Failed to start goal scheduler: {str(e)}")
     
+    def _add_assignment_jobs(self):
+        """Register the period-boundary assignment waves (not needed in lazy or stateless mode)"""
+        self._refresh_timezone_waves()
+        
+        self.scheduler.add_job(
+            func=self._refresh_timezone_waves,
+            trigger=CronTrigger(minute=30),
+            id='refresh_goal_assignment_waves',
+            name='Refresh Goal Assignment Waves',
+            replace_existing=True
+        )
+    
+    def _refresh_timezone_waves(self):
+        """Make sure every customer timezone has its own assignment (and pre-generation) jobs,
+        so each tenant's goals roll over at their local midnight rather than at UTC midnight"""
+        db = self.SessionLocal()
+        try:
+            timezones = GoalCRUD.active_timezones(db)
+        except Exception as e:
+            logger.error(f"Error loading customer timezones: {str(e)}")
+            return
+        finally:
+            db.close()
+        
+        for tz in timezones:
+            self._add_timezone_wave(tz)
+    
+    def _add_timezone_wave(self, tz: str):
+        """Register one timezone's assignment job at local midnight.
+
+        Daily, weekly and monthly boundaries all fall at midnight, so a single job
+        handles whichever of them start that day in one combined pass instead of
+        three jobs each scanning the users on a Monday the 1st.
+        """
+        job_id = f'goals_assignment:{tz}'
+        if not self.scheduler.get_job(job_id):
+            self.scheduler.add_job(
+                func=self._assign_goals_wave,
+                args=[tz],
+                trigger=CronTrigger(hour=0, minute=1, timezone=tz),
+                id=job_id,
+                name=f'Assign Goals ({tz})',
+                replace_existing=True
+            )
+        
+        if GOAL_PREGENERATE_NEXT_PERIOD:
+            self._add_pregeneration_job(tz)
+    
+    def _add_pregeneration_job(self, tz: str):
+        """Register the off-peak job that writes the periods starting at the next local midnight"""
+        job_id = f'goals_pregeneration:{tz}'
+        if self.scheduler.get_job(job_id):
+            return
+        self.scheduler.add_job(
+            func=self._pregenerate_goals,
+            args=[tz],
+            trigger=CronTrigger(hour=GOAL_PREGENERATE_HOUR, minute=0, timezone=tz),
+            id=job_id,
+            name=f'Pre-generate Goals ({tz})',
+            replace_existing=True
+        )
+    
     def stop(self):
         """Stop the scheduler"""
         try:
@@ -63,47 +148,90 @@ class GoalScheduler:
         except Exception as e:
             logger.error(f"Error stopping scheduler: {str(e)}")
     
-    def _assign_daily_goals(self):
-        """Background task to assign daily goals"""
+    def _assign_goals_wave(self, tz: str):
+        """Background task to assign every period starting at this local midnight to the users of one timezone"""
+        db = self.SessionLocal()
+        try:
+            midnight, _ = GoalCRUD._period_bounds('daily', datetime.utcnow(), tz)
+            frequencies = GoalCRUD.frequencies_starting_at(midnight, tz)
+            result = GoalCRUD.assign_goals_for_timezone(
+                db, frequencies, tz, job_id=f'goals_assignment:{tz}', incremental=True
+            )
+            logger.info(f"{'+'.join(frequencies)} goals assigned for {tz}: {result}")
+        except Exception as e:
+            logger.error(f"Error in goals assignment for {tz}: {str(e)}")
+        finally:
+            db.close()
+    
+    def _pregenerate_goals(self, tz: str = 'UTC'):
+        """Background task to write the periods starting at the next local midnight ahead of the boundary"""
+        db = self.SessionLocal()
+        try:
+            _, next_midnight = GoalCRUD._period_bounds('daily', datetime.utcnow(), tz)
+            frequencies = GoalCRUD.frequencies_starting_at(next_midnight, tz)
+            result = GoalCRUD.pregenerate_next_period(db, frequencies, tz=tz)
+            logger.info(f"Next-period {'+'.join(frequencies)} goals pre-generated for {tz}: {result}")
+        except Exception as e:
+            logger.error(f"Error pre-generating goals for {tz}: {str(e)}")
+        finally:
+            db.close()
+    
+    def _resume_interrupted_assignments(self):
+        """Background task to finish assignment jobs interrupted by a restart
+        and to catch up users that missed the current period while we were down"""
+        db = self.SessionLocal()
+        try:
+            results = GoalCRUD.resume_interrupted_assignments(db)
+            if results:
+                logger.info(f"Resumed interrupted goal assignments: {results}")
+            
+            if GOAL_ASSIGNMENT_MODE != 'stored':
+                return
+            
+            catch_up = GoalCRUD.assign_goals(db, list(GOAL_TARGETS), incremental=True)
+            logger.info(f"Goal catch-up after start: {catch_up}")
+        except Exception as e:
+            logger.error(f"Error resuming goal assignments: {str(e)}")
+        finally:
+            db.close()
+    
+    def _sweep_expired_goals(self):
+        """Background task to mark past-due goals as expired, a few small batches at a time"""
         db = self.SessionLocal()
         try:
-            result = GoalCRUD.assign_daily_goals(db)
-            logger.info(f"Daily goals assigned: {result}")
+            GoalCRUD.sweep_expired_goals(db)
         except Exception as e:
-            logger.error(f"Error in daily goals assignment: {str(e)}")
+            logger.error(f"Error in expired goals sweep: {str(e)}")
         finally:
             db.close()
     
-    def _assign_weekly_goals(self):
-        """Background task to assign weekly goals"""
+    def _prune_goal_bookkeeping(self):
+        """Background task to drop old lazy-assignment claims and selection history"""
         db = self.SessionLocal()
         try:
-            result = GoalCRUD.assign_weekly_goals(db)
-            logger.info(f"Weekly goals assigned: {result}")
+            GoalCRUD.prune_goal_bookkeeping(db)
         except Exception as e:
-            logger.error(f"Error in weekly goals assignment: {str(e)}")
+            logger.error(f"Error pruning goal bookkeeping: {str(e)}")
         finally:
             db.close()
     
-    def _assign_monthly_goals(self):
-        """Background task to assign monthly goals"""
+    def _rebuild_leaderboards(self):
+        """Background task to recompute the leaderboard points index and correct drift"""
         db = self.SessionLocal()
         try:
-            result = GoalCRUD.assign_monthly_goals(db)
-            logger.info(f"Monthly goals assigned: {result}")
+            Leaderboard.rebuild(db)
         except Exception as e:
-            logger.error(f"Error in monthly goals assignment: {str(e)}")
+            logger.error(f"Error rebuilding leaderboards: {str(e)}")
         finally:
             db.close()
     
-    def _cleanup_expired_goals(self):
-        """Background task to clean up expired goals"""
+    def _close_missed_streaks(self):
+        """Background task to reset weekly streaks once a timezone's week has rolled over without a completion"""
         db = self.SessionLocal()
         try:
-            cleaned_count = GoalCRUD.cleanup_expired_goals(db)
-            logger.info(f"Cleaned up {cleaned_count} expired goals")
+            StreakTracker.close_missed_periods(db)
         except Exception as e:
-            logger.error(f"Error in cleanup expired goals: {str(e)}")
+            logger.error(f"Error resetting weekly streaks: {str(e)}")
         finally:
             db.close()
     
@@ -0,0 +1,151 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, select
+from app.models.achievements import user_achievements
+from app.models.customer import Customer
+from app.models.streaks import UserStreak
+from app.models.users import User
+from datetime import datetime
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+STREAK_FREQUENCY = 'weekly'
+BACKFILL_BATCH_SIZE = 1000
+
+class StreakTracker:
+    """Weekly streaks kept as (current, best, last qualifying week) per user.
+
+    A week qualifies once the user completes any goal in it. Completions update
+    the row in O(1); the daily rollover zeroes the streaks of users who missed
+    the previous week, and readers apply the same rule so a late rollover never
+    shows a stale streak.
+    """
+    
+    @staticmethod
+    def _period_keys(now: datetime, tz: Optional[str]) -> tuple:
+        """(current, previous) week keys in ``tz``."""
+        from app.services.goal_crud import GoalCRUD
+        return (GoalCRUD._period_key(STREAK_FREQUENCY, now, tz),
+                GoalCRUD._previous_period_keys(STREAK_FREQUENCY, now, 1, tz)[0])
+    
+    @staticmethod
+    def record_completion(db: Session, user_id: int, completed_at: datetime, tz: Optional[str] = None):
+        """Count a completion towards the user's streak. The caller commits."""
+        from app.services.goal_crud import GoalCRUD
+        tz = tz or GoalCRUD.get_user_timezone(db, user_id)
+        current_key, previous_key = StreakTracker._period_keys(completed_at, tz)
+        
+        streak = db.get(UserStreak, user_id)
+        if streak is None:
+            streak = UserStreak(user_id=user_id, current_streak=0, best_streak=0)
+            db.add(streak)
+        if streak.last_period_key == current_key:
+            return
+        
+        streak.current_streak = streak.current_streak + 1 if streak.last_period_key == previous_key else 1
+        streak.best_streak = max(streak.best_streak or 0, streak.current_streak)
+        streak.last_period_key = current_key
+    
+    @staticmethod
+    def get_streak(db: Session, user_id: int) -> Dict:
+        row = db.query(UserStreak, func.coalesce(Customer.timezone, 'UTC')).select_from(User).outerjoin(
+            UserStreak, UserStreak.user_id == User.id
+        ).outerjoin(Customer, User.customer_id == Customer.id).filter(User.id == user_id).first()
+        if row is None or row[0] is None:
+            return {"current": 0, "best": 0, "last_period": None}
+        
+        streak, tz = row
+        current = streak.current_streak
+        if streak.last_period_key not in StreakTracker._period_keys(datetime.utcnow(), tz):
+            current = 0
+        return {"current": current, "best": streak.best_streak, "last_period": streak.last_period_key}
+    
+    @staticmethod
+    def close_missed_periods(db: Session) -> int:
+        """Period rollover: zero the streaks whose last qualifying week is before last week, per timezone."""
+        from app.services.goal_crud import GoalCRUD
+        now = datetime.utcnow()
+        reset = 0
+        try:
+            for tz in GoalCRUD.active_timezones(db):
+                _, previous_key = StreakTracker._period_keys(now, tz)
+                reset += db.query(UserStreak).filter(and_(
+                    UserStreak.current_streak > 0,
+                    UserStreak.last_period_key < previous_key,
+                    UserStreak.user_id.in_(select(User.id).where(*GoalCRUD._scope_criteria(f"timezone:{tz}")))
+                )).update({'current_streak': 0, 'updated_at': now}, synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        if reset:
+            logger.info(f"Reset {reset} broken weekly streaks")
+        return reset
+    
+    @staticmethod
+    def backfill(db: Session) -> int:
+        """Recompute every streak from completed goals in one pass over user_achievements.
+
+        Completions are streamed ordered by (user, completion time); each user's
+        streak is folded as the rows go by, so memory holds one row per user.
+        """
+        from app.services.goal_crud import GoalCRUD
+        now = datetime.utcnow()
+        completions = db.execute(
+            select(user_achievements.c.user_id, user_achievements.c.created_at,
+                   func.coalesce(Customer.timezone, 'UTC'))
+            .select_from(user_achievements.join(User, User.id == user_achievements.c.user_id)
+                         .outerjoin(Customer, User.customer_id == Customer.id))
+            .where(and_(user_achievements.c.status == 'completed', user_achievements.c.created_at.isnot(None)))
+            .order_by(user_achievements.c.user_id, user_achievements.c.created_at)
+            .execution_options(yield_per=BACKFILL_BATCH_SIZE)
+        )
+        
+        rows = []
+        state = None
+        
+        def finish(state):
+            user_id, current, best, last_key, open_keys = state
+            rows.append({'user_id': user_id, 'current_streak': current if last_key in open_keys else 0,
+                         'best_streak': best, 'last_period_key': last_key, 'updated_at': now})
+        
+        for user_id, completed_at, tz in completions:
+            week_key = GoalCRUD._period_key(STREAK_FREQUENCY, completed_at, tz)
+            if state is None or state[0] != user_id:
+                if state is not None:
+                    finish(state)
+                state = [user_id, 1, 1, week_key, StreakTracker._period_keys(now, tz)]
+                continue
+            if week_key == state[3]:
+                continue
+            previous_key = GoalCRUD._previous_period_keys(STREAK_FREQUENCY, completed_at, 1, tz)[0]
+            state[1] = state[1] + 1 if state[3] == previous_key else 1
+            state[2] = max(state[2], state[1])
+            state[3] = week_key
+        if state is not None:
+            finish(state)
+        
+        try:
+            db.query(UserStreak).delete(synchronize_session=False)
+            for start in range(0, len(rows), BACKFILL_BATCH_SIZE):
+                db.execute(UserStreak.__table__.insert(), rows[start:start + BACKFILL_BATCH_SIZE])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        
+        logger.info(f"Backfilled weekly streaks for {len(rows)} users")
+        return len(rows)
+
+
+if __name__ == "__main__":
+    import app.main  # noqa: F401  (registers every model and creates missing tables)
+    from app.core.database import SessionLocal, create_tables
+    
+    create_tables()
+    session = SessionLocal()
+    try:
+        print(f"Backfilled weekly streaks for {StreakTracker.backfill(session)} users")
+    finally:
+        session.close()
@@ -0,0 +1,34 @@
+import os
+import tempfile
+
+# The engines are built when app.core.database is imported, so point them at a
+# throwaway database before any app module is loaded.
+_tmpdir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir.name, 'test.db')}"
+os.environ.setdefault("LOOP_MONITOR_ENABLED", "false")
+
+import pytest
+
+from app.core.database import Base, SessionLocal, engine
+import app.models  # noqa: F401
+import app.models.customer  # noqa: F401
+from app.services.progress_cache import progress_cache
+from app.services import leaderboard
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    progress_cache.clear()
+    leaderboard._boards.clear()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    engine.dispose()
+    _tmpdir.cleanup()
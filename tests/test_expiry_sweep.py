@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta
+
+from app.models.achievements import Achievement, user_achievements
+from app.models.progress import UserProgressSnapshot
+from app.models.users import User
+from app.services.goal_crud import GoalCRUD
+from app.services.progress_cache import progress_cache
+from app.services.progress_read_model import ProgressReadModel
+
+
+def test_sweep_expires_rows_without_dropping_snapshots(db):
+    user = User(username="u1", email="u1@example.com", password_hash="x", salt="x")
+    achievement = Achievement(title="daily0", point_value=1, duration=1, frequency="daily")
+    db.add_all([user, achievement])
+    db.commit()
+    now = datetime.utcnow()
+    db.execute(user_achievements.insert().values(
+        user_id=user.id, achievement_id=achievement.id, status="pending",
+        created_at=now - timedelta(days=1, hours=1), due_date=now - timedelta(hours=1)
+    ))
+    db.commit()
+    ProgressReadModel.view(db, user.id)
+
+    assert GoalCRUD.sweep_expired_goals(db, pause_seconds=0) == 1
+
+    assert db.query(user_achievements.c.status).scalar() == "expired"
+    assert db.get(UserProgressSnapshot, user.id) is not None
+    assert progress_cache.get(user.id) is None
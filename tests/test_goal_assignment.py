@@ -0,0 +1,236 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.achievements import Achievement, user_achievements
+from app.models.customer import Customer
+from app.models.goal_jobs import GoalAssignmentCheckpoint
+from app.models.users import User
+from app.services import goal_crud
+from app.services.goal_crud import GoalCRUD, GOAL_TARGETS
+from app.services.goal_parallel import assign_goals_parallel
+from app.services.progress_cache import progress_cache
+from app.services.progress_read_model import ProgressReadModel
+
+
+class _Clock(datetime):
+    """datetime whose utcnow() is pinned, so a test can walk GoalCRUD across period boundaries."""
+    current = None
+
+    @classmethod
+    def utcnow(cls):
+        return cls.current
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.setattr(goal_crud, "datetime", _Clock)
+    monkeypatch.setattr(goal_crud, "GOAL_ASSIGNMENT_MODE", "stored")
+    monkeypatch.setattr(goal_crud, "GOAL_ASSIGNMENT_WORKERS", 1)
+    return _Clock
+
+
+def _seed(db, users=3, catalog=None, customer_id=None):
+    for i in range(users):
+        db.add(User(username=f"u{i}", email=f"u{i}@example.com", password_hash="x", salt="x",
+                    customer_id=customer_id))
+    for frequency, count in (catalog or {"daily": 7, "weekly": 5, "monthly": 4}).items():
+        for i in range(count):
+            db.add(Achievement(title=f"{frequency}{i}", point_value=1, duration=1, frequency=frequency))
+    db.commit()
+    return [user.id for user in db.query(User).filter(User.customer_id == customer_id).order_by(User.id)]
+
+
+def _live_goals(db, user_id, frequency, now):
+    return [row.achievement_id for row in db.query(user_achievements).join(Achievement).filter(
+        user_achievements.c.user_id == user_id,
+        Achievement.frequency == frequency,
+        GoalCRUD._is_live_pending(now)
+    )]
+
+
+def _all_rows(db):
+    return sorted(tuple(row) for row in db.query(user_achievements).all())
+
+
+def test_full_run_gives_every_user_the_target_of_each_frequency(db, clock):
+    user_ids = _seed(db)
+    clock.current = datetime(2026, 3, 10, 9, 0)
+
+    result = GoalCRUD.assign_goals(db, list(GOAL_TARGETS))
+
+    assert result["assigned_to_users"] == len(user_ids)
+    assert result["total_goals_assigned"] == sum(GOAL_TARGETS.values()) * len(user_ids)
+    for user_id in user_ids:
+        for frequency, target in GOAL_TARGETS.items():
+            goals = _live_goals(db, user_id, frequency, clock.current)
+            assert len(goals) == len(set(goals)) == target
+
+
+def test_small_catalog_leaves_unfillable_slots_empty(db, clock):
+    user_ids = _seed(db, catalog={"daily": 3})
+    clock.current = datetime(2026, 3, 10, 9, 0)
+
+    result = GoalCRUD.assign_goals(db, "daily")
+
+    assert result["errors"] == []
+    assert result["total_goals_assigned"] == 3 * len(user_ids)
+    for user_id in user_ids:
+        assert sorted(_live_goals(db, user_id, "daily", clock.current)) == [1, 2, 3]
+
+
+def test_completed_rows_keep_their_keys(db, clock):
+    user_id = _seed(db, users=1)[0]
+    done = [1, 2]
+    for achievement_id in done:
+        db.execute(user_achievements.insert().values(
+            user_id=user_id, achievement_id=achievement_id, status="completed",
+            created_at=datetime(2026, 3, 1, 12, 0), due_date=datetime(2026, 3, 2)
+        ))
+    db.commit()
+    clock.current = datetime(2026, 3, 10, 9, 0)
+
+    GoalCRUD.assign_goals(db, "daily")
+
+    goals = _live_goals(db, user_id, "daily", clock.current)
+    assert len(goals) == GOAL_TARGETS["daily"]
+    assert not set(goals) & set(done)
+    assert db.query(user_achievements).filter(user_achievements.c.status == "completed").count() == len(done)
+
+
+def test_incremental_rerun_is_a_no_op(db, clock):
+    _seed(db)
+    clock.current = datetime(2026, 3, 10, 9, 0)
+    GoalCRUD.assign_goals(db, list(GOAL_TARGETS))
+    before = _all_rows(db)
+
+    clock.current = datetime(2026, 3, 10, 15, 0)
+    result = GoalCRUD.assign_goals(db, list(GOAL_TARGETS), incremental=True)
+
+    assert result["assigned_to_users"] == 0
+    assert result["total_goals_assigned"] == 0
+    assert _all_rows(db) == before
+
+
+def test_goals_of_the_previous_period_are_not_repeated(db, clock, monkeypatch):
+    monkeypatch.setattr(goal_crud, "GOAL_NO_REPEAT_PERIODS", 1)
+    user_ids = _seed(db, catalog={"daily": 10})
+    clock.current = datetime(2026, 3, 10, 9, 0)
+    GoalCRUD.assign_goals(db, "daily")
+    yesterday = {user_id: set(_live_goals(db, user_id, "daily", clock.current)) for user_id in user_ids}
+
+    clock.current = datetime(2026, 3, 11, 0, 1)
+    GoalCRUD.assign_goals(db, "daily")
+
+    for user_id in user_ids:
+        today = set(_live_goals(db, user_id, "daily", clock.current))
+        assert len(today) == GOAL_TARGETS["daily"]
+        assert not today & yesterday[user_id]
+
+
+def test_monday_the_first_assigns_all_frequencies_in_one_pass(db, clock):
+    user_ids = _seed(db)
+    boundary = datetime(2026, 6, 1)
+    assert boundary.weekday() == 0
+    frequencies = GoalCRUD.frequencies_starting_at(boundary, "UTC")
+    assert frequencies == ["daily", "weekly", "monthly"]
+
+    clock.current = boundary + timedelta(minutes=1)
+    result = GoalCRUD.assign_goals_for_timezone(db, frequencies, "UTC", "goals_assignment:UTC", incremental=True)
+
+    assert result["total_goals_assigned"] == sum(GOAL_TARGETS.values()) * len(user_ids)
+    for user_id in user_ids:
+        for frequency, target in GOAL_TARGETS.items():
+            assert len(_live_goals(db, user_id, frequency, clock.current)) == target
+    assert [row.frequency for row in db.query(GoalAssignmentCheckpoint)] == ["daily+weekly+monthly"]
+
+
+def test_timezone_wave_covers_its_customers_on_their_calendar(db, clock):
+    customer = Customer(company_name="Tokyo Co", company_email="t@example.com", timezone="Asia/Tokyo",
+                        admin_first_name="A", admin_last_name="B", admin_email="a@example.com")
+    db.add(customer)
+    db.commit()
+    utc_users = _seed(db, users=1)
+    tokyo_users = _seed(db, users=2, catalog={}, customer_id=customer.id)
+    # 16:00 UTC on the 10th is 01:00 on the 11th in Tokyo; its day ends at 15:00 UTC on the 11th.
+    clock.current = datetime(2026, 3, 10, 16, 0)
+
+    GoalCRUD.assign_goals_for_timezone(db, ["daily"], "Asia/Tokyo", "goals_assignment:Asia/Tokyo")
+
+    due_dates = {row.user_id: row.due_date for row in db.query(user_achievements)}
+    assert set(due_dates) == set(tokyo_users)
+    assert set(due_dates.values()) == {datetime(2026, 3, 11, 15, 0)}
+    assert not _live_goals(db, utc_users[0], "daily", clock.current)
+
+
+@pytest.mark.parametrize("frequency, period_start, evening, boundary", [
+    ("daily", datetime(2026, 3, 10), datetime(2026, 3, 10, 23, 0), datetime(2026, 3, 11)),
+    ("weekly", datetime(2026, 3, 9), datetime(2026, 3, 15, 23, 0), datetime(2026, 3, 16)),
+])
+def test_pregenerated_period_is_topped_up_at_the_boundary(db, clock, frequency, period_start, evening, boundary):
+    user_ids = _seed(db)
+    target = GOAL_TARGETS[frequency]
+    clock.current = period_start + timedelta(hours=9)
+    GoalCRUD.assign_goals(db, frequency)
+
+    # The current goals still hold their keys, so the pre-generated period comes out short.
+    clock.current = evening
+    GoalCRUD.pregenerate_next_period(db, [frequency])
+    pregenerated = db.query(user_achievements).filter(user_achievements.c.created_at == boundary).count()
+    assert 0 < pregenerated < target * len(user_ids)
+
+    clock.current = boundary + timedelta(minutes=1)
+    result = GoalCRUD.assign_goals_for_timezone(db, [frequency], "UTC", "goals_assignment:UTC", incremental=True)
+
+    assert result["assigned_to_users"] == len(user_ids)
+    for user_id in user_ids:
+        goals = _live_goals(db, user_id, frequency, clock.current)
+        assert len(goals) == target
+        assert len(set(goals)) == len(goals)
+
+
+def test_checkpoint_with_another_scope_restarts(db, clock):
+    user_ids = _seed(db, users=4)
+    clock.current = datetime(2026, 3, 10, 9, 0)
+    # A first run planned shard 0 as the first two users and got through both of them...
+    GoalCRUD._assign_goals_in_chunks(db, GoalCRUD._frequency_targets("daily"), "job:shard-0",
+                                     f"range:{user_ids[0]}-{user_ids[1]}")
+    # ...the rerun re-plans shard 0 over all four users and must not resume after user 2.
+    result = GoalCRUD._assign_goals_in_chunks(db, GoalCRUD._frequency_targets("daily"), "job:shard-0",
+                                              f"range:{user_ids[0]}-{user_ids[-1]}")
+
+    assert result["assigned_to_users"] == len(user_ids)
+    for user_id in user_ids:
+        assert len(_live_goals(db, user_id, "daily", clock.current)) == GOAL_TARGETS["daily"]
+
+
+def test_parallel_run_without_users_reports_like_the_others(db, clock):
+    clock.current = datetime(2026, 3, 10, 9, 0)
+    result = assign_goals_parallel(db, GoalCRUD._frequency_targets("daily"), "job", 2, base_scope="timezone:UTC")
+
+    assert result["assigned_to_users"] == 0
+    assert result["total_goals_assigned"] == 0
+    assert result["errors"] == []
+
+
+def test_single_user_assignment_invalidates_the_cached_view(db, clock):
+    user_id = _seed(db, users=1)[0]
+    clock.current = datetime.utcnow()
+    assert ProgressReadModel.view(db, user_id)["current_goals"]["daily"] == []
+    assert progress_cache.get(user_id) is not None
+
+    GoalCRUD.assign_goals(db, "daily", user_id=user_id)
+
+    assert progress_cache.get(user_id) is None
+
+
+def test_parallel_run_invalidates_the_cached_views(db, clock):
+    user_ids = _seed(db, users=4)
+    clock.current = datetime.utcnow()
+    for user_id in user_ids:
+        ProgressReadModel.view(db, user_id)
+
+    result = assign_goals_parallel(db, GoalCRUD._frequency_targets("daily"), "job", 2, base_scope="timezone:UTC")
+
+    assert result["assigned_to_users"] == len(user_ids)
+    assert all(progress_cache.get(user_id) is None for user_id in user_ids)
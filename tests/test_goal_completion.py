@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+import threading
+
+import pytest
+
+from app.core.database import SessionLocal
+from app.models.achievements import Achievement, user_achievements
+from app.models.history import UserDailyActivity
+from app.models.leaderboard import LeaderboardEntry
+from app.models.users import User
+from app.services import goal_crud
+from app.services.goal_crud import GoalCRUD
+from app.services.leaderboard import Leaderboard
+from app.services.progress_read_model import ProgressReadModel
+
+POINTS = 7
+
+
+def _seed(db):
+    user = User(username="u1", email="u1@example.com", password_hash="x", salt="x")
+    db.add(user)
+    for frequency, count in (("daily", 6), ("weekly", 4), ("monthly", 3)):
+        for i in range(count):
+            db.add(Achievement(title=f"{frequency}{i}", point_value=POINTS, duration=1, frequency=frequency))
+    db.commit()
+    return user.id
+
+
+def _current_goal(db, user_id, mode):
+    now = datetime.utcnow()
+    if mode == "stateless":
+        return GoalCRUD._derive_current_goals(db, user_id, now)["daily"][0]["id"]
+    achievement_id = db.query(Achievement.id).filter(Achievement.frequency == "daily").first()[0]
+    db.execute(user_achievements.insert().values(
+        user_id=user_id, achievement_id=achievement_id, status="pending",
+        created_at=now - timedelta(minutes=1), due_date=now + timedelta(hours=1)
+    ))
+    db.commit()
+    return achievement_id
+
+
+def _complete_in_parallel(user_id, achievement_id, workers=2):
+    barrier = threading.Barrier(workers)
+    results, errors = [], []
+
+    def complete():
+        session = SessionLocal()
+        try:
+            barrier.wait()
+            results.append(GoalCRUD.complete_achievement(session, user_id, achievement_id))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=complete) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+@pytest.mark.parametrize("mode", ["stored", "lazy", "stateless"])
+def test_parallel_completion_counts_once(db, monkeypatch, mode):
+    monkeypatch.setattr(goal_crud, "GOAL_ASSIGNMENT_MODE", mode)
+    user_id = _seed(db)
+    achievement_id = _current_goal(db, user_id, mode)
+    # Materialise the snapshot and leaderboard entry so the completion patches them in place.
+    ProgressReadModel.view(db, user_id)
+    Leaderboard.get_rank(db, user_id)
+    db.commit()
+
+    results, errors = _complete_in_parallel(user_id, achievement_id)
+
+    assert len(results) == 1
+    assert len(errors) == 1
+    db.expire_all()
+    completed = db.query(user_achievements).filter(
+        user_achievements.c.user_id == user_id, user_achievements.c.status == "completed"
+    ).count()
+    assert completed == 1
+    assert db.get(LeaderboardEntry, user_id).points == POINTS
+    assert sum(row.points_earned for row in db.query(UserDailyActivity).filter_by(user_id=user_id)) == POINTS
+    assert GoalCRUD.get_user_progress(db, user_id)["total_points"] == POINTS
+
+
+@pytest.mark.parametrize("mode", ["stored", "lazy", "stateless"])
+def test_second_completion_is_rejected(db, monkeypatch, mode):
+    monkeypatch.setattr(goal_crud, "GOAL_ASSIGNMENT_MODE", mode)
+    user_id = _seed(db)
+    achievement_id = _current_goal(db, user_id, mode)
+
+    GoalCRUD.complete_achievement(db, user_id, achievement_id)
+    with pytest.raises(Exception, match="already completed"):
+        GoalCRUD.complete_achievement(db, user_id, achievement_id)
+    assert db.get(LeaderboardEntry, user_id).points == POINTS
@@ -0,0 +1,23 @@
+import numpy as np
+
+from app.services.goal_derivation import catalog_version, derive_goal_ids
+from app.services.goal_sampler import sample_goal_matrix
+
+CATALOG = [1, 2, 3, 4]
+WEIGHTS = {1: 1.0, 2: 0.0, 3: 2.0, 4: 0.0}
+
+
+def test_weight_zero_items_are_never_derived():
+    for user_id in range(50):
+        goals = derive_goal_ids(user_id, "daily", "2026-03-10", catalog_version(CATALOG), CATALOG, 3, WEIGHTS)
+        assert sorted(goals) == [1, 3]
+
+
+def test_derivation_and_stored_sampler_agree_on_weight_zero():
+    matrix = sample_goal_matrix(np.asarray(CATALOG), 50, 3, seed=1,
+                                weights=np.asarray([WEIGHTS[aid] for aid in CATALOG]))
+    derived = derive_goal_ids(7, "daily", "2026-03-10", catalog_version(CATALOG), CATALOG, 3, WEIGHTS)
+
+    assert all(sorted(row[row >= 0].tolist()) == [1, 3] for row in matrix)
+    assert (matrix < 0).sum(axis=1).tolist() == [1] * 50
+    assert len(derived) == 2
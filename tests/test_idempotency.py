@@ -0,0 +1,48 @@
+import pytest
+
+from app.services.idempotency import IdempotencyStore, IdempotencyConflict
+
+
+def test_repeated_key_replays_the_first_result():
+    store = IdempotencyStore(ttl_seconds=60, max_keys=10)
+    assert store.begin(1, "key", 5) is None
+    store.finish(1, "key", 5, {"points_earned": 7})
+
+    assert store.begin(1, "key", 5) == {"points_earned": 7}
+    assert store.stats()["replays"] == 1
+
+
+def test_key_in_flight_or_reused_for_another_goal_conflicts():
+    store = IdempotencyStore(ttl_seconds=60, max_keys=10)
+    store.begin(1, "key", 5)
+    with pytest.raises(IdempotencyConflict):
+        store.begin(1, "key", 5)
+
+    store.finish(1, "key", 5, {})
+    with pytest.raises(IdempotencyConflict):
+        store.begin(1, "key", 6)
+
+
+def test_abandoned_key_can_be_retried():
+    store = IdempotencyStore(ttl_seconds=60, max_keys=10)
+    store.begin(1, "key", 5)
+    store.abandon(1, "key")
+
+    assert store.begin(1, "key", 5) is None
+
+
+def test_entries_expire_in_expiry_order(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr("app.services.idempotency.time.monotonic", lambda: clock[0])
+    store = IdempotencyStore(ttl_seconds=10, max_keys=10)
+    store.begin(1, "slow", 5)
+    clock[0] = 1
+    store.begin(1, "fast", 6)
+    store.finish(1, "fast", 6, {"fast": True})
+    clock[0] = 5
+    store.finish(1, "slow", 5, {"slow": True})
+
+    # "fast" expired at 11; "slow", finished later, lives until 15.
+    clock[0] = 12
+    assert store.begin(1, "fast", 6) is None
+    assert store.begin(1, "slow", 5) == {"slow": True}
@@ -0,0 +1,37 @@
+from app.models.users import User
+from app.services import leaderboard
+from app.services.leaderboard import Leaderboard
+
+
+def _user(db, name):
+    user = User(username=name, email=f"{name}@example.com", password_hash="x", salt="x")
+    db.add(user)
+    db.commit()
+    return user.id
+
+
+def test_change_is_applied_to_a_loaded_board(db):
+    first, second = _user(db, "a"), _user(db, "b")
+    Leaderboard.get_rank(db, first)
+    Leaderboard.get_rank(db, second)
+
+    change = Leaderboard.add_points(db, second, 5)
+    db.commit()
+    Leaderboard.apply_change(change)
+
+    assert leaderboard._boards[None][1] == [-5, 0]
+    assert Leaderboard.get_rank(db, second)["rank"] == 1
+
+
+def test_change_is_skipped_when_board_reloaded_after_commit(db):
+    user_id = _user(db, "a")
+    Leaderboard.get_rank(db, user_id)
+
+    change = Leaderboard.add_points(db, user_id, 5)
+    db.commit()
+    # A rebuild lands between the commit and apply_change; the reloaded board already has the points.
+    leaderboard._boards.clear()
+    Leaderboard.get_rank(db, user_id)
+    Leaderboard.apply_change(change)
+
+    assert leaderboard._boards[None][1] == [-5]
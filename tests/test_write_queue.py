@@ -0,0 +1,73 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core import write_queue as write_queue_module
+from app.core.write_queue import WriteCancelled, WriteOutcomeUnknown, WriteQueue, run_write, run_write_async
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    queue = WriteQueue()
+    monkeypatch.setattr(write_queue_module, "write_queue", queue)
+    monkeypatch.setattr(write_queue_module, "WRITE_QUEUE_ENABLED", True)
+    monkeypatch.setattr(write_queue_module, "WRITE_QUEUE_RESULT_TIMEOUT", 0.2)
+    yield queue
+    queue.shutdown()
+
+
+def _blocking(release: threading.Event, ran: list, started: threading.Event = None):
+    def operation(session, value):
+        if started is not None:
+            started.set()
+        release.wait(5)
+        ran.append(value)
+        return value
+    return operation
+
+
+def test_write_that_never_started_is_cancelled(queue):
+    release, ran, started = threading.Event(), [], threading.Event()
+    busy = queue.submit(_blocking(release, ran, started), "first")
+    # Once the first write holds the writer, the second stays queued.
+    assert started.wait(5)
+
+    with pytest.raises(WriteCancelled):
+        run_write(None, _blocking(release, ran), "second")
+    release.set()
+
+    assert busy.result(timeout=5) == "first"
+    queue.shutdown()
+    assert ran == ["first"]
+
+
+def test_running_write_reports_unknown_outcome(queue):
+    release, ran = threading.Event(), []
+
+    with pytest.raises(WriteOutcomeUnknown) as raised:
+        run_write(None, _blocking(release, ran), "value")
+    release.set()
+
+    assert raised.value.future.result(timeout=5) == "value"
+    assert ran == ["value"]
+
+
+def test_async_caller_gets_the_same_errors(queue):
+    release, ran, started = threading.Event(), [], threading.Event()
+
+    async def complete_twice():
+        first = asyncio.ensure_future(run_write_async(None, _blocking(release, ran, started), "first"))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        with pytest.raises(WriteCancelled):
+            await run_write_async(None, _blocking(release, ran), "second")
+        with pytest.raises(WriteOutcomeUnknown) as raised:
+            await first
+        return raised.value.future
+
+    future = asyncio.run(complete_twice())
+    release.set()
+
+    assert future.result(timeout=5) == "first"
+    queue.shutdown()
+    assert ran == ["first"]